@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: bench_core_driver
+@date: 2026/10/20 02:20
+@desc: CoreDriver / BasePage 端到端基准：连接本地 FakeAppiumServer，度量定位、点击、等待、滑动、弹窗清理等
+       操作的耗时 (p50 / p95) 与 HTTP 往返次数，并与基线文件比较，往返次数增加或耗时明显变慢时以退出码 1 失败
+
+用法:
+    python -m benchmarks.bench_core_driver                # 与 benchmarks/baseline.json 比较
+    python -m benchmarks.bench_core_driver --update       # 重新生成基线
+    python -m benchmarks.bench_core_driver --latency 0.02 # 模拟 20ms 网络延迟
+"""
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable, Optional
+
+from core.driver import CoreDriver
+from page_objects.wan_android_home import HomePage
+from utils.fake_appium import FakeAppiumServer
+
+BENCH_DIR = Path(__file__).resolve().parent
+FIXTURE = BENCH_DIR / "fixtures" / "home.xml"
+BASELINE = BENCH_DIR / "baseline.json"
+
+CAPS = {"platformName": "Android", "appium:automationName": "UiAutomator2"}
+
+# 耗时回归判定：超过基线 (1 + LATENCY_TOLERANCE) 倍且绝对差值大于 LATENCY_SLACK_MS 视为变慢
+LATENCY_TOLERANCE = 1.0
+LATENCY_SLACK_MS = 2.0
+
+POPUP = ("id", "com.app:id/global_ad_close")
+
+
+class BenchServer(FakeAppiumServer):
+    """点击广告关闭按钮后将其从层级中移除，使 clear_popups 走完整的“发现-点击-等待消失”路径"""
+
+    def on_click(self, node) -> None:
+        if node.get("resource-id") == POPUP[1]:
+            self.remove(node)
+
+
+@dataclass
+class BenchResult:
+    name: str
+    p50_ms: float
+    p95_ms: float
+    round_trips: int
+
+
+def _scenarios(driver: CoreDriver, page: HomePage, server: BenchServer) -> dict[str, tuple[Callable, Optional[Callable]]]:
+    """场景名 -> (被测操作, 每次执行前的准备动作)"""
+    reset = lambda: server.load(FIXTURE)  # noqa: E731
+    return {
+        "find_element": (lambda: driver.find_element("id", "com.manu.wanandroid:id/tvTitle"), None),
+        "find_elements": (lambda: driver.find_elements("id", "com.manu.wanandroid:id/tvArticleTitle"), None),
+        "click": (lambda: driver.click("accessibility id", "开启"), None),
+        "get_text": (lambda: driver.get_text("id", "com.manu.wanandroid:id/tvTitle"), None),
+        "input": (lambda: driver.input("id", "com.manu.wanandroid:id/tvTitle", "abc"), reset),
+        "is_visible": (lambda: driver.is_visible(*HomePage.menu), None),
+        "is_visible_missing": (lambda: driver.is_visible("id", "com.app:id/not_exist"), None),
+        "wait_until_visible": (lambda: driver.wait_until_visible(*HomePage.project, timeout=1), None),
+        "swipe": (lambda: driver.swipe("up", duration=100), None),
+        "clear_popups": (page.handle_business_ads, reset),
+        "clear_popups_absent": (page.handle_business_ads, lambda: None),
+        "page_is_current": (page.is_current, None),
+    }
+
+
+def _measure(action: Callable, setup: Optional[Callable], server: FakeAppiumServer,
+             iterations: int) -> tuple[list[float], int]:
+    """执行 iterations 次，返回每次耗时 (ms) 与单次往返次数 (取最大值，避免偶发重试被平均掉)"""
+    costs, trips = [], 0
+    for _ in range(iterations):
+        if setup:
+            setup()
+        before = server.round_trips
+        start = time.perf_counter()
+        action()
+        costs.append((time.perf_counter() - start) * 1000)
+        trips = max(trips, server.round_trips - before)
+    return costs, trips
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run(iterations: int = 20, latency: float = 0.0, only: Optional[list[str]] = None) -> list[BenchResult]:
+    """
+    启动本地替身服务并依次执行各场景。
+    :param iterations: 每个场景的执行次数
+    :param latency: 每次请求附加的延迟 (秒)
+    :param only: 只执行指定场景
+    :return: 各场景结果
+    """
+    results = []
+    with BenchServer(FIXTURE, latency=latency) as server:
+        driver = CoreDriver().server_config(port=server.port).connect("android", CAPS, retries=1, backoff=0)
+        # 保活线程的 ping 会混入往返统计
+        driver._stop_keepalive()
+        page = HomePage(driver.driver)
+        try:
+            for name, (action, setup) in _scenarios(driver, page, server).items():
+                if only and name not in only:
+                    continue
+                # 预热一次 (首次调用包含连接建立等一次性开销)
+                if setup:
+                    setup()
+                action()
+                costs, trips = _measure(action, setup, server, iterations)
+                results.append(BenchResult(name, round(statistics.median(costs), 3),
+                                           round(_percentile(costs, 95), 3), trips))
+        finally:
+            driver.quit()
+    return results
+
+
+def compare(results: list[BenchResult], baseline: dict) -> list[str]:
+    """
+    与基线比较。
+    往返次数严格比较 (不受机器性能影响)；耗时按 p50 比较并留有余量。
+    :param results: 本次结果
+    :param baseline: 基线 {场景名: {"p50_ms", "p95_ms", "round_trips"}}
+    :return: 回归描述列表，为空表示通过
+    """
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if base is None:
+            continue
+        if result.round_trips > base["round_trips"]:
+            regressions.append(f"{result.name}: 往返次数 {base['round_trips']} -> {result.round_trips}")
+        limit = max(base["p50_ms"] * (1 + LATENCY_TOLERANCE), base["p50_ms"] + LATENCY_SLACK_MS)
+        if result.p50_ms > limit:
+            regressions.append(f"{result.name}: p50 {base['p50_ms']:.2f}ms -> {result.p50_ms:.2f}ms")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CoreDriver / BasePage 端到端基准 (本地替身 Appium 服务)")
+    parser.add_argument("--iterations", type=int, default=20, help="每个场景的执行次数")
+    parser.add_argument("--latency", type=float, default=0.0, help="每次请求附加的延迟 (秒)")
+    parser.add_argument("--only", nargs="*", help="只执行指定场景")
+    parser.add_argument("--baseline", default=str(BASELINE), help="基线文件")
+    parser.add_argument("--update", action="store_true", help="以本次结果覆盖基线")
+    cli_args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    bench_results = run(cli_args.iterations, cli_args.latency, cli_args.only)
+    print(f"{'场景':<22}{'p50(ms)':>10}{'p95(ms)':>10}{'往返':>6}")
+    for r in bench_results:
+        print(f"{r.name:<22}{r.p50_ms:>10.2f}{r.p95_ms:>10.2f}{r.round_trips:>6}")
+
+    baseline_path = Path(cli_args.baseline)
+    if cli_args.update:
+        baseline_path.write_text(json.dumps({r.name: {k: v for k, v in asdict(r).items() if k != "name"}
+                                             for r in bench_results}, ensure_ascii=False, indent=2) + "\n",
+                                 encoding="utf-8")
+        print(f"基线已更新: {baseline_path}")
+    elif baseline_path.exists():
+        found = compare(bench_results, json.loads(baseline_path.read_text(encoding="utf-8")))
+        for line in found:
+            print(f"[回归] {line}")
+        sys.exit(1 if found else 0)
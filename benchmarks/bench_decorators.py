@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: bench_decorators
+@date: 2026/10/20 01:30
+@desc: step_trace 单次调用开销的微基准：旧实现 (每次 inspect.signature + repr) 与当前实现在
+       INFO 开启 / 关闭、精简模式下的对比
+
+用法: python -m benchmarks.bench_decorators [--number 20000]
+"""
+import argparse
+import inspect
+import logging
+import timeit
+from functools import wraps
+
+from utils.decorators import StepTracer, step_trace, set_lean_mode
+
+
+def legacy_step_trace(step_desc="", source='wrapper'):
+    """优化前的 step_trace：每次调用都解析签名并 repr 全部参数"""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            params = list(inspect.signature(func).parameters.values())
+            display_args = args[1:] if params and params[0].name in ('self', 'cls') else args
+            all_params = ", ".join([repr(a) for a in display_args] + [f"{k}={v!r}" for k, v in kwargs.items()])
+            with StepTracer(step_desc, source, f"{func.__module__}.{func.__name__}({all_params})"):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class Page:
+    def plain(self, by, value, timeout=None):
+        return value
+
+    @legacy_step_trace("旧实现")
+    def legacy(self, by, value, timeout=None):
+        return value
+
+    @step_trace("当前实现")
+    def current(self, by, value, timeout=None):
+        return value
+
+
+def _per_call(stmt, number: int) -> float:
+    """取 5 轮中最快一轮的单次耗时 (微秒)"""
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1_000_000
+
+
+def run(number: int) -> list[tuple[str, float]]:
+    page = Page()
+    args = ("id", "com.app:id/login")
+    wrapper_logger = logging.getLogger("wrapper")
+    wrapper_logger.propagate = False
+    wrapper_logger.addHandler(logging.NullHandler())
+
+    results = [("直接调用", _per_call(lambda: page.plain(*args), number))]
+    for level, label in ((logging.INFO, "INFO 开启"), (logging.WARNING, "INFO 关闭")):
+        wrapper_logger.setLevel(level)
+        results.append((f"旧实现 ({label})", _per_call(lambda: page.legacy(*args), number)))
+        results.append((f"当前实现 ({label})", _per_call(lambda: page.current(*args), number)))
+    set_lean_mode(True)
+    try:
+        results.append(("当前实现 (精简模式)", _per_call(lambda: page.current(*args), number)))
+    finally:
+        set_lean_mode(False)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="step_trace 单次调用开销微基准")
+    parser.add_argument("--number", type=int, default=20000, help="每轮调用次数")
+    cli_args = parser.parse_args()
+    for name, cost in run(cli_args.number):
+        print(f"{name:<20} {cost:8.2f} µs/次")
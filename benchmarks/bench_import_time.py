@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: bench_import_time
+@date: 2026/10/20 04:40
+@desc: 导入耗时基准：在独立进程中以 python -X importtime 导入 conftest、core、页面对象等模块，
+       统计各模块自身带来的累计导入耗时 (pytest / allure 预先导入，不计入)，超出预算，
+       或在创建 driver 之前就加载了 Appium 客户端等重量级依赖时以退出码 1 失败，防止启动耗时悄悄回退
+
+用法:
+    python -m benchmarks.bench_import_time              # 检查全部模块
+    python -m benchmarks.bench_import_time --top 15     # 同时列出自身耗时最高的 15 个依赖
+    python -m benchmarks.bench_import_time --only conftest --repeat 10
+"""
+import argparse
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# 预先导入的模块：pytest 运行时本来就会加载，不计入被测模块的耗时
+PRELOAD = ("pytest", "allure")
+
+# 各模块的累计导入耗时预算 (ms)，约为当前耗时的 2~3 倍，给不同机器留出余量 (延迟导入前 core.driver 约 340ms)
+BUDGETS_MS: dict[str, float] = {
+    "conftest": 200.0,
+    "core.driver": 120.0,
+    "core.base_page": 120.0,
+    "page_objects.wan_android_home": 120.0,
+    "utils.decorators": 30.0,
+    "utils.finder": 10.0,
+}
+
+# 创建 driver 之前不应加载的模块 (前缀匹配)
+FORBIDDEN = ("appium", "selenium.webdriver.support.expected_conditions", "selenium.webdriver.support.wait",
+             "selenium.webdriver.remote.webdriver", "selenium.webdriver.common.action_chains")
+
+
+@dataclass
+class ImportProfile:
+    module: str
+    # 被测模块的累计导入耗时 (ms)
+    cumulative_ms: float
+    # 被测模块导入过程中新加载的模块 -> 自身耗时 (ms)
+    self_ms: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def forbidden(self) -> list[str]:
+        return sorted(m for m in self.self_ms if any(m == f or m.startswith(f + ".") for f in FORBIDDEN))
+
+
+def parse_importtime(stderr: str) -> dict[str, tuple[float, float]]:
+    """
+    解析 -X importtime 的输出。
+    :param stderr: 子进程的标准错误输出
+    :return: {模块名: (自身耗时 µs, 累计耗时 µs)}，同名模块只保留首次导入
+    """
+    result: dict[str, tuple[float, float]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            result.setdefault(name.strip(), (float(self_us), float(cumulative_us)))
+        except ValueError:
+            continue
+    return result
+
+
+def profile(module: str) -> ImportProfile:
+    """
+    在独立进程中导入模块并统计耗时。
+    :param module: 被测模块
+    :return: ImportProfile
+    :raises RuntimeError: 导入失败
+    """
+    code = f"import {', '.join(PRELOAD)}; import sys; sys.stderr.write('--- import {module}\\n'); import {module}"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=BASE_DIR,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{proc.stderr[-2000:]}")
+    # 只统计标记之后 (被测模块导入过程中) 加载的模块
+    timings = parse_importtime(proc.stderr.split(f"--- import {module}\n", 1)[-1])
+    if module not in timings:
+        raise RuntimeError(f"未在 importtime 输出中找到 {module} (是否已被预先导入?)")
+    return ImportProfile(module, timings[module][1] / 1000,
+                         {name: self_us / 1000 for name, (self_us, _) in timings.items()})
+
+
+def run(modules: list[str], repeat: int) -> list[ImportProfile]:
+    """
+    每个模块导入 repeat 次，取累计耗时的中位数。
+    :param modules: 被测模块
+    :param repeat: 每个模块的导入次数
+    :return: 每个模块耗时为中位数的那次结果
+    """
+    results = []
+    for module in modules:
+        samples = sorted((profile(module) for _ in range(max(repeat, 1))), key=lambda p: p.cumulative_ms)
+        results.append(samples[len(samples) // 2])
+    return results
+
+
+def check(results: list[ImportProfile], budgets: Optional[dict[str, float]] = None) -> list[str]:
+    """
+    检查预算与禁止提前加载的模块。
+    :param results: run 的结果
+    :param budgets: 预算 {模块: ms}，默认 BUDGETS_MS
+    :return: 回归描述列表，为空表示通过
+    """
+    budgets = BUDGETS_MS if budgets is None else budgets
+    regressions = []
+    for result in results:
+        budget = budgets.get(result.module)
+        if budget is not None and result.cumulative_ms > budget:
+            regressions.append(f"{result.module}: 导入耗时 {result.cumulative_ms:.1f}ms 超出预算 {budget:.0f}ms")
+        if result.forbidden:
+            regressions.append(f"{result.module}: 提前加载了 {', '.join(result.forbidden[:5])}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="模块导入耗时基准 (python -X importtime)")
+    parser.add_argument("--only", nargs="*", help="只检查指定模块")
+    parser.add_argument("--repeat", type=int, default=5, help="每个模块的导入次数 (取中位数)")
+    parser.add_argument("--top", type=int, default=0, help="列出每个模块自身耗时最高的 N 个依赖")
+    cli_args = parser.parse_args()
+
+    import_results = run(cli_args.only or list(BUDGETS_MS), cli_args.repeat)
+    print(f"{'模块':<34}{'耗时(ms)':>10}{'预算(ms)':>10}")
+    for r in import_results:
+        budget_ms = BUDGETS_MS.get(r.module)
+        print(f"{r.module:<34}{r.cumulative_ms:>10.1f}{'-' if budget_ms is None else f'{budget_ms:.0f}':>10}")
+        for name, ms in sorted(r.self_ms.items(), key=lambda kv: kv[1], reverse=True)[:cli_args.top]:
+            print(f"    {name:<48}{ms:>8.1f}")
+
+    found = check(import_results)
+    for line in found:
+        print(f"[回归] {line}")
+    sys.exit(1 if found else 0)
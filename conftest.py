@@ -10,21 +10,46 @@
 @desc: Pytest 核心配置与 Fixture 管理
 """
 import logging
+import os
 import secrets
+import time
 from pathlib import Path
-from typing import Generator, Any
+from typing import Generator, Any, Optional
 
 import pytest
 import allure
 from dotenv import load_dotenv
 
+# 先加载 .env：部分模块在导入时读取环境变量 (如 utils.cassette 的脱敏器登记 .env 中的密码)
+load_dotenv()
+
 from core.run_appium import start_appium_service, stop_appium_service
 from core.driver import CoreDriver
-from core.settings import APPIUM_HOST, APPIUM_PORT
-from core.enums import AppPlatform
+from core.settings import (APPIUM_HOST, APPIUM_PORT, LOG_SOURCE, LOG_RATE_LIMITED_LOGGERS,
+                           CASSETTE_PATH, SIMULATOR_SCENARIO, LOCATOR_PROFILE_PATH, NAV_COSTS_PATH)
+from core.enums import AppPlatform, ResetLevel
+from core.app_reset import AppResetter
+from core.navigator import navigator
 from core.config_loader import get_caps
+from utils.locator_advisor import locator_profiler
+from utils.run_history import RunHistory
+from utils.artifact_store import artifact_store
+from utils.log_archive import RUN_ID_MARK
+from utils.trace_exporter import trace_recorder
+from utils.decorators import set_lean_mode
+from utils.data_loader import parametrize_from_marker
+from utils.logger import (setup_async_logging, stop_async_logging, rate_limit, log_context, current_run_id,
+                          session_var, test_var)
+from utils.failure_classifier import INFRA_PATTERNS, PRODUCT_PATTERNS, classify
+from utils.fake_appium import FakeAppiumServer
+from utils.cassette import cassette_recorder, ReplayServer
+from utils.device_simulator import DeviceSimulator
 
-load_dotenv()
+# 本次运行各用例的阶段耗时与结果，会话结束时写入执行历史
+_test_records: dict[str, dict] = {}
+_session_started_at = time.time()
+# 代替 Appium Server 的本地服务 (--cassette_mode replay / --simulator)，为空时连接真实的 Appium
+_local_server: Optional[FakeAppiumServer] = None
 
 
 # 注册命令行参数
@@ -36,8 +61,147 @@ def pytest_addoption(parser: Any) -> None:
     parser.addoption("--platform", action="store", default="android1", help="目标平台: Android or IOS")
     parser.addoption("--caps_name", action="store", default=None, help="配置文件中的设备/平台名称")
     parser.addoption("--udid", action="store", default=None, help="设备唯一标识")
+    parser.addoption("--profile", action="store", default=None,
+                     help="caps.yaml 中 profiles 下的命名覆盖配置 (默认读取环境变量 APP_PROFILE)")
+    parser.addoption("--cap", action="append", default=[], metavar="KEY=VALUE",
+                     help="覆盖单个 caps 字段 (可重复)，优先级高于 profile 与 APPIUM_CAP_* 环境变量")
     parser.addoption("--host", action="store", default=APPIUM_HOST, help="Appium Server Host")
     parser.addoption("--port", action="store", default=str(APPIUM_PORT), help="Appium Server Port")
+    parser.addoption("--system_port", action="store", default=None,
+                     help="设备独占的 systemPort (Android) / wdaLocalPort (iOS)，多设备并行时避免端口冲突")
+    parser.addoption("--mjpeg_port", action="store", default=None, help="设备独占的 mjpegServerPort")
+    parser.addoption("--app_version", action="store", default=os.getenv("APP_VERSION", "unknown"),
+                     help="被测 App 版本 (写入执行历史，可通过环境变量 APP_VERSION 设置)")
+    parser.addoption("--reset_level", action="store", default=ResetLevel.NONE.value,
+                     choices=[level.value for level in ResetLevel],
+                     help="用例前 App 状态重置级别 (可被 reset 标记覆盖)，校验失败时自动升级")
+    parser.addoption("--rerun_policy", action="store", default="infra", choices=["infra", "all"],
+                     help="失败重跑策略: infra 仅重跑基础设施失败 (会话丢失、元素过期、服务端 5xx), all 重跑所有失败")
+    parser.addoption("--page_affinity", action="store", default="on", choices=["on", "off"],
+                     help="按 start_page / end_page 标记重排用例，使相邻用例之间的导航代价最小")
+    parser.addoption("--log_path", action="store", default=str(LOG_SOURCE), help="日志文件路径")
+    parser.addoption("--log_async", action="store", default="on", choices=["on", "off"],
+                     help="on: 日志由后台线程写入 --log_path；off: 沿用 pytest.ini 的 log_file 同步写入")
+    parser.addoption("--log_style", action="store", default="text", choices=["text", "json"],
+                     help="异步日志文件格式，json 每行包含 session / test / step 字段")
+    parser.addoption("--lean_mode", action="store_true", default=False,
+                     help="精简模式：step_trace / StepTracer 不输出步骤日志、不记录 Trace，降低大规模回归的开销")
+    parser.addoption("--locator_profile_file", action="store", default=str(LOCATOR_PROFILE_PATH),
+                     help="定位耗时数据输出文件 (多设备模式下每个工作进程各自一份，由编排进程合并)")
+    parser.addoption("--nav_costs_file", action="store", default=str(NAV_COSTS_PATH),
+                     help="页面跳转耗时输出文件 (历史数据仍从 NAV_COSTS_PATH 读取)")
+    parser.addoption("--trace_file", action="store", default=None,
+                     help="导出 Chrome Trace Event JSON (用例、步骤、driver 命令、截图)，可在 ui.perfetto.dev 中打开")
+    parser.addoption("--cassette_mode", action="store", default="off", choices=["off", "record", "replay"],
+                     help="WebDriver 流量录制回放: record 连接真机并录制到 --cassette，replay 由本地服务回放 (无需设备)")
+    parser.addoption("--cassette", action="store", default=str(CASSETTE_PATH), help="录制回放使用的 cassette 文件")
+    parser.addoption("--simulator", action="store", nargs="?", const=str(SIMULATOR_SCENARIO), default=None,
+                     help="使用设备模拟器代替 Appium 与真机，可指定场景文件 (默认 config/simulator/wan_android.yaml)")
+    parser.addoption("--history_order", action="store", default="none", choices=["none", "slowest", "failed"],
+                     help="按执行历史排序用例: slowest 最慢优先, failed 最近失败优先")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """
+    配置日志、失败重跑策略，并注册自定义标记。
+    :param config: Pytest 配置对象
+    """
+    # 异步日志：关闭 pytest 自带的同步文件日志 (写入 devnull)，改由 QueueListener 后台线程写盘
+    if config.getoption("--log_async") == "on":
+        config.option.log_file = os.devnull
+        setup_async_logging(config.getoption("--log_path"), fmt=config.getoption("--log_style"))
+    session_var.set(current_run_id())
+    rate_limit(*LOG_RATE_LIMITED_LOGGERS)
+    if config.getoption("--lean_mode"):
+        set_lean_mode(True)
+    if config.getoption("--trace_file"):
+        trace_recorder.start(config.getoption("--udid") or config.getoption("--caps_name") or "local")
+    global _local_server
+    match config.getoption("--cassette_mode"):
+        case "record":
+            cassette_recorder.start(config.getoption("--cassette"))
+        case "replay":
+            if config.getoption("--simulator"):
+                raise pytest.UsageError("--simulator 不能与 --cassette_mode replay 同时使用")
+            _local_server = ReplayServer(config.getoption("--cassette")).start()
+    if config.getoption("--simulator"):
+        _local_server = DeviceSimulator(config.getoption("--simulator")).start()
+    # 运行 ID 写入日志，归档时据此建立索引 (python main.py logs search --run <ID>)
+    logging.info(f"{RUN_ID_MARK}{current_run_id()}")
+
+    # 仅重跑基础设施失败：未显式指定 --only-rerun / --rerun-except 时，使用失败分类的正则
+    if config.getoption("--rerun_policy") == "infra" and hasattr(config.option, "only_rerun"):
+        if not (config.option.only_rerun or config.getini("only_rerun")
+                or config.option.rerun_except or config.getini("rerun_except")):
+            config.option.only_rerun = list(INFRA_PATTERNS)
+            config.option.rerun_except = list(PRODUCT_PATTERNS)
+
+    config.addinivalue_line(
+        "markers",
+        "reset(level, check=None, link=None): 用例前的 App 状态重置级别、校验定位符 (by, value) 与首页深链接"
+    )
+    # 注意：标记的唯一参数为类时会被 pytest 当作被装饰对象，传页面类需使用 pytest.mark.start_page.with_args(Page)
+    config.addinivalue_line("markers", "start_page(page): 用例开始时所在的页面类名，执行前自动导航")
+    config.addinivalue_line("markers", "end_page(page): 用例结束时所在的页面，缺省与 start_page 相同 (用于用例排序)")
+    config.addinivalue_line(
+        "markers",
+        "data_file(path, sheet=None, ids=None, cache=True): 按数据文件 (xlsx/csv/yaml/jsonl，相对 DATA_DIR) 逐行参数化，"
+        "同名列注入为参数，或通过 data_row 接收整行"
+    )
+
+
+def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
+    """
+    按 data_file 标记逐行参数化用例 (数据流式读取并按内容哈希缓存，见 utils.data_loader)。
+    :param metafunc: Pytest 参数化上下文
+    """
+    parametrize_from_marker(metafunc)
+
+
+def pytest_unconfigure(config: pytest.Config) -> None:
+    """
+    导出 Trace 文件、写出录制的 cassette，并等待后台日志线程写完剩余日志。
+    :param config: Pytest 配置对象
+    """
+    if trace_recorder.enabled:
+        trace_recorder.stop()
+        trace_recorder.dump(config.getoption("--trace_file"))
+    cassette_recorder.stop()
+    if _local_server is not None:
+        _local_server.stop()
+    stop_async_logging()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item: pytest.Item, nextitem: Optional[pytest.Item]) -> Generator[None, Any, None]:
+    """
+    用例执行期间在结构化日志中记录当前用例 nodeid (录制的请求同样按 nodeid 分段)，开启 Trace 导出时记录用例时间片，
+    回放模式下切换到该用例的录制片段。
+    :param item: 测试用例
+    :param nextitem: 下一个测试用例
+    """
+    replay = _local_server if isinstance(_local_server, ReplayServer) else None
+    if replay:
+        replay.begin(item.nodeid)
+    with log_context(test_var, item.nodeid), trace_recorder.span(item.nodeid, "test"):
+        logging.getLogger("pytest").info(f"开始执行用例: {item.nodeid}")
+        yield
+    if replay and (mismatches := replay.end()):
+        logging.getLogger("pytest").warning(f"回放差异 ({item.nodeid}): {len(mismatches)} 处")
+
+
+def _marker_page(item: pytest.Item, name: str) -> Optional[str]:
+    """
+    读取 start_page / end_page 标记声明的页面名称。
+    :param item: 测试用例
+    :param name: 标记名称
+    :return: 页面类名，未声明时返回 None
+    """
+    marker = item.get_closest_marker(name)
+    if not marker or not marker.args:
+        return None
+    page = marker.args[0]
+    return page if isinstance(page, str) else page.__name__
 
 
 @pytest.fixture(scope="session")
@@ -45,8 +209,11 @@ def appium_server(request: pytest.FixtureRequest) -> Generator[Any, None, None]:
     """
     第一层：管理 Appium Server 进程。
     :param request: Pytest 请求对象
-    :return: Appium 服务进程实例
+    :return: Appium 服务进程实例 (回放 / 模拟器模式下为本地服务)
     """
+    if _local_server is not None:
+        yield _local_server
+        return
     # 获取命令行参数
     host = request.config.getoption("--host")
     port = int(request.config.getoption("--port"))
@@ -69,14 +236,23 @@ def driver_session(request: pytest.FixtureRequest, appium_server: Any) -> Genera
     # 配置名称(caps_name)（决定去 YAML 哪个节点拿数据，默认等于 platform）
     caps_name = request.config.getoption("--caps_name") or platform
     ud_id = request.config.getoption("--udid")
+    system_port = request.config.getoption("--system_port")
+    mjpeg_port = request.config.getoption("--mjpeg_port")
     host = request.config.getoption("--host")
     port = int(request.config.getoption("--port"))
+    if isinstance(appium_server, FakeAppiumServer):
+        host, port = appium_server.server_address[0], appium_server.port
 
-    # 1. 获取基础 Caps
-    caps = get_caps(caps_name)
+    # 1. 命令行覆盖值 (优先级最高)
+    overrides = dict(item.split("=", 1) for item in request.config.getoption("--cap") if "=" in item)
+    if ud_id: overrides["udid"] = ud_id
+    if system_port:
+        port_key = "wdaLocalPort" if str(platform).lower() == AppPlatform.IOS.value else "systemPort"
+        overrides[port_key] = int(system_port)
+    if mjpeg_port: overrides["mjpegServerPort"] = int(mjpeg_port)
 
-    # 2. 动态注入参数
-    if ud_id: caps["udid"] = ud_id
+    # 2. 逐层合并: 基础 Caps -> profile -> APPIUM_CAP_* 环境变量 -> 命令行
+    caps = get_caps(caps_name, overrides, request.config.getoption("--profile"))
 
     # 将最终生效的 caps 存入 pytest 配置，方便报告读取
     request.config._final_caps = caps
@@ -87,9 +263,11 @@ def driver_session(request: pytest.FixtureRequest, appium_server: Any) -> Genera
     driver_helper.server_config(host=host, port=port)
 
     try:
+        # connect 内置指数退避重试；连接成功后会话失效会自动恢复，并在空闲时保活
         driver_helper.connect(platform=platform, caps=caps)
     except Exception as e:
-        pytest.exit(f"无法初始化 Driver: {e}")
+        # 不再中断整个运行：依赖 driver 的用例记为 error，其余用例与报告照常进行
+        pytest.fail(f"无法初始化 Driver: {e}", pytrace=False)
 
     yield driver_helper
 
@@ -97,17 +275,58 @@ def driver_session(request: pytest.FixtureRequest, appium_server: Any) -> Genera
     driver_helper.quit()
 
 
+@pytest.fixture(scope="session")
+def app_resetter(driver_session: CoreDriver) -> Generator[AppResetter, None, None]:
+    """
+    会话级 App 状态重置器，会话结束时输出各重置级别的耗时统计。
+    :param driver_session: CoreDriver 会话实例
+    :return: AppResetter 实例
+    """
+    resetter = AppResetter(driver_session)
+    yield resetter
+    if resetter.timings:
+        logging.info("App 状态重置耗时统计:\n" + resetter.summary())
+
+
 @pytest.fixture(scope="function")
-def driver(driver_session: CoreDriver) -> Generator[Any, None, None]:
+def driver(request: pytest.FixtureRequest, driver_session: CoreDriver,
+           app_resetter: AppResetter) -> Generator[Any, None, None]:
     """
     第三层：用例级 Driver 注入。
-    每个用例直接获取已存在的 Driver 实例。
-    可以在这里添加 reset_app() 逻辑，确保用例间独立性。
+    每个用例直接获取已存在的 Driver 实例，并按 reset 标记或 --reset_level 重置 App 状态，确保用例间独立性。
+    会话内的第一个用例使用刚启动的 App，不做重置。
+    :param request: Pytest 请求对象
     :param driver_session: CoreDriver 会话实例
+    :param app_resetter: App 状态重置器
     :return: 原始 Appium Driver 对象 (webdriver.Remote)
     """
-    # 可选：如果需要在每个用例前重置 App 状态
-    # driver_session.driver.reset() 
+    marker = request.node.get_closest_marker("reset")
+    level = marker.args[0] if marker and marker.args else request.config.getoption("--reset_level")
+    options = marker.kwargs if marker else {}
+
+    if getattr(request.config, "_app_used", False):
+        app_resetter.reset(level, check=options.get("check"), link=options.get("link"))
+    request.config._app_used = True
+
+    # 重跑时复用健康的会话，会话已失效则重建
+    if getattr(request.node, "execution_count", 1) > 1 and not driver_session.is_healthy():
+        logging.warning("重跑前检测到会话已失效，正在重建会话...")
+        driver_session.restart_session()
+
+    # 导航到用例声明的起始页面，导航失败时冷启动 App 后重试
+    start_page = _marker_page(request.node, "start_page")
+    if start_page:
+        page_cls = navigator.pages.get(start_page)
+        if page_cls is None:
+            pytest.fail(f"start_page 标记中的页面 {start_page} 未注册，已注册的页面: {sorted(navigator.pages)}",
+                        pytrace=False)
+        try:
+            navigator.navigate_to(driver_session.driver, page_cls)
+        except Exception as e:
+            logging.warning(f"导航到起始页面 {start_page} 失败，重启 App 后重试: {e}")
+            app_resetter.reset(ResetLevel.RELAUNCH)
+            navigator.navigate_to(driver_session.driver, page_cls)
+    # NEW_SESSION 级别会重建 driver，因此在重置之后再取
     yield driver_session.driver
 
 
@@ -129,6 +348,7 @@ def pytest_exception_interact(node: Any, call: Any, report: Any) -> None:
 
         logger.error(f"\n{'=' * 40} TEST FAILED {'=' * 40}\n"
                      f"Node ID: {node.nodeid}\n"
+                     f"失败类型: {classify(call.excinfo.value).value}\n"
                      f"截图名称: {screenshot_name}\n"
                      f"详细错误信息:\n{exc_info}"
                      )
@@ -149,12 +369,68 @@ def pytest_exception_interact(node: Any, call: Any, report: Any) -> None:
         logger.error("=" * 93 + "\n")
 
 
+def pytest_collection_modifyitems(config: pytest.Config, items: list[pytest.Item]) -> None:
+    """
+    调整用例执行顺序：
+    1. 按执行历史排序 (--history_order)，让最慢或最近失败的用例优先执行以缩短反馈时间；
+    2. 按页面亲和性重排 (--page_affinity)，在上一步顺序的基础上贪心选择导航代价最小的下一个用例。
+    :param config: Pytest 配置对象
+    :param items: 收集到的用例 (原地排序)
+    """
+    mode = config.getoption("--history_order")
+    if mode != "none":
+        order = {nodeid: idx for idx, nodeid in enumerate(RunHistory().order((i.nodeid for i in items), mode))}
+        items.sort(key=lambda i: order[i.nodeid])
+
+    if config.getoption("--page_affinity") == "off":
+        return
+    stops = []
+    for item in items:
+        start = _marker_page(item, "start_page")
+        stops.append((start, _marker_page(item, "end_page") or start))
+    if any(start for start, _ in stops):
+        items[:] = [items[idx] for idx in navigator.plan_order(stops)]
+
+
+def pytest_runtest_logreport(report: pytest.TestReport) -> None:
+    """
+    记录用例各阶段耗时与结果。重跑时每次 setup 重新计时，只保留最后一次执行的耗时，并累计重跑次数。
+    :param report: 阶段报告
+    """
+    record = _test_records.setdefault(report.nodeid, {"reruns": 0})
+    if report.when == "setup":
+        record.update(setup=0.0, call=0.0, teardown=0.0, outcome="passed")
+    record[report.when] = record.get(report.when, 0.0) + report.duration
+    record["finished_at"] = time.time()
+
+    match report.outcome:
+        case "rerun":
+            record["reruns"] += 1
+        case "failed":
+            record["outcome"] = "failed"
+        case "skipped" if record.get("outcome") != "failed":
+            record["outcome"] = "skipped"
+
+
+def pytest_terminal_summary(terminalreporter: Any) -> None:
+    """
+    回放模式下输出与录制不一致的命令序列。
+    :param terminalreporter: 终端报告插件
+    """
+    if isinstance(_local_server, ReplayServer) and _local_server.mismatches:
+        terminalreporter.write_sep("=", "cassette 回放差异", red=True)
+        terminalreporter.write_line(_local_server.report())
+
+
 def pytest_sessionfinish(session: Any, exitstatus: int) -> None:
     """
     测试会话结束时，收集环境信息到 Allure 报告
     :param session: Pytest 会话对象
     :param exitstatus: 退出状态码
     """
+    # 回放时命令序列与录制不一致，即使用例本身通过也视为失败
+    if isinstance(_local_server, ReplayServer) and _local_server.mismatches and exitstatus == pytest.ExitCode.OK:
+        session.exitstatus = exitstatus = pytest.ExitCode.TESTS_FAILED
     match exitstatus:
         case pytest.ExitCode.OK:
             logging.info("测试全部通过！")
@@ -171,9 +447,37 @@ def pytest_sessionfinish(session: Any, exitstatus: int) -> None:
         case _:
             logging.error(f"未知错误状态码: {exitstatus}")
 
-    report_dir = session.config.getoption("--alluredir")
     final_caps = getattr(session.config, "_final_caps", {})
+    # 输出本次运行的定位耗时数据，供 `python -m utils.locator_advisor` 生成慢定位报告
+    # (只在建立过驱动会话时输出，单元测试中替身服务上的定位不计入)
+    if final_caps:
+        locator_profiler.dump(session.config.getoption("--locator_profile_file"))
+    # 输出页面跳转的实测耗时，供后续运行的导航图计算最短路径 (同样只在建立过驱动会话时输出)
+    if final_caps:
+        navigator.dump(session.config.getoption("--nav_costs_file"))
+    # 重复的附件 (截图) 替换为指向产物仓库的硬链接；淘汰旧产物由 main.py 在整次运行结束后执行一次
+    alluredir = session.config.getoption("allure_report_dir", None)
+    try:
+        if alluredir:
+            artifact_store.dedupe(alluredir)
+    except Exception as e:
+        logging.error(f"产物仓库整理失败: {e}")
     caps_name = getattr(session.config, "_caps_name", '')
+    # 写入执行历史，供耗时趋势查询与多设备动态调度使用 (只记录建立过驱动会话的运行，单元测试不写入)
+    if not session.config.option.collectonly and final_caps:
+        try:
+            RunHistory().record_run(
+                _test_records,
+                device=final_caps.get("udid") or session.config.getoption("--udid") or caps_name or "local",
+                app_version=session.config.getoption("--app_version"),
+                platform=str(session.config.getoption("--platform")),
+                started_at=_session_started_at,
+                exit_status=int(exitstatus)
+            )
+        except Exception as e:
+            logging.error(f"写入执行历史失败: {e}")
+
+    report_dir = session.config.getoption("--alluredir")
 
     if not report_dir:
         return
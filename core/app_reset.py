@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: app_reset
+@date: 2026/10/19 18:10
+@desc: 用例前 App 状态分级重置：从最便宜的策略开始，校验失败时自动升级，并统计各级别耗时
+"""
+import logging
+import time
+from typing import Optional
+
+from core.driver import CoreDriver
+from core.enums import AppPlatform, ResetLevel
+from core.settings import RESET_VERIFY_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+# startActivity 的 Intent 标志: FLAG_ACTIVITY_NEW_TASK | FLAG_ACTIVITY_CLEAR_TASK，清空返回栈回到首页
+_CLEAR_TASK_FLAGS = "0x10008000"
+
+
+class AppResetter:
+    """
+    App 状态重置器。
+
+    各级别开销由低到高: NONE < HOME < RELAUNCH < CLEAR_DATA < NEW_SESSION。
+    每次重置后校验 App 是否处于前台 (query_app_state)，并可选校验一个首页定位符是否可见；
+    校验失败或执行出错时升级到下一级别，直到 NEW_SESSION。
+    """
+
+    def __init__(self, core: CoreDriver, verify_timeout: float = RESET_VERIFY_TIMEOUT):
+        """
+        :param core: 会话级 CoreDriver (NEW_SESSION 会原地重建其 driver)
+        :param verify_timeout: 校验定位符的等待时间 (秒)
+        """
+        self.core = core
+        self.verify_timeout = verify_timeout
+        # 各级别每次执行的耗时 (含校验)
+        self.timings: dict[ResetLevel, list[float]] = {}
+        # 各级别校验失败的次数
+        self.failures: dict[ResetLevel, int] = {}
+
+    # --- App 信息 ---
+    @property
+    def platform(self) -> str:
+        return self.core.platform_name
+
+    @property
+    def app_id(self) -> Optional[str]:
+        return self.core.app_id
+
+    # --- 各级别的执行动作 ---
+    def _home(self, link: Optional[str]) -> bool:
+        """回到首页：优先使用深链接，Android 无深链接时以清空任务栈的方式启动入口 Activity"""
+        driver = self.core.driver
+        if link:
+            params = {"url": link}
+            params["package" if self.platform == AppPlatform.ANDROID.value else "bundleId"] = self.app_id
+            driver.execute_script("mobile: deepLink", params)
+            return True
+        activity = driver.capabilities.get("appActivity")
+        if self.platform == AppPlatform.ANDROID.value and activity:
+            driver.execute_script("mobile: startActivity",
+                                  {"intent": f"{self.app_id}/{activity}", "flags": _CLEAR_TASK_FLAGS})
+            return True
+        logger.info("未配置首页深链接或入口 Activity，跳过 HOME 级别。")
+        return False
+
+    def _relaunch(self) -> bool:
+        self.core.driver.terminate_app(self.app_id)
+        self.core.driver.activate_app(self.app_id)
+        return True
+
+    def _clear_data(self) -> bool:
+        key = "appId" if self.platform == AppPlatform.ANDROID.value else "bundleId"
+        self.core.driver.execute_script("mobile: clearApp", {key: self.app_id})
+        self.core.driver.activate_app(self.app_id)
+        return True
+
+    def _new_session(self) -> bool:
+        self.core.restart_session()
+        return True
+
+    def _apply(self, level: ResetLevel, link: Optional[str]) -> bool:
+        """执行指定级别的动作，返回 False 表示该级别不适用"""
+        match level:
+            case ResetLevel.NONE:
+                return True
+            case ResetLevel.HOME:
+                return self._home(link)
+            case ResetLevel.RELAUNCH:
+                return self._relaunch()
+            case ResetLevel.CLEAR_DATA:
+                return self._clear_data()
+            case ResetLevel.NEW_SESSION:
+                return self._new_session()
+
+    def verify(self, check: Optional[tuple[str, str]] = None) -> bool:
+        """
+        校验 App 是否处于预期状态。
+        :param check: 可选的首页定位符 (by, value)，需在 verify_timeout 内可见
+        :return: bool
+        """
+        from appium.webdriver.applicationstate import ApplicationState
+        if self.app_id and self.core.driver.query_app_state(self.app_id) != ApplicationState.RUNNING_IN_FOREGROUND:
+            logger.warning(f"App {self.app_id} 不在前台运行。")
+            return False
+        if check and not self.core.wait_until_visible(*check, timeout=self.verify_timeout):
+            logger.warning(f"校验定位符不可见: {check}")
+            return False
+        return True
+
+    # --- 对外接口 ---
+    def reset(self, level: ResetLevel | str, check: Optional[tuple[str, str]] = None,
+              link: Optional[str] = None) -> ResetLevel:
+        """
+        按指定级别重置 App 状态，校验失败时逐级升级。
+        :param level: 期望的最低重置级别
+        :param check: 重置后应可见的首页定位符 (by, value)
+        :param link: 首页深链接 (HOME 级别使用)
+        :return: 实际生效的级别
+        :raises RuntimeError: 如果重建会话后仍无法通过校验
+        """
+        level = ResetLevel(level)
+        if level is ResetLevel.NONE:
+            return level
+
+        for current in level.escalations():
+            start = time.perf_counter()
+            try:
+                passed = self._apply(current, link) and self.verify(check)
+            except Exception as e:
+                logger.warning(f"重置级别 {current.value} 执行失败: {e}")
+                passed = False
+            cost = time.perf_counter() - start
+            self.timings.setdefault(current, []).append(cost)
+            if passed:
+                logger.info(f"App 状态已重置 (级别: {current.value}, 耗时: {cost:.2f}s)")
+                return current
+            self.failures[current] = self.failures.get(current, 0) + 1
+            logger.warning(f"重置级别 {current.value} 未能恢复 App 状态 (耗时: {cost:.2f}s)，升级重置策略。")
+        raise RuntimeError("重建会话后 App 状态仍校验失败，无法继续执行用例。")
+
+    def summary(self) -> str:
+        """格式化各级别的执行次数、失败次数与平均耗时"""
+        lines = [f"{'级别':<12} {'次数':>4} {'失败':>4} {'平均耗时':>8}"]
+        for level in ResetLevel:
+            costs = self.timings.get(level)
+            if costs:
+                lines.append(f"{level.value:<12} {len(costs):>4} {self.failures.get(level, 0):>4} "
+                             f"{sum(costs) / len(costs):>7.2f}s")
+        return "\n".join(lines)
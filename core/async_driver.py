@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: async_driver
+@date: 2026/10/19 13:20
+@desc: CoreDriver 的 asyncio 门面，支持单进程内通过 asyncio.gather 并发驱动多台设备
+"""
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from core.driver import CoreDriver
+from core.settings import ASYNC_MAX_WORKERS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """获取 (懒加载) 所有会话共享的有界线程池"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=ASYNC_MAX_WORKERS, thread_name_prefix="appium-cmd")
+        return _executor
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    """关闭共享线程池 (进程退出前调用，之后再次使用会重新创建)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+
+class AsyncCoreDriver:
+    """
+    CoreDriver 的异步封装。
+
+    - CoreDriver 的所有公开方法均可作为协程调用 (await driver.click(...))，返回 CoreDriver 自身的方法改为返回本对象，
+      因此可以写成 `await (await d.click(...)).back()`，一般直接逐条 await 即可。
+    - 同步阻塞的 HTTP 命令在共享的有界线程池中执行，不阻塞事件循环。
+    - 每个会话持有一把 FIFO 的 asyncio.Lock，保证同一会话内的命令按提交顺序串行执行；不同会话之间并发。
+    - 属性 (如 session_id、is_alive、driver) 直接同步返回。
+
+    使用示例:
+        async def main():
+            async with AsyncCoreDriver() as d1, AsyncCoreDriver() as d2:
+                await asyncio.gather(d1.connect("android", caps1), d2.connect("android", caps2))
+                await asyncio.gather(d1.click("id", "btn"), d2.swipe("up"))
+    """
+
+    def __init__(self, core: Optional[CoreDriver] = None, executor: Optional[ThreadPoolExecutor] = None):
+        """
+        :param core: 被封装的 CoreDriver (或其子类，如页面对象) 实例，缺省新建
+        :param executor: 自定义线程池，缺省使用模块级共享线程池
+        """
+        self.core = core if core is not None else CoreDriver()
+        self._executor = executor
+        self._lock = asyncio.Lock()
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        在本会话的命令队列中执行任意阻塞调用 (如页面对象的业务方法)，与其他命令保持顺序。
+        :param func: 阻塞的可调用对象
+        :return: func 的返回值
+        """
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            return await loop.run_in_executor(self._executor or get_executor(),
+                                              functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name: str) -> Any:
+        # 仅在本类未定义该属性时触发，委托给被封装的 CoreDriver
+        if name == "core":
+            raise AttributeError(name)
+        attr = getattr(self.core, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def command(*args, **kwargs):
+            result = await self.run(attr, *args, **kwargs)
+            # 保持链式调用语义：返回被封装对象自身时改为返回异步门面
+            return self if result is self.core else result
+
+        return command
+
+    async def __aenter__(self) -> 'AsyncCoreDriver':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.run(self.core.quit)
+
+    def __repr__(self):
+        return f"<AsyncCoreDriver server={self.core.server_url} alive={self.core.is_alive}>"
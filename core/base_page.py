@@ -11,12 +11,17 @@
 """
 import logging
 from pathlib import Path
-from typing import Type, TypeVar, Optional
+from typing import Type, TypeVar, Optional, Callable, TYPE_CHECKING
 
 import allure
-from appium import webdriver
 
 from core.driver import CoreDriver
+from core.enums import AppPlatform
+from core.navigator import navigator
+from core.settings import NAVIGATE_CONFIRM_TIMEOUT
+
+if TYPE_CHECKING:
+    from appium import webdriver
 
 # 定义一个泛型，用于类型推断
 T = TypeVar('T', bound='BasePage')
@@ -25,8 +30,16 @@ logger = logging.getLogger(__name__)
 
 
 class BasePage(CoreDriver):
+    # --- 页面声明 (子类按需覆盖) ---
+    # 直达本页面的深链接 (mobile: deepLink)
+    deep_link: Optional[str] = None
+    # 直达本页面的 Activity (仅 Android，mobile: startActivity)，可写完整类名或以 "." 开头的相对类名
+    activity: Optional[str] = None
+    # 页面身份标识：该定位符可见即认为当前处于本页面
+    identity: Optional[tuple[str, str]] = None
+
     # --- 全局通用的属性 ---
-    def __init__(self, driver: webdriver.Remote):
+    def __init__(self, driver: 'webdriver.Remote'):
         """
         初始化 BasePage。
 
@@ -34,6 +47,15 @@ class BasePage(CoreDriver):
         """
         super().__init__(driver)
 
+    def __init_subclass__(cls, register: bool = True, **kwargs):
+        """
+        子类定义时注册到导航图 (页面及其 @transition 跳转)。
+        :param register: 是否注册到全局导航图，测试替身 / 抽象基类可用 `class X(BasePage, register=False)` 跳过
+        """
+        super().__init_subclass__(**kwargs)
+        if register:
+            navigator.register(cls)
+
     # --- 所有页面通用的元动作 ---
     def go_to(self, page_cls: Type[T]) -> T:
         """
@@ -45,6 +67,77 @@ class BasePage(CoreDriver):
         logger.info(f"跳转到页面: {page_cls.__name__}")
         return page_cls(self.driver)
 
+    def is_current(self, timeout: float = 0) -> bool:
+        """
+        通过页面身份标识判断当前是否处于本页面。
+        :param timeout: 等待身份标识出现的时间 (秒)，0 表示立即判断
+        :return: bool (未声明 identity 时返回 False)
+        """
+        if not self.identity:
+            return False
+        if timeout:
+            return self.wait_until_visible(*self.identity, timeout=timeout)
+        return bool(self.is_visible(*self.identity))
+
+    def enter(self) -> None:
+        """
+        通过 UI 操作进入本页面 (navigate 直达失败时的回退路径)。
+        默认不做任何操作，子类按需覆盖。
+        """
+
+    def jump(self, page_cls: Type['BasePage']) -> bool:
+        """
+        使用深链接或 startActivity 直接打开目标页面。
+        :return: 是否执行了跳转命令
+        """
+        if page_cls.deep_link:
+            key = "package" if self.platform_name == AppPlatform.ANDROID.value else "bundleId"
+            logger.info(f"通过深链接打开 {page_cls.__name__}: {page_cls.deep_link}")
+            self.driver.execute_script("mobile: deepLink", {"url": page_cls.deep_link, key: self.app_id})
+            return True
+        if page_cls.activity and self.platform_name == AppPlatform.ANDROID.value:
+            logger.info(f"通过 startActivity 打开 {page_cls.__name__}: {page_cls.activity}")
+            self.driver.execute_script("mobile: startActivity", {"intent": f"{self.app_id}/{page_cls.activity}"})
+            return True
+        return False
+
+    def navigate(self, page_cls: Type[T], via: Optional[Callable[[T], None]] = None) -> T:
+        """
+        导航到目标页面：已在目标页面时直接返回；否则优先使用深链接 / startActivity 直达，
+        通过页面身份标识确认到达，失败时回退到 UI 路径 (via 或目标页面的 enter)。
+        :param page_cls: 目标页面类 (BasePage 的子类)
+        :param via: 自定义 UI 路径，接收目标页面实例
+        :return: 目标页面的实例
+        :raises RuntimeError: 如果目标页面声明了 identity 但所有路径均未能到达
+        """
+        page = page_cls(self.driver)
+        if page.is_current():
+            logger.info(f"已处于页面: {page_cls.__name__}")
+            return page
+
+        try:
+            if self.jump(page_cls) and (not page_cls.identity or page.is_current(NAVIGATE_CONFIRM_TIMEOUT)):
+                return page
+            if page_cls.deep_link or page_cls.activity:
+                logger.warning(f"直达 {page_cls.__name__} 未能确认到达，回退到 UI 路径。")
+        except Exception as e:
+            logger.warning(f"直达 {page_cls.__name__} 失败，回退到 UI 路径: {e}")
+
+        logger.info(f"通过 UI 路径进入页面: {page_cls.__name__}")
+        (via or page_cls.enter)(page)
+        if page_cls.identity and not page.is_current(NAVIGATE_CONFIRM_TIMEOUT):
+            raise RuntimeError(f"无法导航到页面 {page_cls.__name__}: 身份标识 {page_cls.identity} 不可见")
+        return page
+
+    def navigate_to(self, page_cls: Type[T]) -> T:
+        """
+        基于导航图导航：识别当前页面，按实测耗时沿最短的 @transition 路径跳转到目标页面。
+        :param page_cls: 目标页面类 (BasePage 的子类)
+        :return: 目标页面的实例
+        :raises RuntimeError: 如果目标页面不可达或跳转后未到达
+        """
+        return navigator.navigate_to(self.driver, page_cls)
+
     def handle_permission_popups(self):
         """
         处理通用的系统权限弹窗。
@@ -7,15 +7,239 @@
 @contact: t6g888@163.com
 @file: config_loader
 @date: 2026/1/16 10:52
-@desc: Pytest 核心配置与 Fixture 管理
+@desc: 配置注册中心：caps.yaml 只解析一次 (libyaml C 解析器、按 mtime 失效的缓存)，加载时按 CAPS_SCHEMA 统一校验，
+       caps 按“基础配置 -> 命名 profile -> 环境变量 -> 命令行”逐层覆盖；
+       多设备工作进程通过环境变量继承主进程已解析的配置快照，不再各自重新解析。
+
+caps.yaml 中的 profiles 示例:
+    profiles:
+      ci:
+        newCommandTimeout: 300      # 对所有配置生效
+        android: {noReset: true}    # 只对 android 配置生效
 """
+import json
 import logging
+import os
+import threading
+from copy import deepcopy
+from pathlib import Path
 from typing import Any, Optional
+
 from utils.data_loader import load_yaml
-from core.settings import CAPS_CONFIG_PATH, ENV_CONFIG, CURRENT_ENV
+from core.settings import (CAPS_CONFIG_PATH, ENV_CONFIG, CURRENT_ENV, CAPS_RESERVED_KEYS, CAPS_SCHEMA, CAPS_REQUIRED,
+                           CAPS_ENV_PREFIX, ENV_OVERRIDE_PREFIX, CURRENT_PROFILE)
 
 logger = logging.getLogger(__name__)
 
+# 主进程传给工作进程的配置快照 (JSON)
+ENV_SNAPSHOT = "APP_CONFIG_SNAPSHOT"
+
+
+def _merge(base: dict, override: dict) -> dict:
+    """逐层覆盖：字典值递归合并，其余值直接替换 (返回新字典，不修改入参)"""
+    result = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = _merge(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+
+class ConfigRegistry:
+    """
+    caps 配置注册中心。
+    - source() 返回已校验的完整配置，文件 mtime / 大小不变时直接命中缓存；
+    - caps() 返回逐层覆盖后的最终 caps (副本，调用方可随意修改)；
+    - worker_env() 生成工作进程的环境变量，子进程在文件未变化时直接使用快照。
+    """
+
+    def __init__(self, path: Path | str = CAPS_CONFIG_PATH, profile: str = CURRENT_PROFILE,
+                 schema: Optional[dict[str, type]] = None, required: tuple[str, ...] = CAPS_REQUIRED):
+        """
+        :param path: caps 配置文件
+        :param profile: 默认使用的命名 profile，空字符串表示不使用
+        :param schema: 字段类型约束，默认 CAPS_SCHEMA
+        :param required: 每个配置的必填字段
+        """
+        self.path = Path(path)
+        self.profile = profile
+        self.schema = CAPS_SCHEMA if schema is None else schema
+        self.required = required
+        # 实际解析 YAML 的次数 (命中缓存或快照时不增加)
+        self.parse_count = 0
+        self._data: Optional[dict[str, Any]] = None
+        self._stamp: Optional[tuple[int, int]] = None
+        self._names: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _file_stamp(self) -> tuple[int, int]:
+        stat = self.path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def source(self) -> dict[str, Any]:
+        """
+        返回已校验的完整配置 (只读，请勿修改)。
+        :raises FileNotFoundError: 配置文件不存在
+        :raises ValueError: 配置不符合 schema
+        """
+        stamp = self._file_stamp()
+        with self._lock:
+            if self._data is not None and self._stamp == stamp:
+                return self._data
+            data = self._from_snapshot(stamp) if self._data is None else None
+            if data is None:
+                data = load_yaml(self.path) or {}
+                self.parse_count += 1
+                self.validate(data)
+                logger.debug(f"已加载配置: {self.path}")
+            self._data, self._stamp = data, stamp
+            self._names = {str(name).lower(): name for name in data if name not in CAPS_RESERVED_KEYS}
+            return data
+
+    def _from_snapshot(self, stamp: tuple[int, int]) -> Optional[dict[str, Any]]:
+        """使用主进程传来的快照 (路径与文件状态一致时)"""
+        raw = os.getenv(ENV_SNAPSHOT)
+        if not raw:
+            return None
+        try:
+            snapshot = json.loads(raw)
+        except ValueError:
+            return None
+        if snapshot.get("path") != str(self.path.resolve()) or tuple(snapshot.get("stamp") or ()) != stamp:
+            return None
+        return snapshot.get("data")
+
+    def validate(self, data: Any) -> None:
+        """
+        校验完整配置：每个配置的必填字段与字段类型、profiles 中的覆盖值类型，一次列出全部问题。
+        :param data: 解析后的 caps.yaml
+        :raises ValueError: 配置不符合 schema
+        """
+        if not isinstance(data, dict):
+            raise ValueError(f"{self.path} 顶层应为映射，实际为 {type(data).__name__}")
+        errors = []
+        for name, caps in data.items():
+            if name in CAPS_RESERVED_KEYS:
+                continue
+            if not isinstance(caps, dict):
+                errors.append(f"{name}: 应为映射")
+                continue
+            errors += [f"{name}: 缺少必填字段 {key}" for key in self.required if key not in caps]
+            errors += self._type_errors(name, caps)
+
+        names = {str(name).lower() for name in data if name not in CAPS_RESERVED_KEYS}
+        profiles = data.get("profiles") or {}
+        if not isinstance(profiles, dict):
+            errors.append("profiles: 应为映射")
+            profiles = {}
+        for profile, overrides in profiles.items():
+            if not isinstance(overrides, dict):
+                errors.append(f"profiles.{profile}: 应为映射")
+                continue
+            scoped = {k: v for k, v in overrides.items() if str(k).lower() in names and isinstance(v, dict)}
+            errors += self._type_errors(f"profiles.{profile}",
+                                        {k: v for k, v in overrides.items() if k not in scoped})
+            for name, caps in scoped.items():
+                errors += self._type_errors(f"profiles.{profile}.{name}", caps)
+        if errors:
+            raise ValueError(f"{self.path} 配置校验失败:\n  " + "\n  ".join(errors))
+
+    def _type_errors(self, where: str, caps: dict) -> list[str]:
+        errors = []
+        for key, value in caps.items():
+            expected = self.schema.get(key)
+            # bool 是 int 的子类，需单独排除
+            if expected and (not isinstance(value, expected) or (expected is int and isinstance(value, bool))):
+                errors.append(f"{where}.{key}: 应为 {expected.__name__}，实际为 {value!r}")
+        return errors
+
+    def names(self) -> list[str]:
+        """全部配置名称 (不含保留节点)"""
+        self.source()
+        return list(self._names.values())
+
+    def _coerce(self, key: str, value: str) -> Any:
+        """按 schema 转换环境变量 / 命令行传入的字符串值"""
+        expected = self.schema.get(key)
+        if expected is bool:
+            if value.lower() in ("1", "true", "yes", "on"):
+                return True
+            if value.lower() in ("0", "false", "no", "off"):
+                return False
+            raise ValueError(f"{key} 应为布尔值，实际为 {value!r}")
+        if expected is int:
+            return int(value)
+        return value
+
+    def _canonical_key(self, key: str, caps: dict) -> str:
+        """环境变量名大小写不确定，按已有字段与 schema 还原字段名"""
+        for known in (*caps, *self.schema):
+            if known.lower() == key.lower():
+                return known
+        return key
+
+    def caps(self, caps_name: str, overrides: Optional[dict[str, Any]] = None,
+             profile: Optional[str] = None) -> dict[str, Any]:
+        """
+        返回逐层覆盖后的 caps：基础配置 -> 命名 profile -> 环境变量 (CAPS_ENV_PREFIX) -> overrides (命令行)。
+        :param caps_name: 配置名称 (不区分大小写)
+        :param overrides: 命令行覆盖值，值为字符串时按 schema 转换类型
+        :param profile: 命名 profile，None 表示使用 self.profile
+        :return: caps 字典 (副本)
+        :raises ValueError: 配置或 profile 不存在，或覆盖值不符合 schema
+        """
+        data = self.source()
+        name = self._names.get(caps_name.lower())
+        if name is None:
+            raise ValueError(f"在 {self.path} 中找不到平台 '{caps_name.lower()}' 的配置")
+        caps = deepcopy(data[name])
+
+        profile = self.profile if profile is None else profile
+        if profile:
+            if profile not in (data.get("profiles") or {}):
+                raise ValueError(f"在 {self.path} 中找不到 profile '{profile}'")
+            for key, value in data["profiles"][profile].items():
+                scoped = str(key).lower() in self._names and isinstance(value, dict)
+                if not scoped:
+                    caps = _merge(caps, {key: deepcopy(value)})
+                elif str(key).lower() == name.lower():
+                    caps = _merge(caps, deepcopy(value))
+
+        env_layer = {self._canonical_key(key[len(CAPS_ENV_PREFIX):], caps): value
+                     for key, value in os.environ.items() if key.startswith(CAPS_ENV_PREFIX)}
+        cli_layer = {key: value for key, value in (overrides or {}).items() if value is not None}
+        for layer in (env_layer, cli_layer):
+            caps = _merge(caps, {k: self._coerce(k, v) if isinstance(v, str) else v for k, v in layer.items()})
+
+        errors = self._type_errors(name, caps)
+        if errors:
+            raise ValueError("caps 覆盖值校验失败:\n  " + "\n  ".join(errors))
+        return caps
+
+    def snapshot(self) -> str:
+        """序列化已校验的配置 (含文件状态，供工作进程判断快照是否过期)"""
+        data = self.source()
+        return json.dumps({"path": str(self.path.resolve()), "stamp": list(self._stamp), "data": data},
+                          ensure_ascii=False)
+
+    def worker_env(self) -> dict[str, str]:
+        """工作进程的环境变量：继承当前环境，附带配置快照与当前 profile"""
+        env = os.environ.copy()
+        env[ENV_SNAPSHOT] = self.snapshot()
+        if self.profile:
+            env["APP_PROFILE"] = self.profile
+        return env
+
+    def invalidate(self) -> None:
+        """丢弃缓存，下次访问时重新解析"""
+        with self._lock:
+            self._data = self._stamp = None
+
+
+# 全局单例
+config_registry = ConfigRegistry()
+
 
 def get_env_config(env_name: Optional[str] = None) -> dict[str, str]:
     """
@@ -26,37 +250,35 @@ def get_env_config(env_name: Optional[str] = None) -> dict[str, str]:
     2. 若未传入，使用全局设置 `CURRENT_ENV`。
     3. 若都为空，默认为 "test"。
     4. 如果目标环境在配置中不存在，强制回退到 "test" 环境并记录警告。
+    5. 以 `ENV_OVERRIDE_PREFIX` 开头的环境变量覆盖同名字段 (如 APP_ENV_BASE_URL -> base_url)。
 
     :param env_name: 指定的环境名称 (e.g., "dev", "prod")，可选。
-    :return: 对应环境的配置字典。
+    :return: 对应环境的配置字典 (副本)。
     """
     target_env = env_name or CURRENT_ENV or "test"
 
     if target_env not in ENV_CONFIG:
         logger.warning(f"环境 '{target_env}' 未在配置中定义，将回退到 'test' 环境。")
-        return ENV_CONFIG.get("test", {})
+        target_env = "test"
 
-    return ENV_CONFIG[target_env]
+    config = dict(ENV_CONFIG.get(target_env, {}))
+    config.update({key[len(ENV_OVERRIDE_PREFIX):].lower(): value for key, value in os.environ.items()
+                   if key.startswith(ENV_OVERRIDE_PREFIX)})
+    return config
 
 
-def get_caps(caps_name: str) -> dict[str, Any]:
+def get_caps(caps_name: str, overrides: Optional[dict[str, Any]] = None,
+             profile: Optional[str] = None) -> dict[str, Any]:
     """
-    从 YAML 配置文件加载指定的 Appium Capabilities。
+    从 YAML 配置文件加载指定的 Appium Capabilities (经 config_registry 缓存与逐层覆盖)。
 
     :param caps_name: 配置文件中的设备/平台名称 (不区分大小写)，例如 "android_pixel"。
+    :param overrides: 命令行覆盖值，可选。
+    :param profile: 命名 profile，None 表示使用 APP_PROFILE。
     :return: 该设备对应的 Capabilities 字典。
-    :raises ValueError: 当指定的 caps_name 在配置文件中不存在时。
-    :raises RuntimeError: 当配置文件加载失败或格式错误时。
+    :raises RuntimeError: 当配置不存在、加载失败或格式错误时。
     """
     try:
-        all_caps = load_yaml(CAPS_CONFIG_PATH)
-        all_caps = {k.lower(): v for k, v in all_caps.items()}
-        caps_key = caps_name.lower()
-
-        if caps_key not in all_caps:
-            raise ValueError(f"在 {CAPS_CONFIG_PATH} 中找不到平台 '{caps_key}' 的配置")
-
-        return all_caps[caps_key]
-
+        return config_registry.caps(caps_name, overrides, profile)
     except Exception as e:
-        raise RuntimeError(f"加载 Capabilities 失败 ({CAPS_CONFIG_PATH}): {e}")
+        raise RuntimeError(f"加载 Capabilities 失败 ({config_registry.path}): {e}")
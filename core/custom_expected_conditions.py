@@ -12,14 +12,20 @@
 """
 
 import logging
-from typing import Any, Union
+from typing import Any, Union, TYPE_CHECKING
 
-from appium.webdriver.webdriver import WebDriver
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from selenium.webdriver.remote.webelement import WebElement
 from selenium.common.exceptions import StaleElementReferenceException, NoSuchElementException
 
+from utils.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+    from appium.webdriver.webdriver import WebDriver
+    from selenium.webdriver.remote.webelement import WebElement
+
+# 官方预期条件仅在按名称查找时才加载
+EC = lazy_import("selenium.webdriver.support.expected_conditions")
+
 logger = logging.getLogger(__name__)
 
 """
@@ -39,7 +45,7 @@ class BaseCondition:
     所有自定义的类形式 EC 都应继承此类
     """
 
-    def __call__(self, driver: WebDriver):
+    def __call__(self, driver: 'WebDriver'):
         """
         WebDriverWait 调用的入口方法。
         
@@ -51,7 +57,7 @@ class BaseCondition:
         except (NoSuchElementException, StaleElementReferenceException):
             return False
 
-    def check(self, driver: WebDriver):
+    def check(self, driver: 'WebDriver'):
         """
         执行具体的检查逻辑，由子类实现。
 
@@ -99,7 +105,7 @@ class ToastVisible(BaseCondition):
         else:
             self.partial = partial
 
-    def check(self, driver: WebDriver):
+    def check(self, driver: 'WebDriver'):
         # 注意：这里不再需要显式 try-except，BaseCondition 会处理
         xpath = f"//*[contains(@text, '{self.text}')]" if self.partial else f"//*[@text='{self.text}']"
         element = driver.find_element(By.XPATH, xpath)
@@ -122,7 +128,7 @@ class ElementHasAttribute(BaseCondition):
         self.attribute = attribute
         self.value = expect_value
 
-    def check(self, driver: WebDriver):
+    def check(self, driver: 'WebDriver'):
         element = driver.find_element(*self.locator)
         attr_value = element.get_attribute(self.attribute)
         return element if (attr_value and self.value in attr_value) else False
@@ -137,7 +143,7 @@ class ElementCountAtLeast(BaseCondition):
         # 确保字符串参数转为整数
         self.count = int(count)
 
-    def check(self, driver: WebDriver) -> bool | list[WebElement]:
+    def check(self, driver: 'WebDriver') -> bool | list['WebElement']:
         elements = driver.find_elements(*self.locator)
         if len(elements) >= self.count:
             return elements
@@ -11,37 +11,44 @@
 """
 import logging
 import secrets  # 原生库，用于生成安全的随机数
-from typing import Optional, Type, TypeVar, Union, Callable, Any
+from contextlib import nullcontext
+from typing import Optional, Type, TypeVar, Union, Callable, Any, TYPE_CHECKING
 from time import sleep
 
-from appium import webdriver
-from appium.options.android import UiAutomator2Options
-from appium.options.ios import XCUITestOptions
-from appium.options.common.base import AppiumOptions
-from appium.webdriver.webdriver import ExtensionBase
-from appium.webdriver.webelement import WebElement
-from appium.webdriver.client_config import AppiumClientConfig
-
 from selenium.common import TimeoutException, StaleElementReferenceException, NoSuchElementException
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.common.actions import interaction
-from selenium.webdriver.common.actions.action_builder import ActionBuilder
-from selenium.webdriver.common.actions.pointer_input import PointerInput
+from selenium.webdriver.remote.command import Command
 
 from core.enums import AppPlatform
-from core.settings import IMPLICIT_WAIT_TIMEOUT, EXPLICIT_WAIT_TIMEOUT, APPIUM_HOST, APPIUM_PORT, SCREENSHOT_DIR
+from core.settings import (IMPLICIT_WAIT_TIMEOUT, EXPLICIT_WAIT_TIMEOUT, APPIUM_HOST, APPIUM_PORT, SCREENSHOT_DIR,
+                           CONNECT_RETRIES, CONNECT_BACKOFF, KEEPALIVE_INTERVAL)
 from utils.finder import by_converter
 from utils.decorators import resolve_wait_method
+from utils.locator_advisor import locator_profiler
+from utils.artifact_store import artifact_store
+from utils.trace_exporter import trace_recorder
+from utils.cassette import cassette_recorder, redactor
+from utils.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+    from appium import webdriver
+    from appium.options.common.base import AppiumOptions
+    from appium.webdriver.webdriver import ExtensionBase
+    from appium.webdriver.webelement import WebElement
+    from appium.webdriver.client_config import AppiumClientConfig
+    from core.remote import KeepAlive
+
+# Appium 客户端与 selenium 等待 / 动作模块导入较慢，延迟到创建 driver 或首次使用时再加载
+EC = lazy_import("selenium.webdriver.support.expected_conditions")
 
 logger = logging.getLogger(__name__)
+# 显式等待、弹窗轮询等高频重复日志单独使用子日志器，仅对其限流 (见 LOG_RATE_LIMITED_LOGGERS)，点击 / 输入等步骤日志不受影响
+wait_logger = logging.getLogger(f"{__name__}.wait")
 
 T = TypeVar("T")
 
 
 class CoreDriver:
-    def __init__(self, driver: Optional[webdriver.Remote] = None):
+    def __init__(self, driver: Optional['webdriver.Remote'] = None):
         """
         初始化 CoreDriver 实例。
         从 settings.py 加载默认的 Appium 服务器主机和端口。
@@ -50,6 +57,9 @@ class CoreDriver:
         self._current_implicit_timeout = IMPLICIT_WAIT_TIMEOUT
         self._host = APPIUM_HOST
         self._port = APPIUM_PORT
+        # 最近一次 connect 的参数，用于 restart_session 以相同配置重建会话
+        self._connect_args: Optional[dict[str, Any]] = None
+        self._keepalive: Optional['KeepAlive'] = None
 
     @property
     def server_url(self) -> str:
@@ -71,7 +81,7 @@ class CoreDriver:
         return self
 
     @staticmethod
-    def _make_options(platform: str | AppPlatform, caps: dict) -> AppiumOptions:
+    def _make_options(platform: str | AppPlatform, caps: dict) -> 'AppiumOptions':
         """
         根据平台生成对应的 Options
         :param platform: 目标平台 ('android' 或 'ios')，支持 AppPlatform 枚举或字符串。
@@ -81,10 +91,12 @@ class CoreDriver:
         match platform:
             case AppPlatform.ANDROID.value:
                 logger.info(f"正在初始化 Android 会话...")
+                from appium.options.android import UiAutomator2Options
                 return UiAutomator2Options().load_capabilities(caps)
 
             case AppPlatform.IOS.value:
                 logger.info(f"正在初始化 iOS 会话...")
+                from appium.options.ios import XCUITestOptions
                 return XCUITestOptions().load_capabilities(caps)
 
             case _:
@@ -94,15 +106,19 @@ class CoreDriver:
                 raise ValueError(msg)
 
     def connect(self, platform: str | AppPlatform, caps: dict,
-                extensions: list[Type[ExtensionBase]] | None = None,
-                client_config: AppiumClientConfig | None = None) -> 'CoreDriver':
+                extensions: list[Type['ExtensionBase']] | None = None,
+                client_config: Optional['AppiumClientConfig'] = None,
+                retries: int = CONNECT_RETRIES, backoff: float = CONNECT_BACKOFF) -> 'CoreDriver':
         """
         连接到 Appium 服务器并创建一个新的会话。
+        连接失败时按指数退避重试；连接成功后启动会话保活线程，会话失效时自动以相同配置恢复。
 
         :param platform: 目标平台 ('android' 或 'ios')，支持 AppPlatform 枚举或字符串。
         :param caps: Appium capabilities 字典。
         :param extensions: Appium 驱动扩展列表。
         :param client_config: Appium 客户端配置。
+        :param retries: 最大尝试次数。
+        :param backoff: 首次重试前的等待时间 (秒)，之后每次翻倍。
         :return: 返回 CoreDriver 实例自身，支持链式调用。
         :raises ValueError: 如果平台不受支持。
         :raises ConnectionError: 如果无法连接到 Appium 服务。
@@ -116,29 +132,96 @@ class CoreDriver:
             self.quit()
 
         # 3. 匹配平台并加载 Options
-        options: AppiumOptions = self._make_options(platform_name, caps)
-
-        try:
-
-            # 4. 创建连接
-            self.driver = webdriver.Remote(
-                command_executor=self.server_url,
+        options = self._make_options(platform_name, caps)
+        self._connect_args = dict(platform=platform_name, caps=caps, extensions=extensions,
+                                  client_config=client_config, retries=retries, backoff=backoff)
+
+        # 4. 创建连接 (首次创建 driver 时才加载 Appium 客户端)
+        from core.remote import ManagedRemote, RecordingConnection
+
+        def create() -> None:
+            command_executor = self.server_url
+            if cassette_recorder.enabled:
+                from appium.webdriver.client_config import AppiumClientConfig
+                # 录制模式：请求与响应经 RecordingConnection 写入 cassette
+                command_executor = RecordingConnection(
+                    client_config=client_config or AppiumClientConfig(remote_server_addr=self.server_url))
+            self.driver = ManagedRemote(
+                command_executor=command_executor,
                 options=options,
                 extensions=extensions,
                 client_config=client_config
             )
 
-            logger.info(f"已成功连接到 {platform_name.upper()} 设备 (SessionID: {self.driver.session_id})")
-            return self
+        self._with_retries(create, retries, backoff)
+        self.driver.recover = self.reconnect
+        # 开启 Trace 导出时每条命令记录为时间片 (未开启时钩子立即返回)
+        self.driver.command_hooks.append(trace_recorder.record_command)
+        self._start_keepalive()
+        logger.info(f"已成功连接到 {platform_name.upper()} 设备 (SessionID: {self.driver.session_id})")
+        return self
 
+    def _with_retries(self, action: Callable[[], None], retries: int, backoff: float) -> None:
+        """
+        按指数退避重试建立会话的动作。
+        :raises ConnectionError: 如果全部尝试均失败
+        """
+        for attempt in range(1, max(retries, 1) + 1):
+            try:
+                action()
+                return
+            except Exception as e:
+                logger.error(f"驱动连接失败 ({attempt}/{retries})！底层错误信息: {e}")
+                if attempt >= retries:
+                    raise ConnectionError(f"无法连接到 Appium 服务，请检查端口 {self._port} 或设备状态。") from e
+                sleep(backoff * 2 ** (attempt - 1))
+
+    def _start_keepalive(self) -> None:
+        """启动会话保活线程 (KEEPALIVE_INTERVAL 为 0 时不启动)"""
+        self._stop_keepalive()
+        if KEEPALIVE_INTERVAL > 0:
+            from core.remote import KeepAlive
+            self._keepalive = KeepAlive(self.driver, KEEPALIVE_INTERVAL).start()
+
+    def _stop_keepalive(self) -> None:
+        if self._keepalive:
+            self._keepalive.stop()
+            self._keepalive = None
+
+    def reconnect(self) -> 'CoreDriver':
+        """
+        在同一个 driver 对象上以最近一次 connect 的参数创建新会话。
+        页面对象持有的 driver 引用保持有效，旧会话中获取的元素引用失效。
+        :return: 返回 CoreDriver 实例自身，支持链式调用。
+        :raises RuntimeError: 如果从未调用过 connect。
+        :raises ConnectionError: 如果重试后仍无法创建会话。
+        """
+        if not self._connect_args or not self.driver:
+            raise RuntimeError("当前实例从未建立过会话，无法重建。")
+        args = self._connect_args
+        options = self._make_options(args["platform"], args["caps"])
+        self._with_retries(lambda: self.driver.start_session(options), args["retries"], args["backoff"])
+        logger.info(f"会话已重建 (SessionID: {self.driver.session_id})")
+        return self
+
+    def restart_session(self) -> 'CoreDriver':
+        """
+        关闭当前会话并以最近一次 connect 的参数重建会话 (最彻底也最耗时的状态重置)。
+        :return: 返回 CoreDriver 实例自身，支持链式调用。
+        :raises RuntimeError: 如果从未调用过 connect。
+        """
+        if not self._connect_args or not self.driver:
+            raise RuntimeError("当前实例从未建立过会话，无法重建。")
+        logger.info("正在重建 Appium 会话...")
+        try:
+            # 仅删除服务端会话，保留 driver 对象及其连接
+            self.driver.execute(Command.QUIT)
         except Exception as e:
-            logger.error(f"驱动连接失败！底层错误信息: {e}")
-            # 确保失败后清理现场
-            self.driver = None
-            raise ConnectionError(f"无法连接到 Appium 服务，请检查端口 {self._port} 或设备状态。") from e
+            logger.warning(f"关闭旧会话时发生异常 (可能会话已失效): {e}")
+        return self.reconnect()
 
     # --- 核心操作 ---
-    def find_element(self, by: str, value: str, timeout: Optional[float] = None) -> WebElement:
+    def find_element(self, by: str, value: str, timeout: Optional[float] = None) -> 'WebElement':
         """
         内部通用查找（显式等待）
         :param by: 定位策略
@@ -146,12 +229,10 @@ class CoreDriver:
         :param timeout: 等待超时时间 (秒)。如果为 None, 则使用全局默认超时.
         :return: WebElement.
         """
-        by = by_converter(by)
-        mark = (by, value)
-        method = EC.presence_of_element_located(mark)
-        return self.explicit_wait(method, timeout)
+        mark = (by_converter(by), value)
+        return self._locate(EC.presence_of_element_located, mark, timeout)
 
-    def find_elements(self, by: str, value: str, timeout: Optional[float] = None) -> list[WebElement]:
+    def find_elements(self, by: str, value: str, timeout: Optional[float] = None) -> list['WebElement']:
         """
         内部通用查找（显式等待）
         :param by: 定位策略
@@ -159,10 +240,20 @@ class CoreDriver:
         :param timeout: 等待超时时间 (秒)。如果为 None, 则使用全局默认超时.
         :return: list[WebElement].
         """
-        by = by_converter(by)
-        mark = (by, value)
-        method = EC.presence_of_all_elements_located(mark)
-        return self.explicit_wait(method, timeout)
+        mark = (by_converter(by), value)
+        return self._locate(EC.presence_of_all_elements_located, mark, timeout)
+
+    def _locate(self, condition: Callable[[tuple[str, str]], Callable], mark: tuple[str, str],
+                timeout: Optional[float] = None) -> Any:
+        """
+        基于定位符执行显式等待，并记录本次定位耗时 (供 utils.locator_advisor 分析慢定位)。
+        :param condition: EC 条件工厂，如 EC.presence_of_element_located
+        :param mark: 已标准化的定位符 (by, value)
+        :param timeout: 等待超时时间 (秒)。如果为 None, 则使用全局默认超时.
+        :return: 等待条件的执行结果
+        """
+        with locator_profiler.track(*mark):
+            return self.explicit_wait(condition(mark), timeout)
 
     def delay(self, timeout: int | float) -> 'CoreDriver':
         """
@@ -186,8 +277,8 @@ class CoreDriver:
         self._current_implicit_timeout = timeout  # 记录等待时间
 
     @resolve_wait_method
-    def explicit_wait(self, method: Union[Callable[[webdriver.Remote], T], str], timeout: Optional[float] = None) -> \
-            Union[T, WebElement]:
+    def explicit_wait(self, method: Union[Callable[['webdriver.Remote'], T], str], timeout: Optional[float] = None) -> \
+            Union[T, 'WebElement']:
         """
         执行显式等待，直到满足某个条件或超时。
 
@@ -211,8 +302,10 @@ class CoreDriver:
 
         try:
             # 获取函数名称用于日志，兼容 lambda 和普通函数
-            func_name = getattr(method, '__name__', repr(method))
-            logger.info(f"执行显式等待: {func_name}, 超时: {wait_timeout}s")
+            if wait_logger.isEnabledFor(logging.INFO):
+                func_name = getattr(method, '__name__', None) or repr(method)
+                wait_logger.info(f"执行显式等待: {func_name}, 超时: {wait_timeout}s")
+            from selenium.webdriver.support.ui import WebDriverWait
             return WebDriverWait(self.driver, wait_timeout).until(method)
         except TimeoutException:
             logger.error(f"等待超时: {wait_timeout}s 内未满足条件 {method}")
@@ -239,11 +332,9 @@ class CoreDriver:
         :param timeout: 等待超时时间。
         :return: self
         """
-        by = by_converter(by)
-        mark = (by, value)
+        mark = (by_converter(by), value)
         logger.info(f"点击: {mark}")
-        method = EC.element_to_be_clickable(mark)
-        self.explicit_wait(method, timeout).click()
+        self._locate(EC.element_to_be_clickable, mark, timeout).click()
         return self
 
     def clear(self, by: str, value: str, timeout: Optional[float] = None) -> 'CoreDriver':
@@ -255,11 +346,9 @@ class CoreDriver:
         :param timeout: 等待超时时间。
         :return: self
         """
-        by = by_converter(by)
-        mark = (by, value)
+        mark = (by_converter(by), value)
         logger.info(f"清空输入框: {mark}")
-        method = EC.visibility_of_element_located(mark)
-        self.explicit_wait(method, timeout).clear()
+        self._locate(EC.visibility_of_element_located, mark, timeout).clear()
         return self
 
     def input(self, by: str, value: str, text: str, sensitive: bool = False,
@@ -274,12 +363,13 @@ class CoreDriver:
         :param timeout: 等待超时时间。
         :return: self
         """
-        by = by_converter(by)
-        mark = (by, value)
+        mark = (by_converter(by), value)
         display_text = "******" if sensitive else text
+        if sensitive:
+            # 录制 WebDriver 流量时同样脱敏
+            redactor.add_secret(text)
         logger.info(f"输入文本到 {mark}: '{display_text}'")
-        method = EC.visibility_of_element_located(mark)
-        self.explicit_wait(method, timeout).send_keys(text)
+        self._locate(EC.visibility_of_element_located, mark, timeout).send_keys(text)
         return self
 
     def is_visible(self, by: str, value: str) -> bool | None:
@@ -295,7 +385,8 @@ class CoreDriver:
             self.implicit_wait(0)
 
             by = by_converter(by)
-            elements = self.driver.find_elements(by, value)
+            with locator_profiler.track(by, value):
+                elements = self.driver.find_elements(by, value)
 
             if elements:
                 return elements[0].is_displayed()
@@ -320,10 +411,8 @@ class CoreDriver:
         :return: bool
         """
         try:
-            by = by_converter(by)
-            mark = (by, value)
-            method = EC.visibility_of_element_located(mark)
-            self.explicit_wait(method, timeout)
+            mark = (by_converter(by), value)
+            self._locate(EC.visibility_of_element_located, mark, timeout)
             return True
         except TimeoutException:
             return False
@@ -353,11 +442,8 @@ class CoreDriver:
         :param timeout: 等待超时时间。
         :return:获取到的文本
         """
-        by = by_converter(by)
-        mark = (by, value)
-        method = EC.visibility_of_element_located(mark)
-
-        text = self.explicit_wait(method, timeout).text
+        mark = (by_converter(by), value)
+        text = self._locate(EC.visibility_of_element_located, mark, timeout).text
         logger.info(f"获取到的文本: {text}")
         return text
 
@@ -369,10 +455,8 @@ class CoreDriver:
         :param timeout: 等待超时时间。
         :param name: 属性名称 (如 'checked', 'enabled', 'resource-id')
         """
-        by = by_converter(by)
-        mark = (by, value)
-        method = EC.presence_of_element_located(mark)
-        element = self.explicit_wait(method, timeout)
+        mark = (by_converter(by), value)
+        element = self._locate(EC.presence_of_element_located, mark, timeout)
         attr_value = element.get_attribute(name)
         logger.info(f"获取属性 {name} of {mark}: {attr_value}")
         return attr_value
@@ -405,7 +489,7 @@ class CoreDriver:
                     skip_count += 1
                     continue
 
-                logger.info(f"当前权重{skip_count},第 {round_idx + 1} 轮：待清理弹窗 -> {value}")
+                wait_logger.info(f"当前权重{skip_count},第 {round_idx + 1} 轮：待清理弹窗 -> {value}")
                 try:
                     elements = self.find_elements(by, value, timeout=0.5)  # 使用极短超时
                     if not elements:
@@ -416,9 +500,9 @@ class CoreDriver:
 
                         # 消失得快返回得就快，最多等 1.5s
                         if self.wait_until_not_visible(by, value, timeout=1.5):
-                            logger.info(f"弹窗已成功消失")
+                            wait_logger.info(f"弹窗已成功消失")
                         else:
-                            logger.warning(f"弹窗点击后仍存在")
+                            wait_logger.warning(f"弹窗点击后仍存在")
 
                 except Exception as e:
                     safe_val = secrets.token_hex(8)
@@ -439,6 +523,17 @@ class CoreDriver:
         self.driver.back()
         return self
 
+    @property
+    def platform_name(self) -> str:
+        """当前会话的平台名称 (小写，如 'android' / 'ios')"""
+        return str(self.driver.capabilities.get("platformName", "")).lower()
+
+    @property
+    def app_id(self) -> Optional[str]:
+        """被测 App 的包名 (Android appPackage) 或 bundleId (iOS)"""
+        caps = self.driver.capabilities
+        return caps.get("appPackage") or caps.get("bundleId")
+
     @property
     def session_id(self) -> Any | None:
         """获取当前 Appium 会话的 Session ID。"""
@@ -456,6 +551,11 @@ class CoreDriver:
         :param duration: 滑动持续时间 (ms)
         :return: self
         """
+        from selenium.webdriver.common.action_chains import ActionChains
+        from selenium.webdriver.common.actions import interaction
+        from selenium.webdriver.common.actions.action_builder import ActionBuilder
+        from selenium.webdriver.common.actions.pointer_input import PointerInput
+
         actions = ActionChains(self.driver)
         # 覆盖默认的鼠标输入为触摸输入
         actions.w3c_actions = ActionBuilder(self.driver, mouse=PointerInput(interaction.POINTER_TOUCH, "touch"))
@@ -491,7 +591,7 @@ class CoreDriver:
 
         return self.swipe_by_coordinates(start_x, start_y, end_x, end_y, duration)
 
-    def long_press(self, element: Optional[WebElement] = None, x: Optional[int] = None, y: Optional[int] = None,
+    def long_press(self, element: Optional['WebElement'] = None, x: Optional[int] = None, y: Optional[int] = None,
                    duration: int = 2000) -> 'CoreDriver':
         """
         长按封装：支持传入元素或坐标。
@@ -517,7 +617,7 @@ class CoreDriver:
         # 逻辑：Move -> Down -> Pause -> Move(原地) -> Release
         return self.swipe_by_coordinates(x, y, x, y, duration)
 
-    def drag_and_drop(self, source_el: WebElement, target_el: WebElement, duration: int = 1000) -> 'CoreDriver':
+    def drag_and_drop(self, source_el: 'WebElement', target_el: 'WebElement', duration: int = 1000) -> 'CoreDriver':
         """
         将 source_el 拖拽到 target_el。
         计算两个元素的中心点，执行从源元素中心到目标元素中心的拖拽操作。
@@ -536,7 +636,7 @@ class CoreDriver:
         logger.info(f"执行拖拽: ({sx}, {sy}) -> ({tx}, {ty})")
         return self.swipe_by_coordinates(sx, sy, tx, ty, duration)
 
-    def smart_scroll(self, element: WebElement, direction: str = "down") -> 'CoreDriver':
+    def smart_scroll(self, element: 'WebElement', direction: str = "down") -> 'CoreDriver':
         """
         智能滚动：自动识别平台并调用最稳定的原生滚动脚本
         :param element: 需要滚动的容器元素 (如 ScrollView, RecyclerView, TableView)
@@ -634,8 +734,8 @@ class CoreDriver:
         path = (SCREENSHOT_DIR / file_name).as_posix()
 
         try:
-            # 核心：save_screenshot 是底层原生方法，不依赖任何元素定位
-            self.driver.save_screenshot(path)
+            # 核心：get_screenshot_as_png 是底层原生方法，不依赖任何元素定位；内容相同的截图只在仓库中存一份
+            artifact_store.save(self.driver.get_screenshot_as_png(), path)
             logger.info(f"全屏截图已保存: {path}")
             return path
         except Exception as e:
@@ -656,7 +756,7 @@ class CoreDriver:
         try:
             by = by_converter(by)
             # 核心：直接调用底层 find_element，
-            self.driver.find_element(by, value).screenshot(path)
+            artifact_store.save(self.driver.find_element(by, value).screenshot_as_png, path)
             logger.info(f"元素截图已保存: {path}")
             return path
         except Exception as e:
@@ -668,8 +768,26 @@ class CoreDriver:
         """判断当前驱动会话是否仍然存活。"""
         return self.driver is not None and self.driver.session_id is not None
 
+    def is_healthy(self) -> bool:
+        """
+        通过一次轻量命令 (查询超时设置) 探测会话是否仍可用。
+        探测命令不触发 ManagedRemote 的自动恢复，会话已失效时如实返回 False，由调用方决定是否重建会话。
+        :return: bool
+        """
+        if not self.is_alive:
+            return False
+        probe = getattr(self.driver, "without_recovery", None)
+        try:
+            with probe() if probe else nullcontext():
+                _ = self.driver.timeouts
+            return True
+        except Exception as e:
+            logger.warning(f"会话健康检查失败: {e}")
+            return False
+
     def quit(self):
         """安全关闭 Appium 驱动并断开连接。"""
+        self._stop_keepalive()
         if self.driver:
             try:
                 # 获取 session_id 用于日志追踪
@@ -56,3 +56,25 @@ class Locator(str, Enum):
     AID = "aid"  # 简写
     ANDROID_UIAUTOMATOR = "android_uiautomator"
     IOS_PREDICATE = "ios_predicate"
+
+
+class ResetLevel(Enum):
+    """
+    用例前 App 状态重置级别，按开销由低到高排列 (定义顺序即升级顺序)。
+    """
+    NONE = "none"  # 不重置
+    HOME = "home"  # 深链接 / startActivity 回到首页
+    RELAUNCH = "relaunch"  # terminate_app + activate_app 冷启动
+    CLEAR_DATA = "clear_data"  # mobile: clearApp 清除应用数据后启动
+    NEW_SESSION = "new_session"  # 重建 Appium 会话
+
+    def escalations(self) -> list['ResetLevel']:
+        """返回从当前级别开始 (含) 的升级链"""
+        levels = list(ResetLevel)
+        return levels[levels.index(self):]
+
+
+class FailureKind(Enum):
+    """用例失败分类：基础设施失败可重跑，产品失败直接报告"""
+    INFRA = "基础设施"  # 会话丢失、元素过期、Appium 服务端 5xx、连接中断
+    PRODUCT = "产品缺陷"  # 断言失败、等待超时及其他未归类的异常
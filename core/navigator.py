@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: navigator
+@date: 2026/10/19 19:40
+@desc: 页面导航图：页面对象通过 @transition 声明跳转，按实测耗时计算从当前页面到目标页面的最短路径并执行
+"""
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from itertools import count
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Type, TypeVar, TYPE_CHECKING
+
+from core.settings import NAV_COSTS_PATH, NAVIGATE_CONFIRM_TIMEOUT
+
+if TYPE_CHECKING:
+    from appium import webdriver
+    from core.base_page import BasePage
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T", bound="BasePage")
+F = TypeVar("F", bound=Callable)
+
+# 任意页面均可出发的边 (深链接 / startActivity 直达) 的源页面名称
+ANY_PAGE = "*"
+# 未实测过的跳转的默认耗时估计 (秒)
+DEFAULT_COST = 2.0
+# 实测耗时的指数移动平均系数
+COST_ALPHA = 0.3
+
+
+def transition(target: Optional[str | type] = None, source: Optional[str | type] = None) -> Callable[[F], F]:
+    """
+    声明页面跳转方法 (无参调用即可完成跳转)。
+    source / target 缺省为定义该方法的页面类，可传页面类或类名 (用于引用尚未定义的页面)。
+
+    使用示例:
+        class ProjectPage(BasePage):
+            @transition(source="HomePage")  # HomePage -> ProjectPage
+            def switch_to_project(self): ...
+
+    :param target: 跳转后到达的页面
+    :param source: 跳转前所在的页面
+    """
+
+    def decorator(func: F) -> F:
+        func.__transition__ = (source, target)
+        return func
+
+    return decorator
+
+
+def _name(page: Optional[str | type], default: str) -> str:
+    if page is None:
+        return default
+    return page if isinstance(page, str) else page.__name__
+
+
+@dataclass(frozen=True)
+class Transition:
+    """导航图中的一条边"""
+    source: str
+    target: str
+    owner: str  # 定义跳转方法的页面类，执行时以该类实例调用方法
+    method: Optional[str]  # 为 None 表示使用目标页面的深链接 / Activity 直达
+
+    @property
+    def key(self) -> str:
+        return f"{self.source}->{self.target}:{self.method or 'jump'}"
+
+
+def _write_costs(path: Path, costs: dict[str, float]) -> Path:
+    """先写临时文件再替换，读取方不会看到写了一半的文件"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(costs, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+    return path
+
+
+def merge_costs(files: Iterable[Path | str], dest: Path | str = NAV_COSTS_PATH) -> Optional[Path]:
+    """
+    合并多个工作进程的跳转耗时：各进程都从 dest 的历史数据出发，只取与历史值不同 (本次实测过) 的跳转，
+    多个进程都实测过的取平均值。
+    :param files: 各工作进程的耗时文件，不存在的文件忽略
+    :param dest: 合并目标 (同时作为历史数据)
+    :return: 输出文件路径，没有新的实测数据时返回 None
+    """
+    dest = Path(dest)
+    base = json.loads(dest.read_text(encoding="utf-8")) if dest.exists() else {}
+    measured: dict[str, list[float]] = {}
+    for file in map(Path, files):
+        if not file.exists():
+            continue
+        for key, value in json.loads(file.read_text(encoding="utf-8")).items():
+            if base.get(key) != value:
+                measured.setdefault(key, []).append(value)
+    if not measured:
+        return None
+    base.update({key: sum(values) / len(values) for key, values in measured.items()})
+    return _write_costs(dest, base)
+
+
+class Navigator:
+    """
+    页面注册表与导航图。
+    BasePage 子类定义时自动注册 (__init_subclass__)；跳转耗时以指数移动平均累计，可持久化供后续运行使用。
+    """
+
+    def __init__(self, costs_path: Path | str = NAV_COSTS_PATH):
+        self.pages: dict[str, Type['BasePage']] = {}
+        self.edges: dict[str, list[Transition]] = {}
+        self.costs_path = Path(costs_path)
+        self._costs: Optional[dict[str, float]] = None
+        # 本次运行是否实测过跳转耗时 (只读取过历史数据时不回写文件)
+        self._measured = False
+        self._lock = threading.Lock()
+
+    # --- 注册 ---
+    def register(self, page_cls: Type['BasePage']) -> None:
+        """
+        注册页面类及其声明的跳转。
+        :param page_cls: BasePage 子类
+        """
+        name = page_cls.__name__
+        self.pages[name] = page_cls
+        for edges in self.edges.values():
+            edges[:] = [e for e in edges if e.owner != name]
+        for attr, func in vars(page_cls).items():
+            spec = getattr(func, "__transition__", None)
+            if spec:
+                source, target = spec
+                self._add(Transition(_name(source, name), _name(target, name), name, attr))
+        if page_cls.deep_link or page_cls.activity:
+            self._add(Transition(ANY_PAGE, name, name, None))
+
+    def _add(self, edge: Transition) -> None:
+        edges = self.edges.setdefault(edge.source, [])
+        if edge not in edges:
+            edges.append(edge)
+
+    # --- 耗时 ---
+    @property
+    def costs(self) -> dict[str, float]:
+        """跳转实测耗时 (首次访问时从文件加载)"""
+        if self._costs is None:
+            self._costs = {}
+            if self.costs_path.exists():
+                try:
+                    self._costs = json.loads(self.costs_path.read_text(encoding="utf-8"))
+                except (OSError, ValueError) as e:
+                    logger.warning(f"读取导航耗时文件失败: {e}")
+        return self._costs
+
+    def cost(self, edge: Transition) -> float:
+        return self.costs.get(edge.key, DEFAULT_COST)
+
+    def record(self, edge: Transition, duration: float) -> None:
+        """以指数移动平均更新跳转耗时"""
+        with self._lock:
+            old = self.costs.get(edge.key)
+            self.costs[edge.key] = duration if old is None else old + COST_ALPHA * (duration - old)
+            self._measured = True
+
+    def dump(self, path: Optional[Path | str] = None) -> Optional[Path]:
+        """
+        将跳转耗时写入文件，本次运行未实测过跳转时跳过。
+        :param path: 输出文件，缺省写回 costs_path (多设备工作进程写入各自的文件，由编排进程合并)
+        """
+        if not self._measured or not self._costs:
+            return None
+        return _write_costs(Path(path) if path else self.costs_path, self._costs)
+
+    # --- 路径 ---
+    def shortest_path(self, source: Optional[str], target: str) -> Optional[list[Transition]]:
+        """
+        Dijkstra 计算从 source 到 target 的最短路径。
+        :param source: 当前页面名称，未知时为 None (仅能使用直达边)
+        :param target: 目标页面名称
+        :return: 跳转列表 (已在目标页面时为空列表)，不可达时返回 None
+        """
+        if source == target:
+            return []
+        tie = count()
+        heap: list[tuple[float, int, Optional[str], list[Transition]]] = [(0.0, next(tie), source, [])]
+        visited: set[Optional[str]] = set()
+        while heap:
+            total, _, node, path = heapq.heappop(heap)
+            if node == target:
+                return path
+            if node in visited:
+                continue
+            visited.add(node)
+            for edge in self.edges.get(node, []) + self.edges.get(ANY_PAGE, []):
+                if edge.target not in visited:
+                    heapq.heappush(heap, (total + self.cost(edge), next(tie), edge.target, path + [edge]))
+        return None
+
+    def estimate(self, source: Optional[str], target: str) -> Optional[float]:
+        """估算从 source 到 target 的导航耗时，不可达时返回 None"""
+        path = self.shortest_path(source, target)
+        return None if path is None else sum(self.cost(edge) for edge in path)
+
+    def plan_order(self, stops: list[tuple[Optional[str], Optional[str]]], start: Optional[str] = None) -> list[int]:
+        """
+        贪心规划用例顺序：每一步选择从当前页面导航代价最小的用例，代价相同时保持原顺序。
+        :param stops: 各用例的 (起始页面, 结束页面)，未声明起始页面的用例代价为 0，未知结束页面记为 None
+        :param start: 第一个用例开始前所在的页面 (缺省未知)
+        :return: 用例下标的执行顺序
+        """
+        cache: dict[tuple[Optional[str], str], float] = {}
+
+        def hop(source: Optional[str], target: Optional[str]) -> float:
+            if target is None:
+                return 0.0
+            if (source, target) not in cache:
+                estimate = self.estimate(source, target)
+                cache[source, target] = float("inf") if estimate is None else estimate
+            return cache[source, target]
+
+        remaining = list(range(len(stops)))
+        order = []
+        current = start
+        while remaining:
+            best = min(remaining, key=lambda i: (hop(current, stops[i][0]), i))
+            remaining.remove(best)
+            order.append(best)
+            current = stops[best][1]
+        return order
+
+    # --- 执行 ---
+    def current_page(self, driver: 'webdriver.Remote', hint: Optional[str] = None) -> Optional[str]:
+        """
+        通过页面身份标识识别当前页面。
+        :param driver: Appium WebDriver 实例
+        :param hint: 优先检查的页面名称
+        :return: 页面名称，无法识别时返回 None
+        """
+        names = sorted(self.pages, key=lambda n: n != hint)
+        for name in names:
+            page_cls = self.pages[name]
+            if page_cls.identity and page_cls(driver).is_current():
+                return name
+        return None
+
+    def _run(self, driver: 'webdriver.Remote', edge: Transition) -> None:
+        """执行一条跳转并记录耗时，跳转后目标页面声明了 identity 时确认到达"""
+        target_cls = self.pages[edge.target]
+        logger.info(f"导航: {edge.key}")
+        start = time.perf_counter()
+        if edge.method:
+            getattr(self.pages[edge.owner](driver), edge.method)()
+        else:
+            target_cls(driver).jump(target_cls)
+        page = target_cls(driver)
+        if target_cls.identity and not page.is_current(NAVIGATE_CONFIRM_TIMEOUT):
+            raise RuntimeError(f"导航失败: {edge.key} 执行后未到达页面 {edge.target}")
+        self.record(edge, time.perf_counter() - start)
+
+    def navigate_to(self, driver: 'webdriver.Remote', page_cls: Type[T], current: Optional[str] = None) -> T:
+        """
+        从当前页面沿最短路径导航到目标页面。
+        :param driver: Appium WebDriver 实例
+        :param page_cls: 目标页面类
+        :param current: 已知的当前页面名称，缺省时自动识别
+        :return: 目标页面的实例
+        :raises RuntimeError: 如果目标页面不可达或跳转后未到达
+        """
+        target = page_cls.__name__
+        current = current or self.current_page(driver, hint=target)
+        path = self.shortest_path(current, target)
+        if path is None:
+            raise RuntimeError(f"导航图中不存在从 {current or '未知页面'} 到 {target} 的路径")
+        if path:
+            logger.info(f"导航路径 ({current or '未知页面'} -> {target}): {[edge.key for edge in path]}")
+        for edge in path:
+            self._run(driver, edge)
+        return page_cls(driver)
+
+
+# 全局单例
+navigator = Navigator()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: remote
+@date: 2026/10/19 21:30
+@desc: webdriver.Remote 子类：统一的命令钩子、会话失效自动恢复，以及空闲时的会话保活线程；
+       以及录制模式下使用的连接。本模块依赖 Appium 客户端，由 CoreDriver 在创建 driver 时才导入。
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from appium import webdriver
+from appium.webdriver.appium_connection import AppiumConnection
+from selenium.common import InvalidSessionIdException
+from selenium.webdriver.remote.command import Command
+
+from utils.cassette import cassette_recorder
+
+logger = logging.getLogger(__name__)
+
+# 命令钩子: (命令名, 参数, 开始时间戳, 耗时, 异常)
+CommandHook = Callable[[str, Optional[dict], float, float, Optional[BaseException]], None]
+
+# 不触发会话恢复的命令 (创建 / 关闭会话本身)
+_NO_RECOVER_COMMANDS = {Command.NEW_SESSION, Command.QUIT}
+# 参数中包含这些键的命令依赖旧会话的元素引用，恢复会话后无法重放
+_ELEMENT_KEYS = ("id", "elementId")
+
+
+class ManagedRemote(webdriver.Remote):
+    """
+    所有 HTTP 命令都经过 execute，在此统一:
+    - 调用命令钩子 (耗时统计、Trace 导出等)；
+    - 记录最近一次命令时间，供保活线程判断空闲；
+    - 捕获 InvalidSessionIdException，调用 recover 以相同 caps 在同一对象上重建会话，
+      并重放不依赖元素引用的命令 (页面对象持有的 driver 引用保持有效)。
+    """
+
+    def __init__(self, *args, **kwargs):
+        # 父类构造过程中就会执行 newSession 命令，需先初始化属性
+        self.command_hooks: list[CommandHook] = []
+        self.recover: Optional[Callable[[], Any]] = None
+        self.last_command_at = time.monotonic()
+        self._command_lock = threading.RLock()
+        self._recovering = False
+        self._recovery_suspended = False
+        super().__init__(*args, **kwargs)
+
+    def execute(self, driver_command: Any, params: Optional[dict] = None) -> Any:
+        if not isinstance(driver_command, str):
+            # BiDi 命令不经过 HTTP 通道
+            return super().execute(driver_command, params)
+
+        with self._command_lock:
+            start, wall = time.perf_counter(), time.time()
+            error: Optional[BaseException] = None
+            try:
+                try:
+                    return super().execute(driver_command, dict(params) if params else params)
+                except InvalidSessionIdException:
+                    if not self._can_recover(driver_command):
+                        raise
+                    self._recover_session()
+                    if params and any(key in params for key in _ELEMENT_KEYS):
+                        raise
+                    logger.info(f"会话已恢复，重放命令: {driver_command}")
+                    return super().execute(driver_command, dict(params) if params else params)
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                self.last_command_at = time.monotonic()
+                for hook in self.command_hooks:
+                    try:
+                        hook(driver_command, params, wall, time.perf_counter() - start, error)
+                    except Exception as e:
+                        logger.debug(f"命令钩子执行失败: {e}")
+
+    @contextmanager
+    def without_recovery(self) -> Iterator[None]:
+        """
+        代码块内的命令不触发会话恢复，会话失效时直接抛出 InvalidSessionIdException (用于健康检查等探测命令)。
+        持有命令锁，其他线程 (如保活线程) 的命令不受影响。
+        """
+        with self._command_lock:
+            suspended, self._recovery_suspended = self._recovery_suspended, True
+            try:
+                yield
+            finally:
+                self._recovery_suspended = suspended
+
+    def _can_recover(self, driver_command: str) -> bool:
+        return (self.recover is not None and not self._recovering and not self._recovery_suspended
+                and driver_command not in _NO_RECOVER_COMMANDS)
+
+    def _recover_session(self) -> None:
+        logger.warning(f"检测到会话已失效 (Session: {self.session_id})，正在以相同配置重建会话...")
+        self._recovering = True
+        try:
+            self.recover()
+        finally:
+            self._recovering = False
+
+
+class KeepAlive:
+    """
+    会话保活线程：driver 空闲超过 interval 秒时发送一条轻量命令，避免 newCommandTimeout 到期导致会话被服务端回收。
+    ping 同样经过 ManagedRemote.execute，会话已失效时会触发自动恢复。
+    """
+
+    def __init__(self, driver: ManagedRemote, interval: float):
+        """
+        :param driver: 需要保活的 driver
+        :param interval: 空闲阈值 (秒)，应小于 newCommandTimeout
+        """
+        self.driver = driver
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="appium-keepalive", daemon=True)
+
+    def start(self) -> 'KeepAlive':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval / 2):
+            if time.monotonic() - self.driver.last_command_at < self.interval:
+                continue
+            try:
+                _ = self.driver.timeouts
+                logger.debug("会话保活 ping 成功")
+            except Exception as e:
+                logger.warning(f"会话保活 ping 失败: {e}")
+
+
+class RecordingConnection(AppiumConnection):
+    """录制模式下 CoreDriver 使用的连接：请求照常发往 Appium，请求与响应同时交给录制器"""
+
+    def _request(self, method, url, body=None) -> dict:
+        response = super()._request(method, url, body)
+        cassette_recorder.record(method, url, body, response)
+        return response
@@ -26,12 +26,64 @@ REPORT_DIR = BASE_DIR / "reports"
 CONFIG_DIR = BASE_DIR / "config"
 DATA_DIR = BASE_DIR / "data"
 
+# 多设备并行时，每台设备独立的输出目录 (Allure 结果、日志、junit)
+DEVICE_OUTPUT_DIR = OUTPUT_DIR / "devices"
+
 # 需要初始化的目录列表
 REQUIRED_DIRS = [LOG_DIR, LOG_BACKUP_DIR, ALLURE_TEMP, SCREENSHOT_DIR]
 
 # --- 文件路径 ---
 LOG_SOURCE = LOG_DIR / "pytest.log"
+# 异步日志文件格式 (与 pytest.ini 的 log_file_format 保持一致)
+LOG_FILE_FORMAT = "%(asctime)s %(levelname)-5s [%(name)s] %(module)s.%(funcName)s:%(lineno)d  - %(message)s"
+LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+# 压缩归档的日志保留数量 (gzip 后体积约为原始日志的 1/10)
+LOG_BACKUP_KEEP = 100
+# 高频日志限流：同一调用位置每秒最多放行的条数与突发容量，只作用于下列等待 / 轮询子日志器，
+# 点击、输入、截图等步骤日志 (core.driver 本身) 不限流，失败报告依赖的操作记录不会被丢弃
+LOG_RATE_LIMIT = 2
+LOG_RATE_BURST = 20
+LOG_RATE_LIMITED_LOGGERS = ("core.driver.wait", "utils.decorators.wait")
 CAPS_CONFIG_PATH = CONFIG_DIR / "caps.yaml"
+# caps.yaml 中的保留节点 (不是设备配置)：devices 多设备列表，profiles 命名覆盖配置 (--profile / APP_PROFILE)
+CAPS_RESERVED_KEYS = ("devices", "profiles")
+# caps 字段的类型约束 (加载时对全部配置与 profiles 统一校验，未列出的字段不限制) 以及每个配置的必填字段
+CAPS_SCHEMA = {
+    "platformName": str, "automationName": str, "deviceName": str, "platformVersion": str, "udid": str,
+    "app": str, "appPackage": str, "appActivity": str, "bundleId": str,
+    "noReset": bool, "fullReset": bool, "autoAcceptAlerts": bool, "waitForQuiescence": bool,
+    "newCommandTimeout": int, "systemPort": int, "wdaLocalPort": int, "mjpegServerPort": int,
+}
+CAPS_REQUIRED = ("platformName",)
+# 以环境变量覆盖 caps 的前缀 (如 APPIUM_CAP_udid=emulator-5554；字段名不区分大小写)
+CAPS_ENV_PREFIX = "APPIUM_CAP_"
+# 用例执行历史 (sqlite，供耗时趋势查询与多设备动态调度)
+HISTORY_DB_PATH = OUTPUT_DIR / "history.db"
+# 页面导航图中各跳转的实测耗时 (供 core.navigator 计算最短路径)
+NAV_COSTS_PATH = OUTPUT_DIR / "nav_costs.json"
+# 运行时定位耗时数据 (供 utils.locator_advisor 生成分析报告)
+LOCATOR_PROFILE_PATH = OUTPUT_DIR / "locator_profile.json"
+# 纯 Python 增量 HTML 报告 (无需 Java；不放在 REPORT_DIR 下，避免被 allure generate --clean 清除)
+HTML_REPORT_DIR = OUTPUT_DIR / "html_report"
+# Chrome Trace Event 文件 (--trace_file / main.py --trace)
+TRACE_PATH = OUTPUT_DIR / "trace.json"
+# 增量报告扫描结果目录的间隔 (秒)
+REPORT_POLL_INTERVAL = 2
+# 内容寻址产物仓库 (截图、附件按 sha256 存一份)，以及淘汰策略：总大小上限 (字节) 与保留天数，0 表示不限制
+ARTIFACT_STORE_DIR = OUTPUT_DIR / "artifacts"
+ARTIFACT_MAX_BYTES = 2 * 1024 ** 3
+ARTIFACT_MAX_AGE_DAYS = 14
+# WebDriver 录制回放 (--cassette)：默认 cassette 文件，以及录制时需要脱敏的字段名 (不区分大小写，子串匹配)
+CASSETTE_PATH = OUTPUT_DIR / "cassettes" / "session.json.gz"
+CASSETTE_REDACT_KEYS = (
+    "password", "pass_word", "passwd", "pwd", "token", "secret", "cookie", "authorization", "credential")
+# 值需要登记为敏感字符串的环境变量 (按名称精确匹配，.env 中的账号密码等)；
+# 不按 CASSETTE_REDACT_KEYS 子串匹配变量名，以免误把 PWD (当前目录)、*_MAX_TOKENS 等普通变量的值当作敏感值
+CASSETTE_SECRET_ENV = ("USER_NAME", "PASS_WORD")
+# 数据驱动 (data_file 标记) 的解析缓存：按数据文件内容哈希命名的 pickle 流
+DATA_CACHE_DIR = OUTPUT_DIR / "data_cache"
+# 设备模拟器 (--simulator) 的默认场景：录制的屏幕与跳转规则
+SIMULATOR_SCENARIO = CONFIG_DIR / "simulator" / "wan_android.yaml"
 
 # --- 启动 Appium 最大尝试次数 ---
 MAX_RETRIES = 40
@@ -40,12 +92,40 @@ MAX_RETRIES = 40
 IMPLICIT_WAIT_TIMEOUT = 10
 EXPLICIT_WAIT_TIMEOUT = 10
 
+# 创建会话的最大尝试次数与首次重试等待 (秒，之后每次翻倍)
+CONNECT_RETRIES = 3
+CONNECT_BACKOFF = 2.0
+# 会话保活：driver 空闲超过该时间 (秒) 时发送 ping，需小于 caps 中的 newCommandTimeout；0 表示关闭
+KEEPALIVE_INTERVAL = 30
+
+# 用例前 App 状态重置后的校验超时 (秒)，校验失败会升级到更高的重置级别
+RESET_VERIFY_TIMEOUT = 5
+
+# 深链接 / startActivity 跳转后确认到达目标页面的超时 (秒)，超时后回退到 UI 路径
+NAVIGATE_CONFIRM_TIMEOUT = 5
+
+# AsyncCoreDriver 共享线程池大小 (所有会话并发执行命令的上限)
+ASYNC_MAX_WORKERS = 8
+
 # 默认 Appium Server 地址 (可通过命令行参数覆盖)
 APPIUM_HOST = "127.0.0.1"
 APPIUM_PORT = 4723
 
+# 多设备并行时各设备端口的起始值 (按设备序号递增)
+SYSTEM_PORT_BASE = 8200  # UiAutomator2 systemPort / XCUITest wdaLocalPort
+MJPEG_PORT_BASE = 9100  # mjpegServerPort
+
+# 动态调度时单个用例的最大派发次数 (设备掉线回收后重新派发)
+SCHEDULER_MAX_ATTEMPTS = 2
+
 # --- 环境配置 (Environment Switch) ---
 CURRENT_ENV = os.getenv("APP_ENV", "test")
+# 以环境变量覆盖业务环境配置的前缀 (如 APP_ENV_BASE_URL=https://... 覆盖 base_url)
+ENV_OVERRIDE_PREFIX = "APP_ENV_"
+# caps 命名覆盖配置 (caps.yaml 的 profiles 节点)，可被 --profile 覆盖
+CURRENT_PROFILE = os.getenv("APP_PROFILE", "")
+# 精简模式：step_trace / StepTracer 退化为近乎无开销的直接调用 (不输出步骤日志、不记录 Trace)，适合大规模回归
+LEAN_MODE = os.getenv("LEAN_MODE", "0") == "1"
 
 # base_url：业务接口的入口地址。主要用于通过 API 快速构造测试数据（前置条件）或查询数据库/接口状态来验证 App 操作是否生效（数据断言）
 # source_address：后端服务器的物理/源站地址。通常用于绕过负载均衡或 DNS 直接指定访问特定的服务器节点。
@@ -9,52 +9,76 @@
 @date: 2026/1/13 16:54
 @desc:
 """
+import argparse
+import logging
 import shutil
-import datetime
-from pathlib import Path
+import sys
 
 import pytest
 
-from core.settings import LOG_SOURCE, LOG_BACKUP_DIR, ALLURE_TEMP
+from core.settings import LOG_SOURCE, ALLURE_TEMP, APPIUM_PORT, TRACE_PATH, SCREENSHOT_DIR
+from core.config_loader import config_registry
 from core.enums import AppPlatform
 from utils.dirs_manager import ensure_dirs_ok
 from utils.report_handler import generate_allure_report
+from utils.html_report import IncrementalReport, ReportWatcher
+from utils.device_pool import run_parallel
+from utils.log_archive import LogArchive
+from utils.artifact_store import artifact_store
+from utils.logger import current_run_id
 
 
 # netstat -ano | findstr :4723
 # taskkill /PID 12345 /F
 
-def _archive_logs():
+def _archive_logs() -> None:
     """
     在测试开始前，归档上一次运行的日志文件。
-    此时没有任何句柄占用，move 操作是 100% 安全的。
+    此时没有任何句柄占用，move 操作是 100% 安全的；压缩、建立索引与清理旧归档在后台线程中进行。
     """
     # 4. 备份日志 (无论测试是否崩溃都执行)
-    if LOG_SOURCE.exists() and LOG_SOURCE.stat().st_size > 0:
-        now = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_path = LOG_BACKUP_DIR / f"pytest_{now}.log"
-        try:
-            # 移动并重命名
-            shutil.move(str(LOG_SOURCE), str(backup_path))
-            print(f"已自动归档上次运行的日志: {backup_path}")
-            # shutil.copy2(LOG_SOURCE, backup_path)
-            # print(f"日志已备份至: {backup_path}")
-            _clean_old_logs(LOG_BACKUP_DIR)
-        except Exception as e:
-            print(f"归档旧日志失败 (可能被外部编辑器打开): {e}")
-    else:
-        print("未找到原始日志文件，跳过备份。")
-
-
-# 日志清理
-def _clean_old_logs(backup_dir, keep_count=10):
-    files = sorted(Path(backup_dir).glob("pytest_*.log"), key=lambda p: p.stat().st_mtime)
-    while len(files) > keep_count:
-        file_to_remove = files.pop(0)
-        try:
-            file_to_remove.unlink(missing_ok=True)
-        except OSError as e:
-            print(f"清理旧日志失败 {file_to_remove}: {e}")
+    archive = LogArchive()
+    try:
+        backup_path = archive.archive(LOG_SOURCE)
+        if backup_path:
+            print(f"已自动归档上次运行的日志: {backup_path}.gz")
+        else:
+            print("未找到原始日志文件，跳过备份。")
+    except Exception as e:
+        print(f"归档旧日志失败 (可能被外部编辑器打开): {e}")
+
+
+def logs_command(argv: list[str]) -> None:
+    """
+    日志归档检索：python main.py logs search <正则> [--run RUN_ID] [--test NODEID] [--since 时间] [--until 时间]
+    :param argv: logs 之后的命令行参数
+    """
+    parser = argparse.ArgumentParser(prog="main.py logs", description="检索压缩归档的历史日志")
+    sub = parser.add_subparsers(dest="action", required=True)
+    p_list = sub.add_parser("list", help="列出归档及其索引信息")
+    p_search = sub.add_parser("search", help="按正则检索日志行，只解压索引命中的归档")
+    p_search.add_argument("pattern", help="正则表达式")
+    p_search.add_argument("-i", "--ignore_case", action="store_true", help="忽略大小写")
+    for p in (p_list, p_search):
+        p.add_argument("--run", default=None, help="运行 ID (前缀匹配)")
+        p.add_argument("--test", default=None, help="用例 nodeid 片段")
+        p.add_argument("--since", default=None, help="起始时间，如 2026-10-19 或 '2026-10-19 08:00:00'")
+        p.add_argument("--until", default=None, help="结束时间")
+    args = parser.parse_args(argv)
+
+    archive = LogArchive()
+    archive.compress_pending()
+    filters = dict(run_id=args.run, test=args.test, since=args.since, until=args.until)
+    if args.action == "list":
+        for entry in archive.select(**filters):
+            print(f"{entry['file']}  {entry.get('run_id') or '-'}  {entry.get('start')} ~ {entry.get('end')}  "
+                  f"用例 {len(entry.get('tests', []))} 个  {entry.get('size', 0) / 1024:.0f} KB")
+        return
+    hits = 0
+    for file, lineno, line in archive.search(args.pattern, args.ignore_case, **filters):
+        print(f"{file}:{lineno}: {line}")
+        hits += 1
+    print(f"共 {hits} 条匹配")
 
 
 def _clean_temp_dirs():
@@ -68,7 +92,41 @@ def _clean_temp_dirs():
     ALLURE_TEMP.mkdir(parents=True, exist_ok=True)
 
 
-def main():
+def _evict_artifacts() -> None:
+    """淘汰产物仓库中的旧对象与过期截图"""
+    try:
+        removed = artifact_store.evict(retention_dirs=[SCREENSHOT_DIR])
+        if removed:
+            print(f"已淘汰旧产物 {removed} 个")
+    except Exception as e:
+        print(f"产物仓库淘汰失败: {e}")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="AppAutoTest 测试执行入口")
+    parser.add_argument("--platform", default=AppPlatform.ANDROID.value, help="目标平台: android or ios")
+    parser.add_argument("--caps_name", default="wan_android", help="配置文件中的设备/平台名称")
+    parser.add_argument("--profile", default=None, help="caps.yaml 中 profiles 下的命名覆盖配置")
+    parser.add_argument("--devices", nargs="*", default=None, metavar="UDID",
+                        help="多设备并行模式：指定 udid 列表；不带参数时读取 caps.yaml 的 devices 或自动发现已连接设备")
+    parser.add_argument("--base_port", type=int, default=APPIUM_PORT, help="多设备模式下的起始 Appium 端口")
+    parser.add_argument("--schedule", choices=["dynamic", "static"], default="dynamic",
+                        help="多设备模式的调度方式：dynamic 空闲设备按历史耗时领取用例；static 轮询分片")
+    parser.add_argument("--live_report", choices=["on", "off"], default="on",
+                        help="运行期间实时生成纯 Python HTML 报告 (outputs/html_report/index.html)")
+    parser.add_argument("--trace", action="store_true",
+                        help="导出 Chrome Trace Event 文件 outputs/trace.json (多设备模式下每台设备一条轨道)")
+    parser.add_argument("paths", nargs="*", default=["test_cases"], help="用例路径")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["logs"]:
+        return logs_command(argv[1:])
+    cli_args = parse_args(argv)
+    # 运行 ID 通过环境变量传给 pytest 及多设备工作进程，写入日志与归档索引
+    current_run_id()
     try:
         # 1. 创建目录
         ensure_dirs_ok()
@@ -76,20 +134,45 @@ def main():
         # 2. 处理日志
         _archive_logs()
 
-        # 3. 执行 Pytest
-
-        args = [
-            "test_cases",
-            "-x",  # 注意：-x 表示遇到错误立即停止，如果是全量回归建议去掉 -x
-            "-v",
-            f"--alluredir={ALLURE_TEMP}",
-            f"--platform={AppPlatform.ANDROID.value}",
-            "--caps_name=wan_android"
-        ]
-        pytest.main(args)
+        # 3. 执行 Pytest (开启实时报告时，用例结束即写入 HTML 报告)
+        if cli_args.devices is not None:
+            # 多设备模式的结果最后汇总到 ALLURE_TEMP，先清理再启动实时报告，避免删除其监听的目录
+            logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)-5s [%(name)s]  - %(message)s")
+            _clean_temp_dirs()
+        live_report = IncrementalReport()
+        live_report.reset()
+        watcher = ReportWatcher(live_report).start() if cli_args.live_report == "on" else None
+        try:
+            if cli_args.profile:
+                # 多设备工作进程经 worker_env 继承 profile
+                config_registry.profile = cli_args.profile
+            if cli_args.devices is not None:
+                # 多设备模式：每台设备一个工作进程，运行期间实时报告监听各设备的 alluredir，结束后汇总到 ALLURE_TEMP
+                run_parallel(cli_args.paths, cli_args.platform, cli_args.caps_name, cli_args.devices,
+                             base_port=cli_args.base_port, alluredir=ALLURE_TEMP, schedule=cli_args.schedule,
+                             trace=cli_args.trace,
+                             on_workers=lambda workers: live_report.watch_dirs([w.alluredir for w in workers]))
+            else:
+                args = [
+                    *cli_args.paths,
+                    "-x",  # 注意：-x 表示遇到错误立即停止，如果是全量回归建议去掉 -x
+                    "-v",
+                    f"--alluredir={ALLURE_TEMP}",
+                    f"--platform={cli_args.platform}",
+                    f"--caps_name={cli_args.caps_name}",
+                    *([f"--profile={cli_args.profile}"] if cli_args.profile else []),
+                    *([f"--trace_file={TRACE_PATH}"] if cli_args.trace else []),
+                ]
+                pytest.main(args)
+        finally:
+            if watcher:
+                watcher.stop()
 
         # 4. 生成报告
         generate_allure_report()
+
+        # 5. 按容量 / 保留天数淘汰旧产物 (整次运行只执行一次，不在每个 pytest / 设备工作进程中重复)
+        _evict_artifacts()
     except Exception as e:
         print(f"自动化测试执行过程中发生异常: {e}")
 
@@ -10,16 +10,23 @@
 @desc: 
 """
 import logging
+from typing import TYPE_CHECKING
 
 import allure
-from appium import webdriver
 
 from core.base_page import BasePage
 
+if TYPE_CHECKING:
+    from appium import webdriver
+
 logger = logging.getLogger(__name__)
 
 
 class HomePage(BasePage):
+    # 页面声明：入口 Activity 即首页
+    activity = "com.manu.wanandroid.ui.main.activity.MainActivity"
+    identity = ("-android uiautomator", 'new UiSelector().resourceId("com.manu.wanandroid:id/largeLabel").text("首页")')
+
     # 定位参数
     menu = ("accessibility id", "开启")
     home = ("id", 'com.manu.wanandroid:id/largeLabel')
@@ -33,7 +40,7 @@ class HomePage(BasePage):
 
     login_button = ("accessibility id", '登录')
 
-    def __init__(self, driver: webdriver.Remote):
+    def __init__(self, driver: 'webdriver.Remote'):
         super().__init__(driver)
 
     @allure.step("点击 “侧边栏”")
@@ -10,24 +10,35 @@
 @desc: 
 """
 import logging
+from typing import TYPE_CHECKING
 
 import allure
-from appium import webdriver
 
 from core.base_page import BasePage
+from core.navigator import transition
 from utils.decorators import StepTracer
 
+if TYPE_CHECKING:
+    from appium import webdriver
+
 logger = logging.getLogger(__name__)
 
 
 class ProjectPage(BasePage):
+    # 页面声明：App 未提供项目页的深链接，通过 UI 路径 (enter) 进入
+    identity = ("-android uiautomator", 'new UiSelector().text("完整项目")')
+
     # 定位参数
     project_title = ("-android uiautomator", 'new UiSelector().text("项目")')
     pro_table_title = ("-android uiautomator", 'new UiSelector().text("完整项目")')
 
-    def __init__(self, driver: webdriver.Remote):
+    def __init__(self, driver: 'webdriver.Remote'):
         super().__init__(driver)
 
+    def enter(self) -> None:
+        self.switch_to_project()
+
+    @transition(source="HomePage")
     @allure.step("切换到“项目”页面")
     def switch_to_project(self):
         self.click(*self.project_title).attach_screenshot_bytes()
@@ -13,6 +13,7 @@ import logging
 import os
 
 import allure
+import pytest
 
 from page_objects.wan_android_home import HomePage
 from page_objects.wan_android_project import ProjectPage
@@ -24,6 +25,8 @@ logger = logging.getLogger(__name__)
 @allure.epic("测试用例示例")
 @allure.feature("登录模块")
 class TestWanAndroidHome:
+    @pytest.mark.start_page("HomePage")
+    @pytest.mark.end_page("ProjectPage")
     @allure.story("常规登录场景")
     @allure.title("使用合法账号登录成功")
     @allure.severity(allure.severity_level.BLOCKER)
@@ -12,6 +12,7 @@
 import logging
 
 import allure
+import pytest
 
 from page_objects.wan_android_project import ProjectPage
 
@@ -22,6 +23,8 @@ logger = logging.getLogger(__name__)
 @allure.epic("测试用例示例")
 @allure.feature("项目模块")
 class TestWanAndroidProject:
+    @pytest.mark.start_page("HomePage")
+    @pytest.mark.end_page("ProjectPage")
     @allure.story("项目切换场景")
     @allure.title("切换项目页面")
     @allure.severity(allure.severity_level.NORMAL)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_app_reset
+@date: 2026/10/19 18:40
+@desc: 测试 core/app_reset.py 中各重置级别的动作与校验失败时的升级逻辑
+"""
+import pytest
+from appium.webdriver.applicationstate import ApplicationState
+
+from core.app_reset import AppResetter
+from core.driver import CoreDriver
+from core.enums import ResetLevel
+
+
+class FakeRemote:
+    """记录调用的 webdriver.Remote 替身，foreground_after 指定执行哪些命令后 App 回到前台"""
+
+    def __init__(self, foreground_after: set[str], capabilities: dict = None):
+        self.calls: list[str] = []
+        self.foreground_after = foreground_after
+        self.capabilities = capabilities or {"platformName": "Android", "appPackage": "com.app",
+                                             "appActivity": ".MainActivity"}
+
+    def execute_script(self, script: str, params: dict) -> None:
+        self.calls.append(script)
+
+    def terminate_app(self, app_id: str) -> None:
+        self.calls.append("terminate_app")
+
+    def activate_app(self, app_id: str) -> None:
+        self.calls.append("activate_app")
+
+    def query_app_state(self, app_id: str) -> int:
+        if self.foreground_after & set(self.calls):
+            return ApplicationState.RUNNING_IN_FOREGROUND
+        return ApplicationState.RUNNING_IN_BACKGROUND
+
+
+class FakeCore(CoreDriver):
+    def __init__(self, remote: FakeRemote):
+        super().__init__(remote)
+        self.restarts = 0
+
+    def restart_session(self) -> 'FakeCore':
+        self.restarts += 1
+        self.driver.foreground_after.add("restart")
+        self.driver.calls.append("restart")
+        return self
+
+
+class TestResetLevel:
+
+    def test_escalations(self):
+        """测试升级链按定义顺序从当前级别开始"""
+        assert ResetLevel.CLEAR_DATA.escalations() == [ResetLevel.CLEAR_DATA, ResetLevel.NEW_SESSION]
+
+
+class TestAppResetter:
+
+    def test_cheapest_level_succeeds(self):
+        """测试 HOME 级别使用 startActivity 且校验通过时不升级"""
+        remote = FakeRemote({"mobile: startActivity"})
+        resetter = AppResetter(FakeCore(remote))
+        assert resetter.reset("home") is ResetLevel.HOME
+        assert remote.calls == ["mobile: startActivity"]
+        assert len(resetter.timings[ResetLevel.HOME]) == 1
+
+    def test_escalate_when_app_not_in_foreground(self):
+        """测试 App 不在前台时逐级升级直到校验通过"""
+        remote = FakeRemote({"mobile: clearApp"})
+        resetter = AppResetter(FakeCore(remote))
+        assert resetter.reset(ResetLevel.HOME) is ResetLevel.CLEAR_DATA
+        assert resetter.failures == {ResetLevel.HOME: 1, ResetLevel.RELAUNCH: 1}
+
+    def test_deep_link_preferred(self):
+        """测试提供深链接时 HOME 级别使用 mobile: deepLink"""
+        remote = FakeRemote({"mobile: deepLink"})
+        AppResetter(FakeCore(remote)).reset("home", link="app://home")
+        assert remote.calls == ["mobile: deepLink"]
+
+    def test_new_session_as_last_resort(self):
+        """测试其余级别全部失败时重建会话，重建后仍失败则抛出异常"""
+        core = FakeCore(FakeRemote(set()))
+        assert AppResetter(core).reset("relaunch") is ResetLevel.NEW_SESSION
+        assert core.restarts == 1
+
+        core.driver.foreground_after.clear()
+        core.restart_session = lambda: core
+        with pytest.raises(RuntimeError):
+            AppResetter(core).reset("new_session")
+
+    def test_none_is_noop(self):
+        """测试 NONE 级别不执行任何命令"""
+        remote = FakeRemote(set())
+        assert AppResetter(FakeCore(remote)).reset("none") is ResetLevel.NONE
+        assert remote.calls == []
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
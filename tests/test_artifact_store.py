@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_artifact_store
+@date: 2026/10/19 23:05
+@desc: 测试 utils/artifact_store.py 的内容去重、硬链接引用与淘汰策略
+"""
+import os
+import time
+
+import pytest
+
+from utils.artifact_store import ArtifactStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(tmp_path / "store", max_bytes=0, max_age_days=0)
+
+
+class TestArtifactStore:
+
+    def test_put_dedupes_content(self, store):
+        """测试相同内容只存一份，不同内容分别存储"""
+        first = store.put(b"same")
+        assert store.put(b"same") == first
+        assert store.put(b"other") != first
+        assert store.stats()["objects"] == 2
+
+    def test_save_links_to_object(self, store, tmp_path):
+        """测试 save 在目标位置创建引用，覆盖已存在的文件"""
+        dest = tmp_path / "shots" / "a.png"
+        dest.parent.mkdir()
+        dest.write_bytes(b"old")
+        store.save(b"new", dest)
+        store.save(b"new", tmp_path / "shots" / "b.png")
+        assert dest.read_bytes() == b"new"
+        assert dest.samefile(tmp_path / "shots" / "b.png")
+        assert store.stats() == {"objects": 1, "bytes": 3, "referenced": 1}
+
+    def test_dedupe_directory(self, store, tmp_path):
+        """测试目录中内容相同的附件被替换为同一对象的硬链接，结果文件不受影响"""
+        results = tmp_path / "results"
+        results.mkdir()
+        for name in ("1-attachment.png", "2-attachment.png"):
+            (results / name).write_bytes(b"x" * 100)
+        (results / "1-result.json").write_text("{}")
+        assert store.dedupe(results) == 100
+        assert (results / "1-attachment.png").samefile(results / "2-attachment.png")
+        assert store.stats()["objects"] == 1
+
+    def test_evict_by_age(self, tmp_path):
+        """测试超过保留天数的对象与引用目录中的过期文件被删除"""
+        store = ArtifactStore(tmp_path / "store", max_bytes=0, max_age_days=1)
+        old = store.put(b"old")
+        os.utime(old, (time.time() - 3 * 86400,) * 2)
+        store.put(b"fresh")
+        shots = tmp_path / "shots"
+        store.save(b"old", shots / "old.png")
+        os.utime(shots / "old.png", (time.time() - 3 * 86400,) * 2)
+
+        assert store.evict(retention_dirs=[shots]) == 1
+        assert store.stats()["objects"] == 1
+        assert not (shots / "old.png").exists()
+
+    def test_evict_by_size_oldest_first(self, tmp_path):
+        """测试超出容量上限时按最近使用时间从旧到新淘汰"""
+        store = ArtifactStore(tmp_path / "store", max_bytes=20, max_age_days=0)
+        paths = [store.put(bytes([i]) * 10) for i in range(3)]
+        for i, path in enumerate(paths):
+            os.utime(path, (1000 + i, 1000 + i))
+        assert store.evict() == 1
+        assert not paths[0].exists() and paths[2].exists()
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
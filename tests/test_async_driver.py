@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_async_driver
+@date: 2026/10/19 13:50
+@desc: 测试 core/async_driver.py 中的命令顺序、并发与链式调用语义
+"""
+import asyncio
+import time
+
+import pytest
+
+from core.async_driver import AsyncCoreDriver
+from core.driver import CoreDriver
+
+
+class SlowDriver(CoreDriver):
+    """以 sleep 模拟网络往返的 CoreDriver"""
+
+    def __init__(self, name: str, log: list):
+        super().__init__()
+        self.name = name
+        self.log = log
+
+    def tap(self, idx: int, cost: float = 0.05) -> 'SlowDriver':
+        time.sleep(cost)
+        self.log.append((self.name, idx))
+        return self
+
+    def read(self) -> str:
+        return self.name
+
+
+class TestAsyncCoreDriver:
+
+    def test_commands_keep_order_within_session(self):
+        """测试同一会话内的命令按提交顺序执行"""
+        log = []
+        driver = AsyncCoreDriver(SlowDriver("a", log))
+
+        async def scenario():
+            # 先提交的命令耗时更长，仍必须先完成
+            await asyncio.gather(*(driver.tap(i, cost=0.05 - i * 0.01) for i in range(5)))
+
+        asyncio.run(scenario())
+        assert log == [("a", i) for i in range(5)]
+
+    def test_sessions_run_concurrently(self):
+        """测试不同会话的命令并发执行"""
+        log = []
+        drivers = [AsyncCoreDriver(SlowDriver(str(i), log)) for i in range(4)]
+
+        async def scenario():
+            await asyncio.gather(*(d.tap(0, cost=0.2) for d in drivers))
+
+        start = time.perf_counter()
+        asyncio.run(scenario())
+        assert time.perf_counter() - start < 0.6
+        assert len(log) == 4
+
+    def test_chaining_and_attributes(self):
+        """测试返回自身的方法返回异步门面，属性同步透传"""
+        driver = AsyncCoreDriver(SlowDriver("a", []))
+
+        async def scenario():
+            return await driver.tap(0, cost=0), await driver.read()
+
+        chained, value = asyncio.run(scenario())
+        assert chained is driver
+        assert value == "a"
+        assert driver.is_alive is False
+        assert driver.name == "a"
+
+    def test_unknown_attribute(self):
+        """测试访问不存在的方法时抛出 AttributeError"""
+        with pytest.raises(AttributeError):
+            AsyncCoreDriver(SlowDriver("a", [])).not_exists
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_base_page
+@date: 2026/10/19 19:10
+@desc: 测试 core/base_page.py 中 navigate 的直达、确认与 UI 回退逻辑
+"""
+import pytest
+
+from core.base_page import BasePage
+
+
+class FakeRemote:
+    """模拟 App 当前所在页面的 webdriver.Remote 替身"""
+
+    def __init__(self, links: dict[str, str]):
+        self.links = links  # 深链接 / Activity -> 打开后显示的页面标识
+        self.screen = "home"
+        self.calls: list[tuple[str, dict]] = []
+        self.capabilities = {"platformName": "Android", "appPackage": "com.app"}
+
+    def execute_script(self, script: str, params: dict) -> None:
+        self.calls.append((script, params))
+        target = params.get("url") or params.get("intent", "").split("/", 1)[-1]
+        self.screen = self.links.get(target, self.screen)
+
+
+class FakePage(BasePage, register=False):
+    """以 FakeRemote.screen 判断身份标识是否可见"""
+
+    def is_visible(self, by: str, value: str) -> bool:
+        return self.driver.screen == value
+
+    def wait_until_visible(self, by: str, value: str, timeout=None) -> bool:
+        return self.is_visible(by, value)
+
+
+class LinkedPage(FakePage):
+    deep_link = "app://linked"
+    identity = ("id", "linked")
+
+
+class ActivityPage(FakePage):
+    activity = ".DetailActivity"
+    identity = ("id", "detail")
+
+
+class UiOnlyPage(FakePage):
+    identity = ("id", "ui_only")
+
+    def enter(self) -> None:
+        self.driver.screen = "ui_only"
+
+
+class TestNavigate:
+
+    def test_deep_link_confirmed(self):
+        """测试深链接直达且身份标识确认后不走 UI 路径"""
+        remote = FakeRemote({"app://linked": "linked"})
+        page = FakePage(remote).navigate(LinkedPage, via=lambda p: pytest.fail("不应回退到 UI 路径"))
+        assert isinstance(page, LinkedPage)
+        assert remote.calls == [("mobile: deepLink", {"url": "app://linked", "package": "com.app"})]
+
+    def test_start_activity(self):
+        """测试 Android 使用 startActivity 打开声明的 Activity"""
+        remote = FakeRemote({".DetailActivity": "detail"})
+        FakePage(remote).navigate(ActivityPage)
+        assert remote.calls == [("mobile: startActivity", {"intent": "com.app/.DetailActivity"})]
+
+    def test_fallback_to_ui_path(self):
+        """测试直达未到达目标页面时回退到 via 指定的 UI 路径"""
+        remote = FakeRemote({})
+        visited = []
+
+        def via(page: LinkedPage) -> None:
+            visited.append(page)
+            page.driver.screen = "linked"
+
+        page = FakePage(remote).navigate(LinkedPage, via=via)
+        assert visited == [page]
+
+    def test_already_current_and_enter(self):
+        """测试已在目标页面时不执行任何命令，无直达方式时使用页面的 enter"""
+        remote = FakeRemote({})
+        FakePage(remote).navigate(UiOnlyPage)
+        FakePage(remote).navigate(UiOnlyPage)
+        assert remote.calls == []
+        assert remote.screen == "ui_only"
+
+    def test_unreachable_raises(self):
+        """测试所有路径均未到达目标页面时抛出异常"""
+        with pytest.raises(RuntimeError):
+            FakePage(FakeRemote({})).navigate(LinkedPage)
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_cassette
+@date: 2026/10/20 03:20
+@desc: 测试 utils/cassette.py 的脱敏、录制 (以替身服务代替真机)、按用例回放与差异报告
+"""
+import pytest
+from dotenv import load_dotenv
+from selenium.common import WebDriverException
+
+from benchmarks.bench_core_driver import FIXTURE, CAPS
+from core.driver import CoreDriver
+from utils.cassette import Redactor, Cassette, ReplayServer, cassette_recorder, redactor, REDACTED
+from utils.fake_appium import FakeAppiumServer
+from utils.logger import log_context, test_var
+
+TITLE = ("id", "com.manu.wanandroid:id/tvTitle")
+MENU = ("accessibility id", "开启")
+
+
+def _connect(server: FakeAppiumServer) -> CoreDriver:
+    return CoreDriver().server_config(port=server.port).connect("android", CAPS, retries=1, backoff=0)
+
+
+@pytest.fixture
+def cassette(tmp_path) -> Cassette:
+    """在替身服务上录制两个用例：读取标题并输入敏感文本、点击菜单"""
+    with FakeAppiumServer(FIXTURE) as device:
+        cassette_recorder.start(tmp_path / "flow.json.gz")
+        try:
+            with log_context(test_var, "t::a"):
+                driver = _connect(device)
+                driver.get_text(*TITLE)
+                driver.input(*TITLE, "hunter2-secret", sensitive=True)
+            with log_context(test_var, "t::b"):
+                driver.click(*MENU)
+                driver.quit()
+        finally:
+            path = cassette_recorder.stop()
+    return Cassette.load(path)
+
+
+class TestRedactor:
+
+    def test_keys_and_secrets(self):
+        """测试敏感字段名与登记过的敏感字符串被替换，sendKeys 的逐字符列表同步脱敏"""
+        redactor = Redactor()
+        redactor.add_secret("p@ssw0rd")
+        data = {"appium:password": "x", "args": [{"text": "p@ssw0rd", "value": list("p@ssw0rd")}], "n": "ok"}
+        assert redactor.redact(data) == {"appium:password": REDACTED, "n": "ok",
+                                         "args": [{"text": REDACTED, "value": list(REDACTED)}]}
+        assert data["args"][0]["text"] == "p@ssw0rd"
+
+    def test_env_names_exact(self, monkeypatch):
+        """测试只登记指定名称的环境变量，PWD / *_MAX_TOKENS 等普通变量的值不当作敏感值"""
+        monkeypatch.setenv("PWD", "/root/package")
+        monkeypatch.setenv("OLDPWD", "/root")
+        monkeypatch.setenv("APP_MAX_TOKENS", "64000")
+        monkeypatch.setenv("PASS_WORD", "env-pass-word")
+        redactor = Redactor()
+        assert redactor.redact({"value": "home dir /root/package/x, 64000"}) == {
+            "value": "home dir /root/package/x, 64000"}
+        assert redactor.redact({"text": "env-pass-word"}) == {"text": REDACTED}
+
+    def test_dotenv_secret_registered_on_start(self, tmp_path, monkeypatch):
+        """测试导入后才由 .env 加载的密码，在开始录制时登记为敏感值"""
+        # 全局脱敏器登记的测试密码在用例结束后还原，不影响后续用例
+        monkeypatch.setattr(redactor, "_secrets", set(redactor._secrets))
+        monkeypatch.setenv("PASS_WORD", "")
+        monkeypatch.delenv("PASS_WORD")
+        env_file = tmp_path / ".env"
+        env_file.write_text("PASS_WORD=dotenv-only-pw\n", encoding="utf-8")
+        load_dotenv(env_file)
+        assert redactor.redact({"text": "dotenv-only-pw"}) == {"text": "dotenv-only-pw"}
+
+        cassette_recorder.start(tmp_path / "flow.json.gz")
+        cassette_recorder.enabled = False
+        assert redactor.redact({"text": "dotenv-only-pw"}) == {"text": REDACTED}
+
+
+class TestCassette:
+
+    def test_record(self, cassette):
+        """测试请求按用例分段录制，敏感输入已脱敏"""
+        assert cassette.tests() == ["t::a", "t::b"]
+        assert "hunter2-secret" not in repr(cassette.interactions)
+        assert any(i.path.endswith("/click") and i.test == "t::b" for i in cassette.interactions)
+
+    def test_replay_matches(self, cassette):
+        """测试命令序列不变时回放无差异"""
+        with ReplayServer(cassette) as server:
+            driver = _connect(server)
+            server.begin("t::b")
+            driver.click(*MENU)
+            assert server.end() == []
+            server.begin("t::a")
+            assert driver.get_text(*TITLE) == "玩Android"
+            driver.input(*TITLE, "hunter2-secret", sensitive=True)
+            assert server.end() == []
+            driver.quit()
+
+    def test_replay_mismatch(self, cassette):
+        """测试多出的请求返回错误，未发出的录制请求记为缺少"""
+        with ReplayServer(cassette) as server:
+            driver = _connect(server)
+            server.begin("t::b")
+            with pytest.raises(WebDriverException, match="cassette"):
+                driver.find_element("accessibility id", "关闭")
+            kinds = [m.kind for m in server.end()]
+            assert kinds[0] == "unexpected" and kinds.count("missing") == 4
+            assert "[多出]" in server.report() and "[缺少]" in server.report()
+            driver.quit()
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
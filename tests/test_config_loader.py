@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_config_loader
+@date: 2026/10/20 05:10
+@desc: 测试 core/config_loader.py 的缓存失效、逐层覆盖、schema 校验与工作进程配置快照
+"""
+import os
+
+import pytest
+
+from core.config_loader import ConfigRegistry, ENV_SNAPSHOT, get_caps, get_env_config
+from core.settings import CAPS_CONFIG_PATH
+
+CAPS_YAML = """
+android:
+  platformName: Android
+  automationName: uiautomator2
+  newCommandTimeout: 60
+  noReset: false
+ios:
+  platformName: iOS
+  newCommandTimeout: 60
+devices:
+  - emulator-5554
+profiles:
+  ci:
+    newCommandTimeout: 300
+    android: {noReset: true}
+"""
+
+
+@pytest.fixture
+def caps_file(tmp_path):
+    path = tmp_path / "caps.yaml"
+    path.write_text(CAPS_YAML, encoding="utf-8")
+    return path
+
+
+class TestCache:
+
+    def test_parse_once_until_modified(self, caps_file):
+        """测试文件未变化时只解析一次，修改后重新解析"""
+        registry = ConfigRegistry(caps_file)
+        registry.caps("android")
+        registry.caps("ANDROID")
+        assert registry.parse_count == 1
+
+        caps_file.write_text(CAPS_YAML.replace("60", "90", 1), encoding="utf-8")
+        os.utime(caps_file, ns=(0, 1))
+        assert registry.caps("android")["newCommandTimeout"] == 90
+        assert registry.parse_count == 2
+
+    def test_snapshot(self, caps_file, monkeypatch):
+        """测试工作进程在文件未变化时直接使用主进程的快照，文件变化后快照失效"""
+        parent = ConfigRegistry(caps_file, profile="ci")
+        env = parent.worker_env()
+        assert env["APP_PROFILE"] == "ci"
+
+        monkeypatch.setenv(ENV_SNAPSHOT, env[ENV_SNAPSHOT])
+        worker = ConfigRegistry(caps_file)
+        assert worker.caps("android")["platformName"] == "Android"
+        assert worker.parse_count == 0
+
+        os.utime(caps_file, ns=(0, 1))
+        assert ConfigRegistry(caps_file).names() == ["android", "ios"]
+
+
+class TestLayers:
+
+    def test_profile_env_cli(self, caps_file, monkeypatch):
+        """测试 基础配置 -> profile -> 环境变量 -> 命令行 逐层覆盖，字符串值按 schema 转换类型"""
+        registry = ConfigRegistry(caps_file, profile="ci")
+        assert registry.caps("android")["noReset"] is True
+        assert registry.caps("ios")["newCommandTimeout"] == 300
+        assert "noReset" not in registry.caps("ios")
+
+        monkeypatch.setenv("APPIUM_CAP_NEWCOMMANDTIMEOUT", "120")
+        monkeypatch.setenv("APPIUM_CAP_udid", "emulator-5554")
+        caps = registry.caps("android", {"udid": "0123", "noReset": "false"})
+        assert caps["newCommandTimeout"] == 120 and caps["udid"] == "0123" and caps["noReset"] is False
+        assert registry.caps("android", profile="")["newCommandTimeout"] == 120
+
+    def test_returns_copy(self, caps_file):
+        """测试返回值为副本，修改不影响缓存"""
+        registry = ConfigRegistry(caps_file)
+        registry.caps("android")["udid"] = "x"
+        assert "udid" not in registry.caps("android")
+
+    def test_unknown_names(self, caps_file):
+        """测试配置或 profile 不存在时报错"""
+        registry = ConfigRegistry(caps_file)
+        with pytest.raises(ValueError, match="windows"):
+            registry.caps("windows")
+        with pytest.raises(ValueError, match="nightly"):
+            registry.caps("android", profile="nightly")
+
+
+class TestValidation:
+
+    def test_schema_errors_listed(self, tmp_path):
+        """测试加载时一次列出全部 schema 问题"""
+        path = tmp_path / "caps.yaml"
+        path.write_text("android:\n  newCommandTimeout: '60'\nprofiles:\n  ci: {noReset: 1}\n", encoding="utf-8")
+        with pytest.raises(ValueError) as exc:
+            ConfigRegistry(path).source()
+        message = str(exc.value)
+        assert "缺少必填字段 platformName" in message
+        assert "android.newCommandTimeout" in message and "profiles.ci.noReset" in message
+
+    def test_override_type_error(self, caps_file):
+        """测试覆盖值无法转换为 schema 类型时报错"""
+        with pytest.raises(ValueError):
+            ConfigRegistry(caps_file).caps("android", {"noReset": "maybe"})
+
+    def test_repo_caps(self):
+        """测试仓库自带的 caps.yaml 符合 schema，get_caps 不区分大小写"""
+        ConfigRegistry(CAPS_CONFIG_PATH).source()
+        assert get_caps("Wan_Android", profile="")["appPackage"] == "com.manu.wanandroid"
+        with pytest.raises(RuntimeError):
+            get_caps("missing")
+
+
+class TestEnvConfig:
+
+    def test_env_override(self, monkeypatch):
+        """测试环境变量覆盖业务环境配置，未定义的环境回退到 test"""
+        monkeypatch.setenv("APP_ENV_BASE_URL", "https://local.example.com")
+        config = get_env_config("missing")
+        assert config["base_url"] == "https://local.example.com"
+        assert config["source_address"] == "192.168.1.100"
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_data_loader
+@date: 2026/10/20 05:40
+@desc: 测试 utils/data_loader.py 的多格式逐行读取、按内容哈希的解析缓存，以及 data_file 标记参数化
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+import utils.data_loader as data_loader
+from utils.data_loader import iter_rows
+
+LOGIN_CSV = Path(__file__).parent / "fixtures" / "login.csv"
+ROWS = [{"username": "a", "age": 18}, {"username": "b", "age": 20}]
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    monkeypatch.setattr(data_loader, "DATA_CACHE_DIR", cache)
+    return cache
+
+
+class TestFormats:
+
+    def test_xlsx_read_only(self, tmp_path):
+        """测试 Excel 按工作表读取，跳过空行与无表头的列"""
+        from openpyxl import Workbook
+        workbook = Workbook()
+        sheet = workbook.create_sheet("users")
+        for values in (["username", "age", None], ["a", 18, "x"], [None, None, None], ["b", 20, None]):
+            sheet.append(values)
+        path = tmp_path / "users.xlsx"
+        workbook.save(path)
+        assert list(iter_rows(path, sheet="users", cache=False)) == ROWS
+
+    def test_csv_yaml_jsonl(self, tmp_path):
+        """测试 CSV / YAML (含多组数据) / JSON Lines"""
+        csv_path = tmp_path / "users.csv"
+        csv_path.write_text("﻿username,age\na,18\nb,20\n", encoding="utf-8")
+        assert list(iter_rows(csv_path)) == [{"username": "a", "age": "18"}, {"username": "b", "age": "20"}]
+
+        yaml_path = tmp_path / "users.yaml"
+        yaml_path.write_text("adults:\n  - {username: a, age: 18}\n  - {username: b, age: 20}\n", encoding="utf-8")
+        assert list(iter_rows(yaml_path, sheet="adults")) == ROWS
+        with pytest.raises(ValueError, match="sheet"):
+            list(iter_rows(yaml_path))
+
+        jsonl_path = tmp_path / "users.jsonl"
+        jsonl_path.write_text("\n".join(json.dumps(row) for row in ROWS) + "\n\n", encoding="utf-8")
+        assert list(iter_rows(jsonl_path)) == ROWS
+
+    def test_unsupported(self, tmp_path):
+        """测试不支持的格式与不存在的文件"""
+        with pytest.raises(ValueError, match=".txt"):
+            iter_rows(tmp_path / "users.txt")
+        with pytest.raises(FileNotFoundError):
+            iter_rows(tmp_path / "missing.csv")
+
+
+class TestCache:
+
+    def test_hit_and_invalidate(self, tmp_path, cache_dir, monkeypatch):
+        """测试读完后缓存命中不再解析，内容变化后重新解析"""
+        path = tmp_path / "users.jsonl"
+        path.write_text("\n".join(json.dumps(row) for row in ROWS), encoding="utf-8")
+        assert list(iter_rows(path)) == ROWS
+        assert len(list(cache_dir.glob("*.pkl"))) == 1
+
+        def fail(*_):
+            raise AssertionError("缓存命中时不应解析文件")
+
+        monkeypatch.setitem(data_loader._READERS, ".jsonl", fail)
+        assert list(iter_rows(path)) == ROWS
+
+        monkeypatch.undo()
+        monkeypatch.setattr(data_loader, "DATA_CACHE_DIR", cache_dir)
+        path.write_text(json.dumps(ROWS[0]), encoding="utf-8")
+        assert list(iter_rows(path)) == ROWS[:1]
+        assert len(list(cache_dir.glob("*.pkl"))) == 2
+
+    def test_partial_read_not_cached(self, tmp_path, cache_dir):
+        """测试中途停止读取时不写入缓存"""
+        path = tmp_path / "users.jsonl"
+        path.write_text("\n".join(json.dumps(row) for row in ROWS), encoding="utf-8")
+        rows = iter_rows(path)
+        assert next(rows) == ROWS[0]
+        rows.close()
+        assert not list(cache_dir.iterdir())
+
+
+class TestDataFileMarker:
+    # 参数化发生在收集阶段，早于 cache_dir fixture 生效，关闭缓存以免写入 outputs/data_cache
+
+    @pytest.mark.data_file(LOGIN_CSV, ids="case", cache=False)
+    def test_columns(self, request, username, password, expected):
+        """测试同名列注入为参数，ids 指定的列作为用例 ID"""
+        assert request.node.callspec.id in ("valid", "wrong_password")
+        assert username == "admintest123456" and expected in ("true", "false")
+
+    @pytest.mark.data_file(LOGIN_CSV, cache=False)
+    def test_data_row(self, data_row):
+        """测试通过 data_row 接收整行"""
+        assert set(data_row) == {"case", "username", "password", "expected"}
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
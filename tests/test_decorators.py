@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_decorators
+@date: 2026/10/20 01:40
+@desc: 测试 utils/decorators.py 的签名缓存、惰性参数格式化、精简模式与 StepTracer 装饰器的重入
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.decorators import (StepTracer, step_trace, set_lean_mode, _format_params, _skip_first_param,
+                              _parse_condition)
+from utils.logger import step_var
+
+
+class Reprable:
+    calls = 0
+
+    def __repr__(self):
+        Reprable.calls += 1
+        return "Reprable()"
+
+
+class Page:
+    @step_trace("点击", source="test_decorators")
+    def click(self, target):
+        return target
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    Reprable.calls = 0
+    yield
+    set_lean_mode(False)
+    logging.getLogger("test_decorators").setLevel(logging.NOTSET)
+
+
+class TestDecorators:
+
+    def test_format_params_skips_self(self):
+        """测试实例方法的 self 被过滤，签名解析结果按函数缓存"""
+        assert _format_params(Page.click, Page(), "login", timeout=3) == "'login', timeout=3"
+        hits = _skip_first_param.cache_info().hits
+        _format_params(Page.click, Page(), "login")
+        assert _skip_first_param.cache_info().hits == hits + 1
+
+    def test_no_repr_when_info_disabled(self):
+        """测试 INFO 未开启时不 repr 参数"""
+        logging.getLogger("test_decorators").setLevel(logging.WARNING)
+        target = Reprable()
+        assert Page().click(target) is target
+        assert Reprable.calls == 0
+
+        logging.getLogger("test_decorators").setLevel(logging.INFO)
+        Page().click(target)
+        assert Reprable.calls == 1
+
+    def test_lean_mode_bypasses_tracing(self, caplog):
+        """测试精简模式下直接调用原函数，不输出步骤日志"""
+        set_lean_mode(True)
+        with caplog.at_level(logging.INFO, logger="test_decorators"):
+            assert Page().click(Reprable()) is not None
+        assert Reprable.calls == 0
+        assert not [r for r in caplog.records if r.name == "test_decorators"]
+
+    def test_parse_condition_cached(self):
+        """测试条件字符串解析结果"""
+        assert _parse_condition("toast_visible:登录成功") == ("toast_visible", ("登录成功",))
+        assert _parse_condition("alert_present") == ("alert_present", ())
+        assert _parse_condition("attr_contains:id,btn,checked,true")[1] == ("id", "btn", "checked", "true")
+
+
+class TestStepTracerDecorator:
+
+    def test_recursive_call(self):
+        """测试 @StepTracer 装饰的函数递归调用时各层独立计时并恢复 step_var"""
+        steps = []
+
+        @StepTracer("递归", source="test_decorators")
+        def countdown(n):
+            steps.append(step_var.get())
+            return n if n == 0 else countdown(n - 1)
+
+        assert countdown(2) == 0
+        assert steps == ["递归"] * 3
+        assert step_var.get() == ""
+
+    def test_two_threads(self):
+        """测试两个线程同时调用同一个 @StepTracer 装饰的函数"""
+        barrier = threading.Barrier(2)
+
+        @StepTracer("滑动", source="test_decorators")
+        def slide(device):
+            # 两个线程都进入步骤后再退出，确保执行区间重叠
+            barrier.wait(timeout=5)
+            return device
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            assert sorted(pool.map(slide, ["a", "b"])) == ["a", "b"]
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_device_pool
+@date: 2026/10/20 06:10
+@desc: 测试 utils/device_pool.py 的设备确定、端口分配、静态分片、junit 统计、吞吐量汇总与工作进程输出
+"""
+import sys
+
+import pytest
+
+import utils.device_pool as device_pool
+from core.settings import SYSTEM_PORT_BASE, MJPEG_PORT_BASE
+from utils.device_pool import (DeviceWorker, WorkerResult, resolve_devices, allocate_workers, shard_tests,
+                               parse_junit, format_summary, start_worker)
+
+JUNIT = """<?xml version="1.0" encoding="utf-8"?>
+<testsuites><testsuite name="pytest" tests="5" failures="1" errors="1" skipped="1"></testsuite></testsuites>
+"""
+
+
+@pytest.fixture(autouse=True)
+def output_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(device_pool, "DEVICE_OUTPUT_DIR", tmp_path)
+    return tmp_path
+
+
+def _worker(index: int = 0, udid: str = "emulator-5554") -> DeviceWorker:
+    return DeviceWorker(index, udid, "android", "android", 4723 + index, 8200 + index, 9100 + index)
+
+
+class TestResolveDevices:
+
+    def test_cli_udids_first(self, monkeypatch):
+        """测试命令行指定的 udid 优先，caps_name 缺省为默认配置"""
+        monkeypatch.setattr(device_pool, "load_configured_devices",
+                            lambda: pytest.fail("指定 udid 时不应读取 caps.yaml"))
+        assert resolve_devices(["a", "b"], "android", "wan_android") == [
+            {"udid": "a", "caps_name": "wan_android"}, {"udid": "b", "caps_name": "wan_android"}]
+
+    def test_configured_then_discovered(self, monkeypatch):
+        """测试未指定 udid 时使用 caps.yaml 的 devices 列表，列表为空时自动发现"""
+        monkeypatch.setattr(device_pool, "load_configured_devices",
+                            lambda: [{"udid": "c", "caps_name": "ios"}, {"udid": "d", "caps_name": None}])
+        assert resolve_devices([], "android", "android") == [
+            {"udid": "c", "caps_name": "ios"}, {"udid": "d", "caps_name": "android"}]
+
+        monkeypatch.setattr(device_pool, "load_configured_devices", lambda: [])
+        monkeypatch.setattr(device_pool, "discover_devices", lambda platform: ["e"])
+        assert resolve_devices([], "android", "android") == [{"udid": "e", "caps_name": "android"}]
+
+
+class TestAllocateAndShard:
+
+    def test_unique_ports(self):
+        """测试每台设备独占连续的 Appium / 系统 / mjpeg 端口"""
+        devices = [{"udid": "a", "caps_name": "x"}, {"udid": "192.168.1.2:5555", "caps_name": "y"}]
+        workers = allocate_workers(devices, "android", base_port=5000)
+        assert [(w.appium_port, w.system_port, w.mjpeg_port) for w in workers] == [
+            (5000, SYSTEM_PORT_BASE, MJPEG_PORT_BASE), (5001, SYSTEM_PORT_BASE + 1, MJPEG_PORT_BASE + 1)]
+        assert workers[1].output_dir.name == "192.168.1.2_5555"
+        args = workers[1].build_args()
+        assert "--udid=192.168.1.2:5555" in args
+        # 定位耗时、跳转耗时写入各设备的输出目录，不与其他工作进程争用同一文件
+        assert f"--locator_profile_file={workers[1].output_dir / 'locator_profile.json'}" in args
+        assert f"--nav_costs_file={workers[1].output_dir / 'nav_costs.json'}" in args
+
+    def test_round_robin(self):
+        """测试轮询分片，重新分片时清空上一次的结果"""
+        workers = [_worker(0, "a"), _worker(1, "b")]
+        shard_tests(["t1", "t2", "t3"], workers)
+        shard_tests(["t1", "t2", "t3"], workers)
+        assert [w.nodeids for w in workers] == [["t1", "t3"], ["t2"]]
+
+
+class TestResults:
+
+    def test_parse_junit(self):
+        """测试从 junit.xml 读取统计，文件缺失或损坏时保持为 0"""
+        result = WorkerResult(_worker(), 0, 30.0)
+        parse_junit(result)
+        assert result.tests == 0
+
+        result.worker.prepare_output()
+        result.worker.junit_file.write_text("<testsuite", encoding="utf-8")
+        parse_junit(result)
+        assert result.tests == 0
+
+        result.worker.junit_file.write_text(JUNIT, encoding="utf-8")
+        parse_junit(result)
+        assert (result.tests, result.passed, result.failures, result.errors, result.skipped) == (5, 2, 1, 1, 1)
+        assert result.throughput == pytest.approx(10.0)
+
+    def test_format_summary(self):
+        """测试汇总以最慢设备的耗时作为墙钟耗时计算整体吞吐"""
+        results = [WorkerResult(_worker(0, "a"), 0, 30.0, tests=5), WorkerResult(_worker(1, "b"), 1, 60.0, tests=4)]
+        summary = format_summary(results)
+        assert summary.splitlines()[1].startswith("a ")
+        assert summary.endswith("合计 9 个用例，墙钟耗时 60.0s，整体吞吐 9.00 个/分")
+        assert format_summary([]).endswith("合计 0 个用例，墙钟耗时 0.0s，整体吞吐 0.00 个/分")
+
+
+class TestStartWorker:
+
+    def test_console_log(self):
+        """测试工作进程输出写入 console.log，句柄交由调用方关闭"""
+        worker = _worker()
+        worker.prepare_output()
+        process, console = start_worker(worker, [sys.executable, "-c", "print('hello')"], {})
+        try:
+            assert process.wait(timeout=30) == 0
+        finally:
+            console.close()
+        assert (worker.output_dir / "console.log").read_text(encoding="utf-8").strip() == "hello"
+
+    def test_closed_when_start_fails(self):
+        """测试进程启动失败时关闭 console.log"""
+        worker = _worker()
+        worker.prepare_output()
+        opened = []
+        real_open = type(worker.output_dir).open
+
+        def track(path, *args, **kwargs):
+            handle = real_open(path, *args, **kwargs)
+            opened.append(handle)
+            return handle
+
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(type(worker.output_dir), "open", track)
+            with pytest.raises(OSError):
+                start_worker(worker, [str(worker.output_dir / "missing-executable")], {})
+        assert opened and opened[0].closed
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
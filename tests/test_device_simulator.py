@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_device_simulator
+@date: 2026/10/20 04:00
+@desc: 测试 utils/device_simulator.py 的场景加载、点击 / 滑动 / 返回跳转与 App 生命周期命令，
+       并以默认场景端到端运行 HomePage / ProjectPage 流程
+"""
+import pytest
+
+import core.driver
+from core.driver import CoreDriver
+from core.settings import SIMULATOR_SCENARIO
+from page_objects.wan_android_home import HomePage
+from page_objects.wan_android_project import ProjectPage
+from utils.artifact_store import ArtifactStore
+from utils.device_simulator import DeviceSimulator, Scenario
+
+CAPS = {"platformName": "Android", "appium:automationName": "UiAutomator2"}
+
+SCREEN = """<hierarchy><android.widget.TextView text="{text}" resource-id="app:id/title" displayed="true"
+bounds="[0,0][1080,200]" /></hierarchy>"""
+
+SCENARIO = f"""
+start: a
+screens:
+  a: '{SCREEN.format(text="A")}'
+  b: '{SCREEN.format(text="B")}'
+activities:
+  .MainActivity: a
+deep_links:
+  app://b: b
+transitions:
+  - {{from: a, click: "id=app:id/title", to: b}}
+  - {{from: b, swipe: right, to: a}}
+"""
+
+
+@pytest.fixture
+def simulator(tmp_path):
+    path = tmp_path / "scenario.yaml"
+    path.write_text(SCENARIO, encoding="utf-8")
+    with DeviceSimulator(path) as server:
+        yield server
+
+
+@pytest.fixture
+def driver(simulator):
+    core = CoreDriver().server_config(port=simulator.port).connect("android", CAPS, retries=1, backoff=0)
+    yield core
+    core.quit()
+
+
+class TestScenario:
+
+    def test_unknown_screen(self, tmp_path):
+        """测试规则引用未定义的屏幕时加载失败"""
+        path = tmp_path / "bad.yaml"
+        path.write_text(SCENARIO + '  - {from: a, back: true, to: missing}\n', encoding="utf-8")
+        with pytest.raises(ValueError, match="missing"):
+            Scenario.load(path)
+
+
+class TestDeviceSimulator:
+
+    def test_click_swipe_back(self, driver, simulator):
+        """测试点击、滑动规则切换屏幕，无返回规则时回到上一个屏幕"""
+        title = ("id", "app:id/title")
+        driver.click(*title)
+        assert simulator.screen == "b" and driver.get_text(*title) == "B"
+        driver.swipe("right", duration=100)
+        assert simulator.screen == "a"
+        driver.click(*title).back()
+        assert simulator.screen == "a"
+
+    def test_app_commands(self, driver, simulator):
+        """测试 startActivity / deepLink 跳转，terminate 后 activate 冷启动到初始屏幕"""
+        driver.driver.execute_script("mobile: deepLink", {"url": "app://b", "package": "app"})
+        assert simulator.screen == "b"
+        driver.driver.execute_script("mobile: startActivity", {"intent": "app/app.MainActivity"})
+        assert simulator.screen == "a"
+
+        driver.click("id", "app:id/title")
+        driver.driver.terminate_app("app")
+        assert driver.driver.query_app_state("app") == 1
+        driver.driver.activate_app("app")
+        assert simulator.screen == "a" and simulator.history == []
+
+
+@pytest.fixture
+def screenshot_dir(tmp_path, monkeypatch):
+    """登录流程会截图：截图目录与产物仓库改到临时目录，不写入 outputs"""
+    monkeypatch.setattr(core.driver, "SCREENSHOT_DIR", tmp_path / "screenshots")
+    monkeypatch.setattr(core.driver, "artifact_store", ArtifactStore(tmp_path / "artifacts"))
+    return tmp_path / "screenshots"
+
+
+class TestWanAndroidScenario:
+
+    def test_home_and_project_flow(self, screenshot_dir):
+        """测试默认场景下首页广告清理、登录与切换到项目页"""
+        with DeviceSimulator(SIMULATOR_SCENARIO) as server:
+            core = CoreDriver().server_config(port=server.port).connect("android", CAPS, retries=1, backoff=0)
+            try:
+                home = HomePage(core.driver)
+                assert home.is_current() and home.app_id == "com.manu.wanandroid"
+                assert home.handle_business_ads() is True
+
+                home.click_open()
+                home.login("admintest123456", "secret-pw")
+                assert server.screen == "mine"
+                assert list(screenshot_dir.glob("*.png"))
+
+                project = home.go_to(ProjectPage)
+                project.switch_to_project()
+                assert project.is_current() and not home.is_current()
+            finally:
+                core.quit()
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_failure_classifier
+@date: 2026/10/19 21:10
+@desc: 测试 utils/failure_classifier.py 的基础设施 / 产品失败分类
+"""
+import pytest
+from selenium.common import (InvalidSessionIdException, StaleElementReferenceException, TimeoutException,
+                             WebDriverException, NoSuchElementException)
+
+from core.enums import FailureKind
+from utils.failure_classifier import classify
+
+
+class TestClassify:
+
+    @pytest.mark.parametrize("exc", [
+        InvalidSessionIdException("session deleted"),
+        StaleElementReferenceException("stale"),
+        WebDriverException("An unknown server-side error occurred while processing the command."),
+        ConnectionRefusedError("[Errno 111] Connection refused"),
+    ])
+    def test_infra(self, exc):
+        """测试会话丢失、元素过期、服务端 5xx 与连接错误归为基础设施失败"""
+        assert classify(exc) is FailureKind.INFRA
+
+    @pytest.mark.parametrize("exc", [
+        AssertionError("期望 完整项目, 实际 项目"),
+        TimeoutException("timeout"),
+        NoSuchElementException("no such element"),
+        WebDriverException("Method is not implemented"),
+    ])
+    def test_product(self, exc):
+        """测试断言、超时与未归类异常归为产品失败"""
+        assert classify(exc) is FailureKind.PRODUCT
+
+    def test_chained_cause(self):
+        """测试由基础设施异常引发的包装异常仍归为基础设施失败，断言失败即使有基础设施原因也不重跑"""
+        try:
+            try:
+                raise InvalidSessionIdException("gone")
+            except InvalidSessionIdException as e:
+                raise RuntimeError("导航失败") from e
+        except RuntimeError as wrapped:
+            assert classify(wrapped) is FailureKind.INFRA
+
+        assertion = AssertionError("断言失败")
+        assertion.__cause__ = StaleElementReferenceException("stale")
+        assert classify(assertion) is FailureKind.PRODUCT
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_fake_appium
+@date: 2026/10/20 02:30
+@desc: 测试 utils/fake_appium.py 替身服务与 CoreDriver 的端到端交互，以及基准回归判定
+"""
+import time
+
+import pytest
+from selenium.common import StaleElementReferenceException, TimeoutException
+
+from benchmarks.bench_core_driver import FIXTURE, CAPS, BenchResult, compare
+from core.driver import CoreDriver
+from utils.fake_appium import FakeAppiumServer
+
+TITLE = ("id", "com.manu.wanandroid:id/tvTitle")
+
+
+@pytest.fixture
+def server():
+    with FakeAppiumServer(FIXTURE) as fake:
+        yield fake
+
+
+@pytest.fixture
+def driver(server):
+    core = CoreDriver().server_config(port=server.port).connect("android", CAPS, retries=1, backoff=0)
+    yield core
+    core.quit()
+
+
+class TestFakeAppiumServer:
+
+    def test_find_click_text(self, driver, server):
+        """测试定位、读取文本、输入与按命令统计往返次数"""
+        assert driver.get_text(*TITLE) == "玩Android"
+        assert len(driver.find_elements("id", "com.manu.wanandroid:id/tvArticleTitle")) == 3
+        driver.input(*TITLE, "!")
+        assert driver.get_text(*TITLE) == "玩Android!"
+        assert driver.get_attribute(*TITLE, "resource-id") == TITLE[1]
+
+        server.reset_stats()
+        driver.click("accessibility id", "开启")
+        assert server.stats["POST /element/:id/click"] == 1
+        assert not [key for key in server.stats if key.startswith("?")]
+
+    def test_missing_element_times_out(self, driver):
+        """测试不存在的元素按 W3C no such element 处理，显式等待超时"""
+        assert driver.is_visible("id", "com.app:id/not_exist") is False
+        with pytest.raises(TimeoutException):
+            driver.find_element("id", "com.app:id/not_exist", timeout=0.2)
+
+    def test_stale_after_load(self, driver, server):
+        """测试切换层级后旧元素 ID 失效"""
+        element = driver.find_element(*TITLE)
+        server.load(FIXTURE)
+        with pytest.raises(StaleElementReferenceException):
+            _ = element.text
+
+    def test_latency(self, server):
+        """测试每次请求附加配置的延迟"""
+        server.latency = 0.05
+        start = time.perf_counter()
+        status, value = server.dispatch("GET", "/status", {})
+        assert time.perf_counter() - start >= 0.05
+        assert status == 200 and value["ready"]
+        assert server.round_trips == 1
+
+
+class TestBenchmarkCompare:
+
+    def test_regressions(self):
+        """测试往返次数严格比较，耗时在余量内不算回归"""
+        baseline = {"click": {"p50_ms": 2.0, "p95_ms": 3.0, "round_trips": 4}}
+        assert compare([BenchResult("click", 3.5, 9.0, 4)], baseline) == []
+        assert compare([BenchResult("new", 99.0, 99.0, 99)], baseline) == []
+        found = compare([BenchResult("click", 10.0, 12.0, 5)], baseline)
+        assert len(found) == 2 and "往返次数 4 -> 5" in found[0]
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
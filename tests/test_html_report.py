@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_html_report
+@date: 2026/10/19 22:30
+@desc: 测试 utils/html_report.py 的增量解析、重跑归并与附件处理
+"""
+import json
+
+import pytest
+
+from utils.html_report import IncrementalReport, ReportWatcher
+
+
+def _write_result(results, uuid: str, status: str = "passed", start: int = 1000, history_id: str = None,
+                  attachments: list = None) -> None:
+    result = {
+        "uuid": uuid, "historyId": history_id or uuid, "name": f"test_{uuid}", "fullName": f"t.test_{uuid}",
+        "status": status, "start": start, "stop": start + 1500,
+        "statusDetails": {"message": "<boom>", "trace": "Traceback"} if status != "passed" else {},
+        "steps": [{"name": "点击 <登录>", "status": status, "start": start, "stop": start + 500, "steps": []}],
+        "attachments": attachments or [], "labels": [{"name": "suite", "value": "登录"}],
+    }
+    (results / f"{uuid}-result.json").write_text(json.dumps(result), encoding="utf-8")
+
+
+@pytest.fixture
+def results(tmp_path):
+    path = tmp_path / "results"
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def report(results, tmp_path):
+    return IncrementalReport(results, tmp_path / "html")
+
+
+class TestIncrementalReport:
+
+    def test_incremental_update(self, results, report):
+        """测试每个结果文件只处理一次，新增结果追加到汇总页"""
+        _write_result(results, "a")
+        assert report.update() == 1
+        assert report.update() == 0
+        _write_result(results, "b", "failed", start=2000)
+        assert report.update() == 1
+
+        index = (report.output_dir / "index.html").read_text(encoding="utf-8")
+        assert "passed: 1" in index and "failed: 1" in index
+        assert 'http-equiv="refresh"' in index
+        page = (report.output_dir / "tests" / "b.html").read_text(encoding="utf-8")
+        assert "&lt;boom&gt;" in page and "点击 &lt;登录&gt;" in page
+
+    def test_state_survives_restart(self, results, report):
+        """测试状态文件保存已处理的结果，重新创建构建器后不重复处理"""
+        _write_result(results, "a")
+        report.update()
+        again = IncrementalReport(report.results_dir, report.output_dir)
+        assert again.update() == 0
+        again.reset()
+        assert not report.output_dir.exists()
+
+    def test_partial_file_retried(self, results, report):
+        """测试写入中 (无法解析) 的结果文件下次再处理"""
+        (results / "c-result.json").write_text('{"uuid": "c"', encoding="utf-8")
+        assert report.update() == 0
+        _write_result(results, "c")
+        assert report.update() == 1
+
+    def test_reruns_merged_by_history_id(self, results, report):
+        """测试同一 historyId 的多次执行归并为一行，展示最后一次结果与重跑次数"""
+        _write_result(results, "r1", "broken", start=1000, history_id="h")
+        _write_result(results, "r2", "passed", start=5000, history_id="h")
+        report.update(live=False)
+        (row,) = report._state["tests"].values()
+        assert (row["uuid"], row["status"], row["attempts"]) == ("r2", "passed", 2)
+        assert 'http-equiv="refresh"' not in (report.output_dir / "index.html").read_text(encoding="utf-8")
+
+    def test_attachments_linked(self, results, report):
+        """测试附件放入输出目录，缺失的附件标注而不报错"""
+        (results / "shot-attachment.png").write_bytes(b"png")
+        _write_result(results, "a", attachments=[
+            {"name": "截图", "source": "shot-attachment.png", "type": "image/png"},
+            {"name": "日志", "source": "missing-attachment.txt", "type": "text/plain"},
+        ])
+        report.update()
+        assert (report.output_dir / "attachments" / "shot-attachment.png").read_bytes() == b"png"
+        page = (report.output_dir / "tests" / "a.html").read_text(encoding="utf-8")
+        assert "../attachments/shot-attachment.png" in page and "(缺失)" in page
+
+    def test_watcher_final_update(self, results, report):
+        """测试监听线程退出时执行最后一次更新并关闭自动刷新"""
+        with ReportWatcher(report, interval=0.05):
+            _write_result(results, "a")
+        assert report._state["processed"] == ["a-result.json"]
+        assert "运行结束" in (report.output_dir / "index.html").read_text(encoding="utf-8")
+
+    def test_watch_device_dirs(self, tmp_path, report):
+        """测试多设备模式下切换为监听各设备的结果目录，附件从所在设备目录查找"""
+        devices = [tmp_path / "devices" / udid / "allure" for udid in ("a", "b")]
+        report.watch_dirs(devices)
+        assert report.update() == 0
+        for path in devices:
+            path.mkdir(parents=True)
+        (devices[1] / "shot-attachment.png").write_bytes(b"png")
+        _write_result(devices[0], "x")
+        _write_result(devices[1], "y", attachments=[{"name": "截图", "source": "shot-attachment.png",
+                                                     "type": "image/png"}])
+        assert report.update() == 2
+        assert (report.output_dir / "attachments" / "shot-attachment.png").read_bytes() == b"png"
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
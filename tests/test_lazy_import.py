@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_lazy_import
+@date: 2026/10/20 04:50
+@desc: 测试 utils/lazy_import.py 的延迟加载，以及 conftest / 页面对象导入时不加载 Appium 客户端
+"""
+import sys
+
+import pytest
+
+from benchmarks.bench_import_time import parse_importtime, profile, check
+from utils.lazy_import import lazy_import
+
+
+class TestLazyImport:
+
+    def test_deferred_until_attribute_access(self):
+        """测试首次访问属性时才执行模块代码"""
+        sys.modules.pop("colorsys", None)
+        module = lazy_import("colorsys")
+        assert "colorsys" in sys.modules
+        assert module.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+        assert lazy_import("colorsys") is sys.modules["colorsys"]
+
+    def test_missing_module(self):
+        """测试模块不存在时立即报错"""
+        with pytest.raises(ModuleNotFoundError):
+            lazy_import("no_such_module_for_lazy_import")
+
+
+class TestImportTime:
+
+    def test_parse_importtime(self):
+        """测试解析 -X importtime 输出，同名模块只保留首次导入"""
+        stderr = ("import time: self [us] | cumulative | imported package\n"
+                  "import time:       120 |        120 |   _abc\n"
+                  "import time:      1500 |       1620 | abc\n"
+                  "import time:         5 |          5 | abc\n")
+        assert parse_importtime(stderr) == {"_abc": (120.0, 120.0), "abc": (1500.0, 1620.0)}
+
+    @pytest.mark.parametrize("module", ["conftest", "page_objects.wan_android_home"])
+    def test_appium_not_loaded(self, module):
+        """测试导入 conftest / 页面对象时不加载 Appium 客户端与 selenium 等待模块"""
+        result = profile(module)
+        assert result.forbidden == []
+        assert not [line for line in check([result], budgets={}) if "提前加载" in line]
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
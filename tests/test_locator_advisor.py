@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_locator_advisor
+@date: 2026/10/19 10:40
+@desc: 测试 utils/locator_advisor.py 中的耗时记录、静态扫描与优化建议
+"""
+
+import pytest
+from utils.locator_advisor import LocatorProfiler, scan_page_objects, suggest, build_report, merge_profiles, load_profile
+
+
+class TestLocatorAdvisor:
+
+    def test_profiler_records_success_and_failure(self):
+        """测试耗时累计与失败计数"""
+        profiler = LocatorProfiler()
+        with profiler.track("id", "btn"):
+            pass
+        with pytest.raises(RuntimeError):
+            with profiler.track("id", "btn"):
+                raise RuntimeError("not found")
+
+        record, = profiler.snapshot()
+        assert record["count"] == 2
+        assert record["failures"] == 1
+        assert record["total"] >= record["max"] >= 0
+
+    def test_scan_page_objects(self, tmp_path):
+        """测试从页面类中提取定位符元组并标准化策略"""
+        (tmp_path / "login.py").write_text(
+            "class LoginPage:\n"
+            "    submit = ('aid', '登录')\n"
+            "    title = ('xpath', '//*[@text=\"标题\"]')\n"
+            "    timeout = (1, 2)\n"
+            "    name = ('unknown', 'x')\n",
+            encoding="utf-8"
+        )
+        refs = scan_page_objects(tmp_path)
+        assert [(r.source, r.by) for r in refs] == [("LoginPage.submit", "accessibility id"),
+                                                   ("LoginPage.title", "xpath")]
+
+    @pytest.mark.parametrize("by, value, keyword", [
+        ("xpath", "//*[contains(@text,'登录')]", "XPath contains on //*"),
+        ("xpath", "//*[@text='登录']", "//*"),
+        ("xpath", "//android.widget.Button[2]", "位置索引"),
+        ("-android uiautomator", 'new UiSelector().textContains("项")', "模糊匹配"),
+        ("-android uiautomator", 'new UiSelector().text("项目")', "resource-id"),
+        ("class name", "android.widget.TextView", "类名"),
+    ])
+    def test_suggest(self, by, value, keyword):
+        """测试慢策略的优化建议"""
+        assert keyword in suggest(by, value)
+
+    def test_fast_strategy_has_no_suggestion(self):
+        """测试 id 定位仅在等待耗时过长时提示"""
+        assert suggest("id", "com.app:id/btn", mean=0.1) == ""
+        assert "等待" in suggest("id", "com.app:id/btn", mean=3)
+
+    def test_build_report_ranks_by_total(self):
+        """测试排行按总耗时降序且关联页面来源"""
+        profile = [
+            {"by": "id", "value": "a", "count": 10, "total": 1.0, "max": 0.2, "failures": 0},
+            {"by": "xpath", "value": "//*[@text='b']", "count": 2, "total": 4.0, "max": 3.0, "failures": 1},
+        ]
+        rows = build_report(profile, [])
+        assert [r["value"] for r in rows] == ["//*[@text='b']", "a"]
+        assert rows[0]["source"] == "运行时"
+        assert rows[0]["mean"] == pytest.approx(2.0)
+
+    def test_merge_worker_profiles(self, tmp_path):
+        """测试合并多个工作进程的定位耗时：次数与总耗时累加，最大耗时取最大值，缺失的文件忽略"""
+        files = []
+        for index, (total, peak) in enumerate([(1.0, 0.6), (2.0, 1.5)]):
+            profiler = LocatorProfiler()
+            profiler.record("id", "btn", total - peak)
+            profiler.record("id", "btn", peak, found=index == 0)
+            files.append(profiler.dump(tmp_path / f"w{index}.json"))
+        dest = merge_profiles([*files, tmp_path / "missing.json"], tmp_path / "profile.json")
+        (record,) = load_profile(dest)
+        assert (record["count"], record["failures"], record["max"]) == (4, 1, 1.5)
+        assert record["total"] == pytest.approx(3.0)
+        assert not list(tmp_path.glob("*.tmp"))
+        assert merge_profiles([tmp_path / "missing.json"], tmp_path / "none.json") is None
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_log_archive
+@date: 2026/10/20 00:30
+@desc: 测试 utils/log_archive.py 的压缩归档、索引提取、数量清理与检索
+"""
+import gzip
+import json
+
+import pytest
+
+from utils.log_archive import LogArchive
+
+TEXT_LOG = """2026-10-19 08:00:00 INFO  [root] conftest.pytest_configure:90  - 运行 ID: 20261019_080000_abc123
+2026-10-19 08:00:01 INFO  [pytest] conftest.pytest_runtest_protocol:110  - 开始执行用例: test_cases/test_a.py::TestA::test_login
+2026-10-19 08:00:05 ERROR [pytest] conftest.pytest_runtest_makereport:250  - NoSuchElementException: 登录按钮
+"""
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return LogArchive(tmp_path / "backups", keep=2)
+
+
+def _archive(archive, tmp_path, content: str) -> str:
+    source = tmp_path / "pytest.log"
+    source.write_text(content, encoding="utf-8")
+    raw = archive.archive(source, background=False)
+    return raw.name + ".gz"
+
+
+class TestLogArchive:
+
+    def test_compress_and_index(self, archive, tmp_path):
+        """测试归档后原始日志被压缩，索引包含运行 ID、时间范围与用例"""
+        name = _archive(archive, tmp_path, TEXT_LOG)
+        assert not (tmp_path / "pytest.log").exists()
+        with gzip.open(archive.backup_dir / name, "rt", encoding="utf-8") as f:
+            assert f.read() == TEXT_LOG
+        (entry,) = archive.load_index()
+        assert entry["run_id"] == "20261019_080000_abc123"
+        assert (entry["start"], entry["end"]) == ("2026-10-19 08:00:00", "2026-10-19 08:00:05")
+        assert entry["tests"] == ["test_cases/test_a.py::TestA::test_login"]
+
+    def test_json_log_index(self, archive, tmp_path):
+        """测试 JSON 日志从 session / test 字段建立索引"""
+        line = {"time": "2026-10-19 09:00:00", "message": "点击", "session": "run-2", "test": "t.py::test_b"}
+        _archive(archive, tmp_path, json.dumps(line, ensure_ascii=False) + "\n")
+        (entry,) = archive.select(run_id="run")
+        assert entry["tests"] == ["t.py::test_b"]
+
+    def test_search_uses_index(self, archive, tmp_path):
+        """测试检索只扫描索引命中的归档"""
+        _archive(archive, tmp_path, TEXT_LOG)
+        (archive.backup_dir / "pytest_20991231_000000.log").write_text(
+            "2099-12-31 00:00:00 ERROR NoSuchElementException: other\n", encoding="utf-8")
+        archive.compress_pending()
+
+        assert len(list(archive.search("NoSuchElement"))) == 2
+        hits = list(archive.search("nosuchelement", ignore_case=True, test="test_login"))
+        assert [(lineno, line.endswith("登录按钮")) for _, lineno, line in hits] == [(3, True)]
+        assert list(archive.search("NoSuchElement", since="2099-01-01"))[0][0] == "pytest_20991231_000000.log.gz"
+
+    def test_until_inclusive(self, archive, tmp_path):
+        """测试只有日期的 until 包含当天的归档"""
+        _archive(archive, tmp_path, TEXT_LOG)
+        assert len(archive.select(until="2026-10-19")) == 1
+        assert len(archive.select(until="2026-10-19 08:00")) == 1
+        assert archive.select(until="2026-10-18") == []
+
+    def test_keep_limit(self, archive):
+        """测试超出保留数量时删除最旧的归档并同步索引"""
+        archive.backup_dir.mkdir(parents=True)
+        for day in ("01", "02", "03"):
+            (archive.backup_dir / f"pytest_202610{day}_000000.log").write_text(f"2026-10-{day} 00:00:00 x\n")
+        assert archive.compress_pending() == 3
+        assert sorted(e["file"] for e in archive.load_index()) == [
+            "pytest_20261002_000000.log.gz", "pytest_20261003_000000.log.gz"]
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_logger
+@date: 2026/10/19 23:55
+@desc: 测试 utils/logger.py 的限流过滤器、JSON 格式与异步写盘
+"""
+import json
+import logging
+
+import pytest
+
+import utils.logger as log_module
+from core.settings import LOG_RATE_LIMITED_LOGGERS
+from utils.logger import (RateLimitFilter, JsonFormatter, ContextFilter, log_context, step_var, test_var,
+                          setup_async_logging, stop_async_logging, rate_limit)
+
+
+def _record(msg: str = "msg", level: int = logging.INFO, lineno: int = 10) -> logging.LogRecord:
+    return logging.LogRecord("core.driver", level, "driver.py", lineno, msg, None, None)
+
+
+class TestRateLimitFilter:
+
+    def test_burst_then_suppress(self):
+        """测试超过突发容量后同一位置的日志被抑制，其它位置与 WARNING 不受影响"""
+        limiter = RateLimitFilter(rate=0, burst=3)
+        assert [limiter.filter(_record()) for _ in range(5)] == [True, True, True, False, False]
+        assert limiter.filter(_record(lineno=11))
+        assert limiter.filter(_record(level=logging.WARNING))
+
+    def test_suppressed_count_attached(self, monkeypatch):
+        """测试令牌恢复后放行的日志附带被抑制的条数"""
+        clock = iter([0.0, 0.0, 0.1, 10.0])
+        monkeypatch.setattr(log_module.time, "monotonic", lambda: next(clock))
+        limiter = RateLimitFilter(rate=1, burst=1)
+        limiter.filter(_record())
+        assert not limiter.filter(_record())
+        assert not limiter.filter(_record())
+        record = _record("等待元素")
+        assert limiter.filter(record)
+        assert record.getMessage() == "等待元素 (已抑制此处 2 条日志)"
+
+    def test_only_wait_loggers_limited(self, caplog):
+        """测试只对等待 / 轮询子日志器限流，core.driver 的点击等步骤日志全部保留"""
+        rate_limit(*LOG_RATE_LIMITED_LOGGERS, rate=0, burst=1)
+        try:
+            with caplog.at_level(logging.INFO):
+                for _ in range(3):
+                    logging.getLogger("core.driver").info("点击")
+                    logging.getLogger("core.driver.wait").info("执行显式等待")
+        finally:
+            rate_limit(*LOG_RATE_LIMITED_LOGGERS)
+        messages = [record.getMessage() for record in caplog.records]
+        assert messages.count("点击") == 3 and messages.count("执行显式等待") == 1
+
+
+class TestStructuredLogging:
+
+    def test_json_contains_context(self):
+        """测试 JSON 日志包含用例与步骤字段"""
+        record = _record("点击")
+        with log_context(test_var, "t::a"), log_context(step_var, "登录"):
+            ContextFilter().filter(record)
+        data = json.loads(JsonFormatter().format(record))
+        assert (data["message"], data["test"], data["step"]) == ("点击", "t::a", "登录")
+        assert step_var.get() == ""
+
+    def test_async_file_output(self, tmp_path, monkeypatch):
+        """测试日志经后台线程写入文件，stop 后内容完整"""
+        monkeypatch.setattr(log_module, "_listener", None)
+        monkeypatch.setattr(log_module, "_queue_handler", None)
+        path = tmp_path / "run.log"
+        setup_async_logging(path, fmt="json")
+        try:
+            logging.getLogger("test_logger").info("异步写入")
+        finally:
+            stop_async_logging()
+        lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert any(line["message"] == "异步写入" for line in lines)
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_navigator
+@date: 2026/10/19 20:10
+@desc: 测试 core/navigator.py 中导航图的注册、最短路径、耗时更新与路径执行
+"""
+import pytest
+
+from core.base_page import BasePage
+from core.navigator import Navigator, transition, merge_costs, ANY_PAGE, DEFAULT_COST
+
+
+class FakeRemote:
+    """以 screen 表示当前页面的 webdriver.Remote 替身"""
+
+    def __init__(self, screen: str):
+        self.screen = screen
+        self.capabilities = {"platformName": "Android", "appPackage": "com.app"}
+
+    def execute_script(self, script: str, params: dict) -> None:
+        self.screen = "home"
+
+
+class NavPage(BasePage, register=False):
+    def is_visible(self, by: str, value: str) -> bool:
+        return self.driver.screen == value
+
+    def wait_until_visible(self, by: str, value: str, timeout=None) -> bool:
+        return self.is_visible(by, value)
+
+
+class NavHome(NavPage, register=False):
+    activity = ".Main"
+    identity = ("id", "home")
+
+    @transition(target="NavSettings")
+    def open_settings(self):
+        self.driver.screen = "settings"
+
+
+class NavList(NavPage, register=False):
+    identity = ("id", "list")
+
+    @transition(source=NavHome)
+    def open_list(self):
+        self.driver.screen = "list"
+
+
+class NavDetail(NavPage, register=False):
+    identity = ("id", "detail")
+
+    @transition(source="NavList")
+    def open_detail(self):
+        self.driver.screen = "detail"
+
+    @transition(source="NavSettings")
+    def open_from_settings(self):
+        self.driver.screen = "detail"
+
+
+class NavSettings(NavPage, register=False):
+    identity = ("id", "settings")
+
+    @transition(target="NavList")
+    def broken_link(self):
+        """点击后停留在当前页面"""
+
+
+@pytest.fixture
+def graph(tmp_path) -> Navigator:
+    nav = Navigator(tmp_path / "nav_costs.json")
+    for page in (NavHome, NavList, NavDetail, NavSettings):
+        nav.register(page)
+    return nav
+
+
+class TestNavigator:
+
+    def test_register_edges(self, graph):
+        """测试 @transition 的 source / target 缺省为所在页面，声明 activity 的页面生成直达边"""
+        assert {e.key for e in graph.edges["NavHome"]} == {"NavHome->NavSettings:open_settings",
+                                                          "NavHome->NavList:open_list"}
+        assert [e.key for e in graph.edges[ANY_PAGE]] == ["*->NavHome:jump"]
+
+    def test_shortest_path_uses_measured_costs(self, graph):
+        """测试按实测耗时选择路径"""
+        path = graph.shortest_path("NavHome", "NavDetail")
+        assert [e.method for e in path] == ["open_settings", "open_from_settings"]
+
+        graph.record(path[0], 30.0)
+        assert [e.method for e in graph.shortest_path("NavHome", "NavDetail")] == ["open_list", "open_detail"]
+        assert graph.estimate("NavHome", "NavDetail") == 2 * DEFAULT_COST
+
+    def test_unknown_source_starts_with_jump(self, graph):
+        """测试当前页面未知时从直达边出发，不可达时返回 None"""
+        path = graph.shortest_path(None, "NavList")
+        assert [e.key for e in path] == ["*->NavHome:jump", "NavHome->NavList:open_list"]
+        assert graph.shortest_path("NavList", "Missing") is None
+
+    def test_cost_ema_and_dump(self, graph):
+        """测试耗时指数移动平均与持久化"""
+        edge = graph.edges["NavList"][0]
+        graph.record(edge, 1.0)
+        graph.record(edge, 2.0)
+        assert graph.cost(edge) == pytest.approx(1.3)
+        graph.dump()
+        assert Navigator(graph.costs_path).cost(edge) == pytest.approx(1.3)
+
+    def test_merge_worker_costs(self, tmp_path):
+        """测试合并工作进程的跳转耗时：只取本次实测过 (与历史值不同) 的跳转，多个进程实测过的取平均"""
+        dest = tmp_path / "nav_costs.json"
+        dest.write_text('{"a": 1.0, "b": 2.0}', encoding="utf-8")
+        (tmp_path / "w0.json").write_text('{"a": 1.0, "b": 3.0}', encoding="utf-8")
+        (tmp_path / "w1.json").write_text('{"a": 1.0, "b": 5.0, "c": 7.0}', encoding="utf-8")
+        merge_costs([tmp_path / "w0.json", tmp_path / "w1.json", tmp_path / "missing.json"], dest)
+        assert Navigator(dest).costs == {"a": 1.0, "b": 4.0, "c": 7.0}
+        assert merge_costs([tmp_path / "missing.json"], dest) is None
+
+    def test_dump_skipped_without_measurement(self, graph):
+        """测试只读取过历史耗时、本次未实测时不回写文件"""
+        graph.costs_path.write_text('{"*->NavHome:jump": 1.0}', encoding="utf-8")
+        assert graph.cost(graph.edges[ANY_PAGE][0]) == 1.0
+        assert graph.dump() is None
+
+    def test_test_pages_not_registered_globally(self):
+        """测试 register=False 的页面不进入全局导航图"""
+        from core.navigator import navigator
+        assert not {"NavPage", "NavHome", "NavList", "NavDetail", "NavSettings"} & set(navigator.pages)
+
+    def test_navigate_to(self, graph):
+        """测试识别当前页面并执行路径，每一步确认到达并记录耗时"""
+        remote = FakeRemote("settings")
+        page = graph.navigate_to(remote, NavDetail)
+        assert isinstance(page, NavDetail)
+        assert remote.screen == "detail"
+        assert "NavSettings->NavDetail:open_from_settings" in graph.costs
+
+    def test_plan_order_minimizes_navigation(self, graph):
+        """测试贪心排序：优先选择从上一个用例结束页面出发代价最小的用例，代价相同时保持原顺序"""
+        stops = [("NavDetail", "NavDetail"), ("NavHome", "NavList"), (None, None), ("NavList", "NavDetail")]
+        # 未声明页面的用例代价为 0 优先执行；之后从未知页面出发 NavHome 最近，再依次衔接 NavList -> NavDetail
+        assert graph.plan_order(stops) == [2, 1, 3, 0]
+        assert graph.plan_order(stops, start="NavDetail")[:2] == [0, 2]
+
+    def test_navigate_to_fails_when_not_arrived(self, graph):
+        """测试跳转后未到达目标页面时抛出异常"""
+        with pytest.raises(RuntimeError):
+            graph.navigate_to(FakeRemote("settings"), NavList)
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_page_generator
+@date: 2026/10/19 12:10
+@desc: 测试 utils/ui_hierarchy.py 本地定位求值与 utils/page_generator.py 定位策略选择
+"""
+
+import pytest
+from utils.ui_hierarchy import UiHierarchy
+from utils.page_generator import choose_locator, collect_locators, generate_page
+
+PAGE_SOURCE = """<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>
+<hierarchy index="0" rotation="0">
+  <android.widget.FrameLayout index="0" class="android.widget.FrameLayout" clickable="false">
+    <android.widget.EditText index="0" class="android.widget.EditText" text="账号"
+        resource-id="com.demo:id/etAccount" clickable="true" content-desc="" />
+    <android.widget.Button index="1" class="android.widget.Button" text="登录"
+        resource-id="" clickable="true" content-desc="登录" />
+    <android.widget.TextView index="2" class="android.widget.TextView" text="项目"
+        resource-id="com.demo:id/tab" clickable="true" content-desc="" />
+    <android.widget.TextView index="3" class="android.widget.TextView" text="体系"
+        resource-id="com.demo:id/tab" clickable="true" content-desc="" />
+    <android.widget.ImageView index="4" class="android.widget.ImageView" text=""
+        resource-id="" clickable="true" content-desc="" />
+    <android.widget.ImageView index="5" class="android.widget.ImageView" text=""
+        resource-id="" clickable="true" content-desc="" />
+  </android.widget.FrameLayout>
+</hierarchy>
+"""
+
+
+@pytest.fixture
+def tree():
+    return UiHierarchy.from_string(PAGE_SOURCE)
+
+
+class TestUiHierarchy:
+
+    @pytest.mark.parametrize("by, value, count", [
+        ("id", "com.demo:id/tab", 2),
+        ("id", "etAccount", 1),
+        ("aid", "登录", 1),
+        ("class", "android.widget.ImageView", 2),
+        ("uiautomator", 'new UiSelector().text("项目")', 1),
+        ("uiautomator", 'new UiSelector().resourceId("com.demo:id/tab").instance(1)', 1),
+        ("uiautomator", 'new UiSelector().textContains("系")', 1),
+        ("xpath", "//*[@text='体系']", 1),
+        ("xpath", "//*[contains(@resource-id, 'tab')]", 2),
+        ("xpath", "/hierarchy/android.widget.FrameLayout/android.widget.ImageView[2]", 1),
+        ("xpath", "//android.widget.TextView[@clickable='true' and @text='项目']", 1),
+    ])
+    def test_find(self, tree, by, value, count):
+        """测试常用定位策略的本地求值"""
+        assert tree.count(by, value) == count
+
+    def test_unsupported_strategy(self, tree):
+        """测试不支持本地求值的策略"""
+        with pytest.raises(ValueError):
+            tree.find("css", "div")
+
+
+class TestPageGenerator:
+
+    def test_strategy_priority(self, tree):
+        """测试按 resource-id → accessibility id → UiSelector → XPath 的顺序选择唯一定位"""
+        account, login, project, system, img1, img2 = [n for n in tree.nodes()][1:]
+        assert choose_locator(tree, account) == ("id", "com.demo:id/etAccount")
+        assert choose_locator(tree, login) == ("accessibility id", "登录")
+        assert choose_locator(tree, project) == ("-android uiautomator", 'new UiSelector().text("项目")')
+        by, value = choose_locator(tree, img2)
+        assert by == "xpath" and tree.find(by, value) == [img2]
+
+    def test_generated_locators_are_unique(self, tree):
+        """测试生成的每个定位符在层级树中唯一"""
+        locators = collect_locators(tree)
+        assert len(locators) == 6
+        assert len({loc.name for loc in locators}) == 6
+        assert all(tree.is_unique(loc.by, loc.value) for loc in locators)
+
+    def test_generated_code_compiles(self):
+        """测试生成的源码可编译且继承 BasePage"""
+        code = generate_page(PAGE_SOURCE, "DemoPage")
+        compile(code, "demo_page.py", "exec")
+        assert "class DemoPage(BasePage):" in code
+        assert "et_account = ('id', 'com.demo:id/etAccount')" in code
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
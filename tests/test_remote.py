@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_remote
+@date: 2026/10/19 21:50
+@desc: 测试 core/remote.py 与 CoreDriver 的会话恢复、连接重试和保活 (基于本地最小 W3C 服务)
+"""
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from selenium.common import InvalidSessionIdException
+
+import core.driver
+from core.driver import CoreDriver
+
+CAPS = {"platformName": "Android", "automationName": "uiautomator2", "appPackage": "com.app"}
+
+
+class MiniServer(ThreadingHTTPServer):
+    """仅实现创建会话、删除会话与查询超时的 W3C 服务"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.sessions: set[str] = set()
+        self.fail_new_sessions = 0
+        self.commands: list[str] = []
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: MiniServer
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _reply(self, status: int, value) -> None:
+        body = json.dumps({"value": value}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method: str) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        parts = self.path.strip("/").split("/")
+        self.server.commands.append(f"{method} /{'/'.join(parts[2:])}")
+        if method == "POST" and parts == ["session"]:
+            if self.server.fail_new_sessions:
+                self.server.fail_new_sessions -= 1
+                return self._reply(500, {"error": "session not created", "message": "device busy", "stacktrace": ""})
+            session_id = uuid.uuid4().hex
+            self.server.sessions.add(session_id)
+            return self._reply(200, {"sessionId": session_id, "capabilities": CAPS})
+        if len(parts) < 2 or parts[1] not in self.server.sessions:
+            return self._reply(404, {"error": "invalid session id", "message": "gone", "stacktrace": ""})
+        if method == "DELETE" and len(parts) == 2:
+            self.server.sessions.discard(parts[1])
+        return self._reply(200, {"implicit": 0, "pageLoad": 300000, "script": 30000})
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+    def do_DELETE(self) -> None:
+        self._handle("DELETE")
+
+
+@pytest.fixture
+def server():
+    srv = MiniServer()
+    threading.Thread(target=srv.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield srv
+    srv.shutdown()
+
+
+@pytest.fixture
+def core_driver(server):
+    helper = CoreDriver().server_config(port=server.server_address[1])
+    yield helper
+    helper.quit()
+
+
+class TestSessionRecovery:
+
+    def test_recover_and_replay(self, server, core_driver):
+        """测试会话被服务端回收后自动在同一 driver 对象上重建会话，并重放命令"""
+        remote = core_driver.connect("android", CAPS, backoff=0).driver
+        old_session = remote.session_id
+        server.sessions.clear()
+
+        assert remote.timeouts.implicit_wait == 0
+        assert core_driver.driver is remote
+        assert remote.session_id != old_session
+        assert remote.session_id in server.sessions
+
+    def test_health_check_does_not_recover(self, server, core_driver):
+        """测试健康检查不触发自动恢复：会话失效时返回 False，重建会话由调用方负责"""
+        remote = core_driver.connect("android", CAPS, backoff=0).driver
+        old_session = remote.session_id
+        server.sessions.clear()
+
+        assert not core_driver.is_healthy()
+        assert remote.session_id == old_session and not server.sessions
+        # 探测结束后恢复正常的自动恢复行为
+        assert remote.timeouts.implicit_wait == 0
+        assert remote.session_id in server.sessions
+
+    def test_element_command_not_replayed(self, server, core_driver):
+        """测试依赖旧元素引用的命令在会话恢复后不重放，仍抛出异常"""
+        remote = core_driver.connect("android", CAPS, backoff=0).driver
+        server.sessions.clear()
+        with pytest.raises(InvalidSessionIdException):
+            remote.execute("getElementText", {"id": "element-1"})
+        assert remote.session_id in server.sessions
+
+    def test_connect_retries_with_backoff(self, server, core_driver):
+        """测试创建会话失败时按次数重试，全部失败时抛出 ConnectionError"""
+        server.fail_new_sessions = 2
+        core_driver.connect("android", CAPS, retries=3, backoff=0)
+        assert core_driver.is_healthy()
+
+        server.fail_new_sessions = 5
+        with pytest.raises(ConnectionError):
+            CoreDriver().server_config(port=server.server_address[1]).connect("android", CAPS, retries=2, backoff=0)
+
+    def test_command_hooks(self, server, core_driver):
+        """测试命令钩子收到命令名、耗时与异常"""
+        remote = core_driver.connect("android", CAPS, backoff=0).driver
+        seen = []
+        remote.command_hooks.append(lambda cmd, params, start, cost, error: seen.append((cmd, error is None)))
+        _ = remote.timeouts
+        assert seen == [("getTimeouts", True)]
+
+    def test_keepalive_pings_when_idle(self, server, monkeypatch):
+        """测试保活线程在 driver 空闲时发送 ping，quit 后停止"""
+        monkeypatch.setattr(core.driver, "KEEPALIVE_INTERVAL", 0.2)
+        helper = CoreDriver().server_config(port=server.server_address[1]).connect("android", CAPS, backoff=0)
+        time.sleep(0.7)
+        helper.quit()
+        pings = [c for c in server.commands if c.endswith("/timeouts")]
+        assert len(pings) >= 2
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_result_merger
+@date: 2026/10/19 23:35
+@desc: 测试 utils/result_merger.py 的多目录合并、重跑去重、附件复制与 history 携带
+"""
+import json
+
+import pytest
+
+from utils.result_merger import merge_results, carry_history
+
+
+def _result(directory, uuid: str, history_id: str, stop: int, attachment: str = None) -> None:
+    step = {"name": "step", "attachments": [{"source": attachment}] if attachment else []}
+    data = {"uuid": uuid, "historyId": history_id, "status": "passed", "start": stop - 10, "stop": stop,
+            "steps": [step]}
+    (directory / f"{uuid}-result.json").write_text(json.dumps(data), encoding="utf-8")
+    if attachment:
+        (directory / attachment).write_bytes(uuid.encode())
+
+
+@pytest.fixture
+def shards(tmp_path):
+    a, b = tmp_path / "a", tmp_path / "b"
+    a.mkdir(), b.mkdir()
+    return a, b
+
+
+class TestResultMerger:
+
+    def test_merge_dedupes_reruns(self, shards, tmp_path):
+        """测试同一 historyId 只保留最后一次执行，被丢弃执行的附件不复制"""
+        a, b = shards
+        _result(a, "r1", "h1", stop=100, attachment="r1-attachment.png")
+        _result(b, "r2", "h1", stop=200, attachment="r2-attachment.png")
+        _result(b, "r3", "h2", stop=150)
+        (a / "c1-container.json").write_text("{}")
+        dest = tmp_path / "merged"
+
+        stats = merge_results([a, b, tmp_path / "missing"], dest, history_from=None)
+
+        assert (stats.results, stats.duplicates, stats.attachments, stats.containers) == (2, 1, 1, 1)
+        assert sorted(p.name for p in dest.iterdir()) == [
+            "c1-container.json", "r2-attachment.png", "r2-result.json", "r3-result.json"]
+
+    def test_environment_merged(self, shards, tmp_path):
+        """测试各目录的 environment.properties 合并为一份"""
+        a, b = shards
+        (a / "environment.properties").write_text("platform=android\nudid=a\n")
+        (b / "environment.properties").write_text("udid=b\nversion=1.0\n")
+        merge_results([a, b], tmp_path / "merged", history_from=None)
+        content = (tmp_path / "merged" / "environment.properties").read_text()
+        assert content.splitlines() == ["platform=android", "udid=b", "version=1.0"]
+
+    def test_unreadable_result_skipped(self, shards, tmp_path):
+        """测试无法解析的结果文件被跳过并记录"""
+        a, _ = shards
+        (a / "bad-result.json").write_text("{")
+        stats = merge_results([a], tmp_path / "merged", history_from=None)
+        assert stats.results == 0 and len(stats.skipped) == 1
+
+    def test_history_carried(self, shards, tmp_path):
+        """测试上一份报告的 history 被复制到合并结果中"""
+        report = tmp_path / "report"
+        (report / "history").mkdir(parents=True)
+        (report / "history" / "history-trend.json").write_text("[]")
+        stats = merge_results(shards, tmp_path / "merged", history_from=report)
+        assert stats.history == 1
+        assert (tmp_path / "merged" / "history" / "history-trend.json").exists()
+        assert carry_history(tmp_path / "no_report", tmp_path / "merged") == 0
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_run_history
+@date: 2026/10/19 17:40
+@desc: 测试 utils/run_history.py 的记录写入、耗时统计、退化检测与用例排序
+"""
+
+import pytest
+from utils.run_history import RunHistory, percentile
+
+
+def _record(call: float, outcome: str = "passed", finished_at: float = 0.0) -> dict:
+    return {"setup": 0.5, "call": call, "teardown": 0.5, "outcome": outcome, "reruns": 0, "finished_at": finished_at}
+
+
+@pytest.fixture
+def history(tmp_path):
+    return RunHistory(tmp_path / "history.db")
+
+
+class TestPercentile:
+
+    def test_nearest_rank(self):
+        """测试最近秩法百分位"""
+        values = [5, 1, 4, 2, 3]
+        assert percentile(values, 50) == 3
+        assert percentile(values, 95) == 5
+        assert percentile([], 50) == 0.0
+
+
+class TestRunHistory:
+
+    def test_empty_database(self, history):
+        """测试数据库不存在时查询返回空结果且不创建文件"""
+        assert history.durations() == {}
+        assert history.last_failures() == {}
+        assert not history.path.exists()
+
+    def test_durations_use_recent_median(self, history):
+        """测试耗时取最近 N 次 (含 setup/teardown) 的中位数"""
+        for i, call in enumerate([100.0, 1.0, 2.0, 3.0]):
+            history.record_run({"t::a": _record(call, finished_at=i)}, "dev", "1.0", "android", started_at=i)
+        assert history.durations(last=3) == {"t::a": 3.0}
+        assert history.durations(device="other") == {}
+
+    def test_trends_fail_rate(self, history):
+        """测试趋势统计中的失败率与最近结果"""
+        for i, outcome in enumerate(["passed", "failed", "passed", "failed"]):
+            history.record_run({"t::a": _record(1.0, outcome, i)}, "dev", "1.0", "android", started_at=i)
+        (stats,) = history.trends()
+        assert stats["runs"] == 4
+        assert stats["fail_rate"] == 0.5
+        assert stats["last_outcome"] == "failed"
+
+    def test_regressions(self, history):
+        """测试最近窗口的 p50 明显变慢时被识别为退化，耗时稳定的用例不报告"""
+        for i in range(4):
+            call = 1.0 if i < 2 else 5.0
+            history.record_run({"t::slow": _record(call, finished_at=i), "t::stable": _record(1.0, finished_at=i)},
+                               "dev", "1.0", "android", started_at=i)
+        (found,) = history.regressions(window=2)
+        assert found["nodeid"] == "t::slow"
+        assert found["before"] == 2.0 and found["after"] == 6.0
+
+    def test_flaky(self, history):
+        """测试发生过重跑的用例计入不稳定统计"""
+        for i, reruns in enumerate([0, 1, 0, 2]):
+            history.record_run({"t::a": {**_record(1.0, finished_at=i), "reruns": reruns}, "t::b": _record(1.0)},
+                               "dev", "1.0", "android", started_at=i)
+        (stats,) = history.flaky()
+        assert stats["nodeid"] == "t::a"
+        assert (stats["flaky_runs"], stats["reruns"], stats["flaky_rate"]) == (2, 3, 0.5)
+
+    def test_order(self, history):
+        """测试按最慢优先与最近失败优先排序"""
+        history.record_run({"a": _record(1.0, "failed", 2), "b": _record(9.0, finished_at=2)},
+                           "dev", "1.0", "android", started_at=0)
+        assert history.order(["a", "b", "c"], "slowest") == ["b", "a", "c"]
+        assert history.order(["c", "b", "a"], "failed") == ["a", "b", "c"]
+        with pytest.raises(ValueError):
+            history.order(["a"], "random")
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
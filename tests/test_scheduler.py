@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_scheduler
+@date: 2026/10/19 16:30
+@desc: 测试 utils/scheduler.py 中 WorkQueue 的派发顺序、执行次数与设备掉线回收逻辑，以及 QueueRunner 的执行循环
+"""
+from types import SimpleNamespace
+
+import pytest
+from utils.scheduler import WorkQueue, SchedulerServer, QueueRunner, RUN, WAIT, STOP
+
+
+class TestWorkQueue:
+
+    def test_longest_first_with_default_for_unknown(self):
+        """测试按历史耗时降序派发，无历史的用例按平均值估计"""
+        queue = WorkQueue(["a", "b", "c", "d"], {"a": 1.0, "b": 9.0, "c": 3.0})
+        order = [queue.take("w")[1] for _ in range(4)]
+        # 平均值 13/3 ≈ 4.3，d 排在 b 之后
+        assert order == ["b", "d", "c", "a"]
+
+    def test_wait_while_other_worker_busy(self):
+        """测试队列为空但其他设备仍在执行时返回 WAIT，全部完成后返回 STOP"""
+        queue = WorkQueue(["a"])
+        assert queue.take("w1") == (RUN, "a")
+        assert queue.start("w1", "a")
+        assert queue.take("w2") == (WAIT, None)
+        queue.done("w1", "a")
+        assert queue.take("w2") == (STOP, None)
+
+    def test_retire_requeues_in_flight(self):
+        """测试设备退出时执行中的用例按原顺序放回队首"""
+        queue = WorkQueue(["a", "b", "c"])
+        queue.take("w1")
+        queue.take("w1")
+        assert queue.retire("w1") == ["a", "b"]
+        assert [queue.take("w2")[1] for _ in range(3)] == ["a", "b", "c"]
+
+    def test_retire_respects_max_attempts(self):
+        """测试超过最大派发次数的用例不再重新排队"""
+        queue = WorkQueue(["a"], max_attempts=2)
+        for worker in ("w1", "w2"):
+            assert queue.take(worker) == (RUN, "a")
+            assert queue.start(worker, "a")
+            queue.retire(worker)
+        assert queue.take("w3") == (STOP, None)
+        assert queue.unfinished() == ["a"]
+
+    def test_attempt_counted_on_start(self):
+        """测试预留而未开始执行的用例在设备退出时重新排队，不计入执行次数"""
+        queue = WorkQueue(["a", "b"], max_attempts=1)
+        queue.take("w1")
+        queue.start("w1", "a")
+        queue.take("w1")
+        assert queue.retire("w1") == ["b"]
+        assert queue.take("w2") == (RUN, "b")
+        assert queue.unfinished() == ["a", "b"]
+
+    def test_idle_worker_steals_reserved(self):
+        """测试队列为空时空闲设备接管其他设备预留而未开始的用例，原设备不再执行"""
+        queue = WorkQueue(["a", "b"])
+        queue.take("w1")
+        queue.start("w1", "a")
+        queue.take("w1")
+        assert queue.take("w2") == (RUN, "b")
+        assert queue.start("w2", "b")
+        assert not queue.start("w1", "b")
+        assert queue.take("w3") == (WAIT, None)
+
+
+@pytest.fixture
+def server():
+    server = SchedulerServer(WorkQueue(["a", "b", "c"])).start()
+    yield server
+    server.stop()
+
+
+def _session(nodeids: list[str], protocol) -> SimpleNamespace:
+    torn_down = []
+    config = SimpleNamespace(option=SimpleNamespace(collectonly=False),
+                             hook=SimpleNamespace(pytest_runtest_protocol=protocol))
+    return SimpleNamespace(config=config, shouldfail=False, shouldstop=False, torn_down=torn_down,
+                           items=[SimpleNamespace(nodeid=n, config=config) for n in nodeids],
+                           _setupstate=SimpleNamespace(teardown_exact=torn_down.append))
+
+
+class TestQueueRunner:
+
+    def test_runs_queue_with_prefetched_nextitem(self, server):
+        """测试按队列顺序执行，预取的下一个用例作为 nextitem 传入，每个用例只计一次执行"""
+        calls = []
+        session = _session(["a", "b", "c"], lambda item, nextitem: calls.append(
+            (item.nodeid, nextitem and nextitem.nodeid)))
+        runner = QueueRunner(server.address, server.authkey, "w1")
+        assert runner.pytest_runtestloop(session) is True
+        assert calls == [("a", "b"), ("b", "c"), ("c", None)]
+        assert server.queue._attempts == {"a": 1, "b": 1, "c": 1}
+        assert server.queue.unfinished() == [] and session.torn_down == []
+
+    def test_prefetched_item_stolen(self, server):
+        """测试预取的用例被其他设备接管后跳过，并拆除为其保留的 fixture"""
+        calls = []
+
+        def protocol(item, nextitem):
+            calls.append((item.nodeid, nextitem and nextitem.nodeid))
+            if item.nodeid == "a":
+                # 执行 a 期间，队列已空，空闲设备 w2 接管预取的 b；随后 c 被回收重新排队
+                assert server.queue.take("w2") == (RUN, "b")
+                server.queue.start("w2", "b")
+                server.queue.done("w2", "b")
+                server.queue._pending.append("c")
+
+        session = _session(["a", "b", "c"], protocol)
+        server.queue._pending.clear()
+        server.queue._pending.extend(["a", "b"])
+        runner = QueueRunner(server.address, server.authkey, "w1")
+        runner.pytest_runtestloop(session)
+        assert calls == [("a", "b"), ("c", None)]
+        assert [item.nodeid for item in session.torn_down] == ["c"]
+        assert server.queue._attempts == {"a": 1, "b": 1, "c": 1}
+
+    def test_collect_only(self, server):
+        """测试仅收集时不接管执行循环"""
+        session = _session([], None)
+        session.config.option.collectonly = True
+        assert QueueRunner(server.address, server.authkey, "w1").pytest_runtestloop(session) is None
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
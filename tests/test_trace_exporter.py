@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: test_trace_exporter
+@date: 2026/10/20 01:10
+@desc: 测试 utils/trace_exporter.py 的时间片记录、allure.step / StepTracer 接入、截图事件与文件合并
+"""
+import json
+
+import allure
+import pytest
+
+from utils.decorators import StepTracer
+from utils.trace_exporter import TraceRecorder, trace_recorder, merge_traces
+
+
+@pytest.fixture
+def recorder():
+    trace_recorder.start("emulator-5554")
+    yield trace_recorder
+    trace_recorder.stop()
+
+
+def _spans(recorder: TraceRecorder, cat: str) -> list[dict]:
+    return [e for e in recorder.events() if e.get("cat") == cat]
+
+
+class TestTraceRecorder:
+
+    def test_disabled_records_nothing(self):
+        """测试未启动时不记录任何事件"""
+        idle = TraceRecorder()
+        idle.complete("x", "step", 0, 1.0)
+        with idle.span("y", "test"):
+            pass
+        assert [e for e in idle.events() if e["ph"] != "M"] == []
+
+    def test_step_tracer_and_allure_step(self, recorder):
+        """测试 StepTracer 与 allure.step 均记录为时间片，嵌套步骤落在父步骤时间范围内"""
+        with StepTracer("外层步骤"):
+            with allure.step("内层 allure 步骤"):
+                pass
+        (outer,) = _spans(recorder, "step")
+        (inner,) = _spans(recorder, "allure")
+        assert outer["name"] == "外层步骤" and inner["name"] == "内层 allure 步骤"
+        assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"] + 1
+
+    def test_span_records_error(self, recorder):
+        """测试时间片记录异常类型且不吞掉异常"""
+        with pytest.raises(ValueError):
+            with recorder.span("t::a", "test"):
+                raise ValueError("boom")
+        (span,) = _spans(recorder, "test")
+        assert span["args"]["error"] == "ValueError"
+
+    def test_command_and_screenshot(self, recorder):
+        """测试 driver 命令记录为时间片，截图命令额外记录瞬时事件"""
+        recorder.record_command("findElement", {"using": "id", "value": "login"}, 1.0, 0.2, None)
+        recorder.record_command("screenshot", None, 2.0, 0.5, None)
+        commands = _spans(recorder, "command")
+        assert [(c["name"], c["ts"], c["dur"]) for c in commands] == [
+            ("findElement", 1_000_000, 200_000), ("screenshot", 2_000_000, 500_000)]
+        assert commands[0]["args"]["locator"] == "id=login"
+        (shot,) = _spans(recorder, "screenshot")
+        assert shot["ph"] == "i"
+
+    def test_dump_and_merge(self, recorder, tmp_path):
+        """测试导出文件包含设备轨道名称，多个文件可合并"""
+        recorder.complete("a", "step", 0, 0.1)
+        first = recorder.dump(tmp_path / "a.json")
+        data = json.loads(first.read_text(encoding="utf-8"))
+        process = [e for e in data["traceEvents"] if e["name"] == "process_name"]
+        assert process[0]["args"]["name"] == "emulator-5554"
+
+        merged = merge_traces([first, first, tmp_path / "missing.json"], tmp_path / "merged.json")
+        assert len(json.loads(merged.read_text(encoding="utf-8"))["traceEvents"]) == 2 * len(data["traceEvents"])
+        assert merge_traces([tmp_path / "missing.json"], tmp_path / "none.json") is None
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: artifact_store
+@date: 2026/10/19 22:50
+@desc: 内容寻址的产物仓库：截图与 Allure 附件按 sha256 存储一份，其它位置以硬链接引用，并按容量 / 时间淘汰
+
+目录结构: <root>/objects/<hash 前两位>/<hash><后缀>
+- put() 写入前先比对哈希，内容相同的截图 (同一页面的重复截图、重复的失败画面) 不再重复写盘；
+- link() 在 SCREENSHOT_DIR / ALLURE_TEMP 等位置创建指向对象的硬链接 (不支持时复制)，
+  对象被淘汰后已有的链接文件仍然有效；
+- evict() 先删除超过保留天数的对象，再按最近使用时间从旧到新删除，直到总大小不超过上限。
+"""
+import argparse
+import hashlib
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+from core.settings import (ARTIFACT_STORE_DIR, ARTIFACT_MAX_BYTES, ARTIFACT_MAX_AGE_DAYS, ALLURE_TEMP,
+                           SCREENSHOT_DIR)
+
+logger = logging.getLogger(__name__)
+
+_CHUNK = 1024 * 1024
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """内容寻址的产物仓库"""
+
+    def __init__(self, root: Path | str = ARTIFACT_STORE_DIR, max_bytes: int = ARTIFACT_MAX_BYTES,
+                 max_age_days: float = ARTIFACT_MAX_AGE_DAYS):
+        """
+        :param root: 仓库根目录
+        :param max_bytes: 对象总大小上限 (字节)，0 表示不限制
+        :param max_age_days: 对象保留天数 (按最近使用时间)，0 表示不限制
+        """
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+
+    def object_path(self, digest: str, suffix: str = "") -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}{suffix}"
+
+    def _touch(self, path: Path) -> None:
+        """刷新对象的最近使用时间 (mtime)，作为淘汰依据"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    # --- 写入 ---
+    def put(self, data: bytes, suffix: str = ".png") -> Path:
+        """
+        写入一份内容，已存在相同内容时直接复用。
+        :param data: 产物内容
+        :param suffix: 文件后缀
+        :return: 对象路径
+        """
+        path = self.object_path(hashlib.sha256(data).hexdigest(), suffix)
+        if path.exists():
+            self._touch(path)
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        return path
+
+    def put_file(self, file: Path | str) -> Path:
+        """
+        将已有文件纳入仓库 (优先硬链接，不产生额外写入)，已存在相同内容时直接复用。
+        :param file: 源文件
+        :return: 对象路径
+        """
+        file = Path(file)
+        path = self.object_path(_hash_file(file), file.suffix)
+        if path.exists():
+            self._touch(path)
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(file, path)
+        except FileExistsError:
+            pass
+        except OSError:
+            shutil.copy2(file, path)
+        return path
+
+    @staticmethod
+    def link(obj: Path, dest: Path | str) -> Path:
+        """
+        在 dest 处创建指向对象的硬链接 (跨设备或文件系统不支持时复制)。
+        :param obj: 对象路径
+        :param dest: 目标路径，已存在时覆盖
+        :return: dest
+        """
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists():
+            if dest.samefile(obj):
+                return dest
+            dest.unlink()
+        try:
+            os.link(obj, dest)
+        except OSError:
+            shutil.copy2(obj, dest)
+        return dest
+
+    def save(self, data: bytes, dest: Path | str) -> Path:
+        """
+        写入内容并在 dest 处创建引用 (截图落盘的统一入口)。
+        :param data: 产物内容
+        :param dest: 目标路径
+        :return: dest
+        """
+        dest = Path(dest)
+        return self.link(self.put(data, dest.suffix), dest)
+
+    def dedupe(self, directory: Path | str = ALLURE_TEMP, pattern: str = "*-attachment*") -> int:
+        """
+        对目录中的文件去重：内容相同的文件替换为指向同一对象的硬链接。
+        :param directory: 目录 (默认 Allure 原始结果目录)
+        :param pattern: 文件匹配规则 (默认仅 Allure 附件)
+        :return: 节省的字节数
+        """
+        saved = 0
+        for file in Path(directory).glob(pattern):
+            if not file.is_file():
+                continue
+            try:
+                obj = self.put_file(file)
+                if not file.samefile(obj):
+                    saved += file.stat().st_size
+                    self.link(obj, file)
+            except OSError as e:
+                logger.debug(f"附件去重失败 {file}: {e}")
+        if saved:
+            logger.info(f"附件去重完成，节省 {saved / 1024:.1f} KB: {directory}")
+        return saved
+
+    # --- 统计与淘汰 ---
+    def _objects(self) -> list[tuple[Path, os.stat_result]]:
+        if not self.objects_dir.exists():
+            return []
+        items = []
+        for path in self.objects_dir.glob("*/*"):
+            if path.suffix == ".tmp":
+                continue
+            try:
+                items.append((path, path.stat()))
+            except OSError:
+                continue
+        return items
+
+    def stats(self) -> dict:
+        """
+        :return: 对象数量、总大小与仍被其它位置引用的对象数量
+        """
+        objects = self._objects()
+        return {
+            "objects": len(objects),
+            "bytes": sum(st.st_size for _, st in objects),
+            "referenced": sum(st.st_nlink > 1 for _, st in objects),
+        }
+
+    def evict(self, retention_dirs: Iterable[Path | str] = (), now: Optional[float] = None) -> int:
+        """
+        按时间与容量淘汰对象。
+        :param retention_dirs: 同时按保留天数清理的引用目录 (如 SCREENSHOT_DIR)
+        :param now: 当前时间戳 (测试用)
+        :return: 删除的对象数量
+        """
+        now = now or time.time()
+        max_age = self.max_age_days * 86400
+        objects = sorted(self._objects(), key=lambda item: item[1].st_mtime)
+        removed = 0
+        total = sum(st.st_size for _, st in objects)
+        for path, st in objects:
+            expired = max_age and now - st.st_mtime > max_age
+            oversize = self.max_bytes and total > self.max_bytes
+            if not (expired or oversize):
+                break
+            path.unlink(missing_ok=True)
+            total -= st.st_size
+            removed += 1
+
+        for directory in retention_dirs:
+            if not max_age or not Path(directory).exists():
+                continue
+            for file in Path(directory).iterdir():
+                try:
+                    if file.is_file() and now - file.stat().st_mtime > max_age:
+                        file.unlink()
+                except OSError:
+                    continue
+        if removed:
+            logger.info(f"产物仓库淘汰 {removed} 个对象，当前大小 {total / 1024 / 1024:.1f} MB")
+        return removed
+
+
+# 全局单例
+artifact_store = ArtifactStore()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="内容寻址产物仓库")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="查看对象数量与占用空间")
+    sub.add_parser("evict", help="按保留天数与容量上限淘汰对象，并清理过期截图")
+    p_dedupe = sub.add_parser("dedupe", help="对目录中的文件去重")
+    p_dedupe.add_argument("directory", nargs="?", default=str(ALLURE_TEMP))
+    p_dedupe.add_argument("--pattern", default="*-attachment*")
+    cli_args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)-5s [%(name)s] - %(message)s")
+    if cli_args.command == "stats":
+        info = artifact_store.stats()
+        print(f"对象: {info['objects']}  大小: {info['bytes'] / 1024 / 1024:.1f} MB  被引用: {info['referenced']}")
+    elif cli_args.command == "evict":
+        print(f"已淘汰 {artifact_store.evict(retention_dirs=[SCREENSHOT_DIR])} 个对象")
+    else:
+        print(f"节省 {artifact_store.dedupe(cli_args.directory, cli_args.pattern) / 1024:.1f} KB")
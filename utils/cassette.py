@@ -0,0 +1,302 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: cassette
+@date: 2026/10/20 03:00
+@desc: WebDriver 流量录制回放：录制模式下逐条记录真机上的请求与响应 (按用例分段、敏感值脱敏、gzip 压缩)，
+       回放模式下由本地替身服务按顺序返回录制的响应，页面对象 / 用例改动无需设备即可离线验证，
+       命令序列发生变化时输出差异报告
+
+用法:
+    pytest --cassette_mode record --cassette outputs/cassettes/home.json.gz   # 连接真机录制
+    pytest --cassette_mode replay --cassette outputs/cassettes/home.json.gz   # 离线回放
+    python -m utils.cassette show outputs/cassettes/home.json.gz              # 查看录制内容
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import urlparse
+
+from core.settings import CASSETTE_PATH, CASSETTE_REDACT_KEYS, CASSETTE_SECRET_ENV
+from utils.fake_appium import FakeAppiumServer
+from utils.logger import test_var
+
+logger = logging.getLogger(__name__)
+
+REDACTED = "***"
+CASSETTE_VERSION = 1
+
+# 不录制的线程 (会话保活 ping 的时机不确定，回放时无法复现)
+_SKIP_THREADS = {"appium-keepalive"}
+_DELETE_SESSION_RE = re.compile(r"^/session/[^/]+$")
+
+
+class Redactor:
+    """
+    敏感值脱敏：字段名命中 CASSETTE_REDACT_KEYS 的值、以及登记过的敏感字符串 (CASSETTE_SECRET_ENV 中环境变量的值、
+    input(sensitive=True) 输入的文本) 替换为 "***"。录制与回放比对请求时使用同一规则。
+    """
+
+    def __init__(self, keys: tuple[str, ...] = CASSETTE_REDACT_KEYS, env_names: tuple[str, ...] = CASSETTE_SECRET_ENV):
+        self._key_re = re.compile("|".join(map(re.escape, keys)), re.IGNORECASE)
+        self._env_names = env_names
+        self._secrets: set[str] = set()
+        self._lock = threading.Lock()
+        self.load_env()
+
+    def load_env(self) -> None:
+        """登记 CASSETTE_SECRET_ENV 中环境变量的值 (.env 中的账号密码等)"""
+        for name in self._env_names:
+            self.add_secret(os.getenv(name))
+
+    def add_secret(self, value: Any) -> None:
+        """登记敏感字符串 (过短的值容易误伤，忽略)"""
+        if isinstance(value, str) and len(value) >= 4:
+            with self._lock:
+                self._secrets.add(value)
+
+    def redact(self, data: Any) -> Any:
+        """
+        返回脱敏后的副本。
+        :param data: 请求体 / 响应值 (dict、list、str 等)
+        """
+        if isinstance(data, dict):
+            result = {k: REDACTED if self._key_re.search(str(k)) and isinstance(v, (str, int, float))
+                      else self.redact(v) for k, v in data.items()}
+            # W3C sendKeys 同时携带 text 与逐字符的 value 列表，按脱敏后的 text 重建
+            if isinstance(data.get("text"), str) and isinstance(data.get("value"), list) \
+                    and "".join(map(str, data["value"])) == data["text"]:
+                result["value"] = list(result["text"])
+            return result
+        if isinstance(data, list):
+            return [self.redact(v) for v in data]
+        if isinstance(data, str) and self._secrets:
+            with self._lock:
+                secrets = sorted(self._secrets, key=len, reverse=True)
+            for secret in secrets:
+                if secret in data:
+                    data = data.replace(secret, REDACTED)
+        return data
+
+
+@dataclass
+class Interaction:
+    method: str
+    path: str
+    body: Any
+    status: int
+    value: Any
+    test: str = ""
+
+    @property
+    def request(self) -> str:
+        body = "" if self.body in (None, {}) else " " + json.dumps(self.body, ensure_ascii=False, sort_keys=True)
+        return f"{self.method} {self.path}{body}"
+
+
+class Cassette:
+    """一次录制的全部交互，按录制顺序保存"""
+
+    def __init__(self, interactions: Optional[list[Interaction]] = None, recorded_at: str = ""):
+        self.interactions = interactions or []
+        self.recorded_at = recorded_at or time.strftime("%Y-%m-%d %H:%M:%S")
+
+    @classmethod
+    def load(cls, path: Path | str) -> 'Cassette':
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"不支持的 cassette 版本: {data.get('version')}")
+        return cls([Interaction(**item) for item in data["interactions"]], data.get("recorded_at", ""))
+
+    def save(self, path: Path | str) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump({"version": CASSETTE_VERSION, "recorded_at": self.recorded_at,
+                       "interactions": [asdict(i) for i in self.interactions]}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        return path
+
+    def tests(self) -> list[str]:
+        """按首次出现顺序返回录制到的用例"""
+        return list(dict.fromkeys(i.test for i in self.interactions))
+
+
+class CassetteRecorder:
+    """录制器：core.remote.RecordingConnection 的每次请求追加到当前 cassette，未启动时立即返回"""
+
+    def __init__(self):
+        self.enabled = False
+        self.path: Optional[Path] = None
+        self.cassette = Cassette()
+        self._lock = threading.Lock()
+
+    def start(self, path: Path | str = CASSETTE_PATH) -> 'CassetteRecorder':
+        self.path = Path(path)
+        self.cassette = Cassette()
+        # 导入后才加载的环境变量 (.env) 中的敏感值，在录制开始前补登记
+        redactor.load_env()
+        self.enabled = True
+        logger.info(f"开始录制 WebDriver 流量: {self.path}")
+        return self
+
+    def stop(self) -> Optional[Path]:
+        """停止录制并写出 cassette"""
+        if not self.enabled:
+            return None
+        self.enabled = False
+        path = self.cassette.save(self.path)
+        logger.info(f"WebDriver 流量已录制 ({len(self.cassette.interactions)} 条请求): {path}")
+        return path
+
+    def record(self, method: str, url: str, body: Optional[str], response: dict) -> None:
+        """
+        记录一次请求与响应。
+        :param method: HTTP 方法
+        :param url: 完整请求地址
+        :param body: JSON 请求体字符串
+        :param response: RemoteConnection._request 的返回值
+        """
+        if not self.enabled or threading.current_thread().name in _SKIP_THREADS:
+            return
+        status = response.get("status")
+        status = status if isinstance(status, int) and status >= 400 else 200
+        value = response.get("value")
+        if status >= 400 and isinstance(value, str):
+            # 错误响应为原始响应体字符串
+            try:
+                value = json.loads(value).get("value", value)
+            except (ValueError, AttributeError):
+                value = {"error": "unknown error", "message": value}
+        payload = json.loads(body) if body and method in ("POST", "PUT") else None
+        interaction = Interaction(method, urlparse(url).path.rstrip("/"), redactor.redact(payload or None),
+                                  status, redactor.redact(value), test_var.get())
+        with self._lock:
+            self.cassette.interactions.append(interaction)
+
+
+@dataclass
+class Mismatch:
+    test: str
+    # unexpected: 回放时出现了录制中没有的请求；missing: 录制中的请求在回放时没有发出
+    kind: str
+    index: int
+    request: str
+
+
+class ReplayServer(FakeAppiumServer):
+    """
+    回放服务：按录制顺序比对请求 (方法、路径、脱敏后的请求体)，命中则返回录制的响应。
+    - begin(test) 后只在该用例的录制片段中匹配，一个用例的差异不会影响后续用例；
+    - 请求与当前位置不一致时向后查找，找到则把跳过的请求记为 missing，找不到记为 unexpected 并返回错误；
+    - 新建 / 删除会话不参与顺序比对，单独回放某个用例时同样可用。
+    """
+
+    def __init__(self, cassette: Cassette | Path | str, host: str = "127.0.0.1", port: int = 0):
+        super().__init__(host=host, port=port)
+        # 与录制时一致：补登记导入后才加载的环境变量中的敏感值
+        redactor.load_env()
+        self.cassette = cassette if isinstance(cassette, Cassette) else Cassette.load(cassette)
+        self.mismatches: list[Mismatch] = []
+        self._test = ""
+        self._queue = list(self.cassette.interactions)
+        self._cursor = 0
+        self._session = next((i for i in self.cassette.interactions
+                              if i.method == "POST" and i.path == "/session" and i.status == 200), None)
+
+    def begin(self, test: str) -> None:
+        """开始回放一个用例的录制片段"""
+        with self._lock:
+            self._test = test
+            self._queue = [i for i in self.cassette.interactions if i.test == test]
+            self._cursor = 0
+
+    def end(self) -> list[Mismatch]:
+        """结束当前用例，未被请求的录制记为 missing，返回本用例的差异"""
+        with self._lock:
+            found = [m for m in self.mismatches if m.test == self._test]
+            for index in range(self._cursor, len(self._queue)):
+                if self._is_session(self._queue[index]):
+                    continue
+                missing = Mismatch(self._test, "missing", index, self._queue[index].request)
+                self.mismatches.append(missing)
+                found.append(missing)
+            self._cursor = len(self._queue)
+            return found
+
+    @staticmethod
+    def _is_session(interaction: Interaction) -> bool:
+        return (interaction.method == "POST" and interaction.path == "/session") or \
+            (interaction.method == "DELETE" and bool(_DELETE_SESSION_RE.match(interaction.path)))
+
+    def dispatch(self, method: str, path: str, body: dict) -> tuple[int, Any]:
+        path = path.rstrip("/")
+        request = Interaction(method, path, redactor.redact(body or None), 0, None)
+        with self._lock:
+            self.stats[f"{method} {path}"] += 1
+            if method == "POST" and path == "/session":
+                if self._session is None:
+                    return 500, {"error": "session not created", "message": "cassette 中没有会话创建记录"}
+                return 200, self._session.value
+            if method == "DELETE" and _DELETE_SESSION_RE.match(path):
+                return 200, None
+
+            for index in range(self._cursor, len(self._queue)):
+                recorded = self._queue[index]
+                if self._is_session(recorded) or (recorded.method, recorded.path, recorded.body) != \
+                        (request.method, request.path, request.body):
+                    continue
+                self.mismatches.extend(Mismatch(self._test, "missing", skipped, self._queue[skipped].request)
+                                       for skipped in range(self._cursor, index)
+                                       if not self._is_session(self._queue[skipped]))
+                self._cursor = index + 1
+                return recorded.status, recorded.value
+
+            self.mismatches.append(Mismatch(self._test, "unexpected", self._cursor, request.request))
+            return 500, {"error": "unknown error", "message": f"cassette 中没有匹配的请求: {request.request}",
+                         "stacktrace": ""}
+
+    def report(self) -> str:
+        """按用例汇总的差异报告"""
+        lines = []
+        for test in dict.fromkeys(m.test for m in self.mismatches):
+            lines.append(test or "(未关联用例)")
+            lines += [f"  [{'多出' if m.kind == 'unexpected' else '缺少'}] #{m.index} {m.request}"
+                      for m in self.mismatches if m.test == test]
+        return "\n".join(lines)
+
+
+# 全局单例
+redactor = Redactor()
+cassette_recorder = CassetteRecorder()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WebDriver 录制文件工具")
+    sub = parser.add_subparsers(dest="command", required=True)
+    show = sub.add_parser("show", help="按用例列出录制的请求")
+    show.add_argument("path", nargs="?", default=str(CASSETTE_PATH), help="cassette 文件")
+    show.add_argument("--test", default=None, help="只显示 nodeid 包含该字符串的用例")
+    cli_args = parser.parse_args()
+
+    loaded = Cassette.load(cli_args.path)
+    print(f"录制时间: {loaded.recorded_at}，共 {len(loaded.interactions)} 条请求")
+    for name in loaded.tests():
+        if cli_args.test and cli_args.test not in name:
+            continue
+        print(name or "(未关联用例)")
+        for item in (i for i in loaded.interactions if i.test == name):
+            print(f"  {item.status} {item.request[:160]}")
@@ -13,18 +13,39 @@
 import logging
 import time
 import inspect
-from functools import wraps
+from functools import wraps, lru_cache
 from typing import Union, Callable
 from contextvars import ContextVar
 from contextlib import ContextDecorator
 
 from core.custom_expected_conditions import get_condition
+from utils.logger import step_var
+from utils.trace_exporter import trace_recorder
+from core.settings import LEAN_MODE
 
 logger = logging.getLogger(__name__)
+# 命名等待条件的解析日志随轮询高频出现，单独使用子日志器以便限流
+wait_logger = logging.getLogger(f"{__name__}.wait")
 
 # 定义一个上下文变量，初始值为 0
 indent_var = ContextVar("indent_level", default=0)
 
+# 精简模式开关 (见 set_lean_mode)
+_lean = LEAN_MODE
+
+
+def set_lean_mode(enabled: bool) -> None:
+    """
+    开启 / 关闭精简模式：开启后 step_trace 直接调用原函数，StepTracer 不输出日志也不记录 Trace。
+    :param enabled: 是否开启
+    """
+    global _lean
+    _lean = enabled
+
+
+def is_lean_mode() -> bool:
+    return _lean
+
 
 class StepTracer(ContextDecorator):
     """
@@ -54,22 +75,35 @@ class StepTracer(ContextDecorator):
         self.func_info = func_info
         self.start_t = None
 
+    def _recreate_cm(self):
+        """
+        作为装饰器 (@StepTracer(...)) 时每次调用使用新的实例：计时、缩进前缀与 step_var 令牌都是单次调用的状态，
+        共用同一实例会在递归或多线程调用时互相覆盖。
+        """
+        return type(self)(self.step_desc, self.logger.name, self.func_info)
+
     def __enter__(self):
         """
         进入上下文，记录步骤开始，并增加日志缩进层级。
         """
+        self.active = not _lean
+        if not self.active:
+            return self
         # 1. 获取当前层级并计算前缀
         level = indent_var.get()
         # 使用 "  " (空格) 或 "│ " 作为缩进符号
         self.prefix = "│  " * level
 
         self.start_t = time.perf_counter()
-        info = f" | 方法: {self.func_info}" if self.func_info else ""
-        # self.logger.info(f"[步骤开始] | {self.step_desc}{info}")
-        self.logger.info(f"{self.prefix}┌── [步骤开始] | {self.step_desc}{info}")
+        self.start_us = time.time_ns() // 1000
+        if self.logger.isEnabledFor(logging.INFO):
+            info = f" | 方法: {self.func_info}" if self.func_info else ""
+            # self.logger.info(f"[步骤开始] | {self.step_desc}{info}")
+            self.logger.info(f"{self.prefix}┌── [步骤开始] | {self.step_desc}{info}")
 
-        # 2. 进入下一层，层级 +1
+        # 2. 进入下一层，层级 +1；当前步骤写入结构化日志字段
         indent_var.set(level + 1)
+        self._step_token = step_var.set(self.step_desc)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -77,13 +111,20 @@ class StepTracer(ContextDecorator):
         退出上下文，记录步骤结束（成功或失败）、耗时，并恢复日志缩进层级。
         如果发生异常，会记录异常信息但不会抑制它，异常会继续向上传播。
         """
+        if not self.active:
+            return False
         # 3. 恢复层级，层级 -1
         level = indent_var.get() - 1
         indent_var.set(level)
+        step_var.reset(self._step_token)
 
         duration = time.perf_counter() - self.start_t
 
         prefix = "│  " * level
+        # 开启 Trace 导出时记录为时间片
+        if trace_recorder.enabled:
+            trace_recorder.complete(self.step_desc or self.func_info or "step", "step", self.start_us, duration,
+                                    {"func": self.func_info, "error": exc_type.__name__ if exc_type else None})
 
         if exc_type:
             # 异常发生
@@ -93,7 +134,7 @@ class StepTracer(ContextDecorator):
             self.logger.error(
                 f"{prefix}└── [步骤失败] {self.step_desc} | 耗时: {duration:.2f}s | 异常: {exc_type.__name__}"
             )
-        else:
+        elif self.logger.isEnabledFor(logging.INFO):
             # 执行成功
             # self.logger.info(f"[步骤成功] {self.step_desc} | 耗时: {duration:.2f}s")
             self.logger.info(
@@ -103,6 +144,21 @@ class StepTracer(ContextDecorator):
         return False
 
 
+@lru_cache(maxsize=256)
+def _parse_condition(method: str) -> tuple[str, tuple[str, ...]]:
+    """
+    解析 "key:arg1,arg2" 格式的等待条件字符串。
+    :param method: 条件字符串
+    :return: (条件名称, 参数元组)
+    """
+    ec_name, ec_args = method, ()
+    if ":" in method:
+        ec_name, params = method.split(":", 1)
+        if params:
+            ec_args = tuple(params.split(","))
+    return ec_name, ec_args
+
+
 def resolve_wait_method(func):
     """
     装饰器：将字符串形式的等待条件解析为可调用的 Expected Condition (EC) 对象。
@@ -127,18 +183,13 @@ def resolve_wait_method(func):
     @wraps(func)
     def wrapper(self, method: Union[Callable, str], *args, **kwargs):
         if isinstance(method, str):
-            # 解析格式 "key:arg1,arg2" 或 仅 "key"
-            ec_name = method
-            ec_args = []
-
-            if ":" in method:
-                ec_name, params = method.split(":", 1)
-                if params:
-                    ec_args = params.split(",")
+            # 解析格式 "key:arg1,arg2" 或 仅 "key" (相同的条件字符串只解析一次)
+            ec_name, ec_args = _parse_condition(method)
 
             # 委托给 core.custom_expected_conditions.get_condition 处理
             try:
-                logger.info(f"解析命名等待条件: '{ec_name}' 参数: {ec_args}")
+                if wait_logger.isEnabledFor(logging.INFO):
+                    wait_logger.info(f"解析命名等待条件: '{ec_name}' 参数: {list(ec_args)}")
                 method = get_condition(ec_name, *ec_args)
             except Exception as e:
                 logger.error(f"解析等待条件 '{method}' 失败: {e}")
@@ -189,11 +240,22 @@ def action_screenshot(func):
     return wrapper
 
 
+@lru_cache(maxsize=None)
+def _skip_first_param(func) -> bool:
+    """
+    判断函数的第一个参数是否为 self / cls (inspect.signature 开销较大，按函数缓存结果)。
+    :param func: 目标函数
+    :return: 是否需要在日志中过滤第一个位置参数
+    """
+    params = list(inspect.signature(func).parameters.values())
+    return bool(params) and params[0].name in ('self', 'cls')
+
+
 def _format_params(func, *args, **kwargs):
     """
     辅助函数：格式化函数调用的参数，以便清晰地记录日志。
 
-    它会检查函数的签名，并执行以下操作：
+    它会检查函数的签名 (结果按函数缓存)，并执行以下操作：
     1. 过滤掉实例方法或类方法中的 `self` 或 `cls` 参数。
     2. 将位置参数和关键字参数格式化为一个可读的字符串。
 
@@ -205,9 +267,7 @@ def _format_params(func, *args, **kwargs):
     Returns:
         str: 格式化后的参数字符串，例如 "arg1, kwarg='value'"。
     """
-    sig = inspect.signature(func)
-    params = list(sig.parameters.values())
-    display_args = args[1:] if params and params[0].name in ('self', 'cls') else args
+    display_args = args[1:] if _skip_first_param(func) else args
 
     # 格式化参数显示，方便阅读
     args_repr = [repr(a) for a in display_args]
@@ -244,14 +304,22 @@ def step_trace(step_desc="", source='wrapper'):
     """
 
     def decorator(func):
+        func_name = f"{func.__module__}.{func.__name__}"
+        step_logger = logging.getLogger(source)
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # 1. 提取参数显示逻辑 (抽离出来可以作为工具函数)
-            all_params = _format_params(func, *args, **kwargs)
-            func_name = f"{func.__module__}.{func.__name__}"
+            # 0. 精简模式：直接调用原函数
+            if _lean:
+                return func(*args, **kwargs)
+
+            # 1. 提取参数显示逻辑：仅在日志会输出或需要记录 Trace 时才 repr 参数
+            func_info = None
+            if trace_recorder.enabled or step_logger.isEnabledFor(logging.INFO):
+                func_info = f"{func_name}({_format_params(func, *args, **kwargs)})"
 
             # 2. 使用上下文管理器
-            with StepTracer(step_desc, source, f"{func_name}({all_params})"):
+            with StepTracer(step_desc, source, func_info):
                 return func(*args, **kwargs)
 
         return wrapper
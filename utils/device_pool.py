@@ -0,0 +1,382 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: device_pool
+@date: 2026/10/19 14:30
+@desc: 多设备并行执行：设备发现、端口分配、用例分片、工作进程管理与结果汇总
+"""
+import logging
+import re
+import shutil
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Callable, Optional
+
+from core.settings import (BASE_DIR, DEVICE_OUTPUT_DIR, APPIUM_PORT, SYSTEM_PORT_BASE, MJPEG_PORT_BASE,
+                           TRACE_PATH)
+from core.config_loader import config_registry
+from core.enums import AppPlatform
+from utils.result_merger import merge_results
+from utils.trace_exporter import merge_traces
+from utils.locator_advisor import merge_profiles
+from core.navigator import merge_costs
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DeviceWorker:
+    """单台设备对应的工作进程配置，每台设备独占 Appium 端口、系统端口与输出目录"""
+    index: int
+    udid: str
+    platform: str
+    caps_name: str
+    appium_port: int
+    system_port: int
+    mjpeg_port: int
+    nodeids: list[str] = field(default_factory=list)
+    trace: bool = False
+
+    @property
+    def output_dir(self) -> Path:
+        # udid 可能包含 ":" (如 192.168.1.2:5555)，转换为安全的目录名
+        return DEVICE_OUTPUT_DIR / re.sub(r"[^\w.-]", "_", self.udid)
+
+    @property
+    def alluredir(self) -> Path:
+        return self.output_dir / "allure"
+
+    @property
+    def log_file(self) -> Path:
+        return self.output_dir / "pytest.log"
+
+    @property
+    def trace_file(self) -> Path:
+        return self.output_dir / "trace.json"
+
+    @property
+    def junit_file(self) -> Path:
+        return self.output_dir / "junit.xml"
+
+    @property
+    def locator_profile_file(self) -> Path:
+        return self.output_dir / "locator_profile.json"
+
+    @property
+    def nav_costs_file(self) -> Path:
+        return self.output_dir / "nav_costs.json"
+
+    def prepare_output(self) -> None:
+        """清空并重建本设备的输出目录"""
+        if self.output_dir.exists():
+            shutil.rmtree(self.output_dir, ignore_errors=True)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def build_args(self, targets: Optional[list[str]] = None) -> list[str]:
+        """
+        构造工作进程的 pytest 命令行。
+        :param targets: 用例路径及附加参数，缺省为静态分片得到的 nodeids
+        """
+        return [
+            sys.executable, "-m", "pytest",
+            *(self.nodeids if targets is None else targets),
+            f"--alluredir={self.alluredir}",
+            f"--junitxml={self.junit_file}",
+            f"--platform={self.platform}",
+            f"--caps_name={self.caps_name}",
+            f"--udid={self.udid}",
+            f"--port={self.appium_port}",
+            f"--system_port={self.system_port}",
+            f"--mjpeg_port={self.mjpeg_port}",
+            f"--log_path={self.log_file}",
+            # 定位耗时与跳转耗时写入各自的文件，由编排进程合并，避免多个进程同时写同一文件
+            f"--locator_profile_file={self.locator_profile_file}",
+            f"--nav_costs_file={self.nav_costs_file}",
+            "-o", f"log_file={self.log_file}",
+            "-p", "no:cacheprovider",
+            *([f"--trace_file={self.trace_file}"] if self.trace else []),
+        ]
+
+
+@dataclass
+class WorkerResult:
+    """工作进程执行结果"""
+    worker: DeviceWorker
+    returncode: int
+    duration: float
+    tests: int = 0
+    failures: int = 0
+    errors: int = 0
+    skipped: int = 0
+
+    @property
+    def passed(self) -> int:
+        return self.tests - self.failures - self.errors - self.skipped
+
+    @property
+    def throughput(self) -> float:
+        """吞吐量 (用例/分钟)"""
+        return self.tests / self.duration * 60 if self.duration else 0.0
+
+
+def discover_devices(platform: str = AppPlatform.ANDROID.value) -> list[str]:
+    """
+    发现已连接的设备。
+    Android 使用 `adb devices`，iOS 使用 libimobiledevice 的 `idevice_id -l`。
+    :param platform: 目标平台
+    :return: udid 列表
+    """
+    match platform:
+        case AppPlatform.ANDROID.value:
+            cmd = ["adb", "devices"]
+        case AppPlatform.IOS.value:
+            cmd = ["idevice_id", "-l"]
+        case _:
+            raise ValueError(f"不支持的平台类型: [{platform}]")
+
+    if not shutil.which(cmd[0]):
+        logger.warning(f"未找到 {cmd[0]} 命令，无法自动发现设备。")
+        return []
+    try:
+        output = subprocess.run(cmd, capture_output=True, text=True, timeout=15, check=True).stdout
+    except (subprocess.SubprocessError, OSError) as e:
+        logger.error(f"设备发现失败: {e}")
+        return []
+
+    if platform == AppPlatform.IOS.value:
+        return [line.strip() for line in output.splitlines() if line.strip()]
+    # adb 输出格式: "<serial>\tdevice"，跳过 offline / unauthorized 设备
+    return [line.split("\t")[0] for line in output.splitlines()[1:] if line.endswith("\tdevice")]
+
+
+def load_configured_devices() -> list[dict]:
+    """
+    读取 caps.yaml 中的 devices 列表。
+    支持两种写法: "- emulator-5554" 或 "- {udid: emulator-5554, caps_name: wan_android}"。
+    :return: [{"udid": ..., "caps_name": ...}] 列表，caps_name 可能为 None
+    """
+    devices = config_registry.source().get("devices") or []
+    result = []
+    for item in devices:
+        if isinstance(item, dict):
+            result.append({"udid": str(item["udid"]), "caps_name": item.get("caps_name")})
+        else:
+            result.append({"udid": str(item), "caps_name": None})
+    return result
+
+
+def resolve_devices(udids: list[str], platform: str, caps_name: str) -> list[dict]:
+    """
+    确定参与执行的设备：命令行显式指定 > caps.yaml 的 devices 列表 > 自动发现。
+    :param udids: 命令行传入的 udid 列表 (可为空)
+    :param platform: 目标平台
+    :param caps_name: 默认 caps 配置名称
+    :return: [{"udid": ..., "caps_name": ...}] 列表
+    """
+    if udids:
+        devices = [{"udid": u, "caps_name": None} for u in udids]
+    else:
+        devices = load_configured_devices() or [{"udid": u, "caps_name": None} for u in discover_devices(platform)]
+    for device in devices:
+        device["caps_name"] = device["caps_name"] or caps_name
+    return devices
+
+
+def allocate_workers(devices: list[dict], platform: str, base_port: int = APPIUM_PORT) -> list[DeviceWorker]:
+    """
+    为每台设备分配独立的 Appium 端口、systemPort / wdaLocalPort 与 mjpegServerPort。
+    :param devices: resolve_devices 的结果
+    :param platform: 目标平台
+    :param base_port: 起始 Appium 端口
+    :return: 工作进程配置列表
+    """
+    return [
+        DeviceWorker(
+            index=i,
+            udid=device["udid"],
+            platform=platform,
+            caps_name=device["caps_name"],
+            appium_port=base_port + i,
+            system_port=SYSTEM_PORT_BASE + i,
+            mjpeg_port=MJPEG_PORT_BASE + i,
+        )
+        for i, device in enumerate(devices)
+    ]
+
+
+class _NodeIdCollector:
+    """pytest 插件：收集用例 nodeid"""
+
+    def __init__(self):
+        self.nodeids: list[str] = []
+
+    def pytest_collection_finish(self, session) -> None:
+        self.nodeids = [item.nodeid for item in session.items]
+
+
+def collect_nodeids(paths: list[str]) -> list[str]:
+    """
+    仅执行收集阶段，获取所有用例的 nodeid。
+    :param paths: 用例路径
+    :return: nodeid 列表
+    """
+    import pytest
+
+    collector = _NodeIdCollector()
+    pytest.main(["--collect-only", "-q", "-p", "no:cacheprovider", *paths], plugins=[collector])
+    return collector.nodeids
+
+
+def shard_tests(nodeids: list[str], workers: list[DeviceWorker]) -> None:
+    """
+    静态分片：按轮询方式将用例分配给各设备。
+    :param nodeids: 用例 nodeid 列表
+    :param workers: 工作进程配置列表 (原地写入 nodeids)
+    """
+    for worker in workers:
+        worker.nodeids = []
+    for i, nodeid in enumerate(nodeids):
+        workers[i % len(workers)].nodeids.append(nodeid)
+
+
+def parse_junit(result: WorkerResult) -> None:
+    """从 junit.xml 中读取用例统计"""
+    path = result.worker.junit_file
+    if not path.exists():
+        return
+    try:
+        root = ET.parse(path).getroot()
+    except ET.ParseError as e:
+        logger.warning(f"解析 {path} 失败: {e}")
+        return
+    suites = [root] if root.tag == "testsuite" else list(root.iter("testsuite"))
+    for suite in suites:
+        result.tests += int(suite.get("tests", 0))
+        result.failures += int(suite.get("failures", 0))
+        result.errors += int(suite.get("errors", 0))
+        result.skipped += int(suite.get("skipped", 0))
+
+
+def start_worker(worker: DeviceWorker, args: list[str], env: dict[str, str]) -> tuple[subprocess.Popen, IO[str]]:
+    """
+    启动工作进程，标准输出与错误写入设备输出目录下的 console.log。
+    :param worker: 工作进程配置
+    :param args: 命令行
+    :param env: 环境变量
+    :return: (进程, console.log 文件句柄)，句柄由调用方在进程结束后关闭
+    """
+    console = (worker.output_dir / "console.log").open("w", encoding="utf-8")
+    try:
+        process = subprocess.Popen(args, cwd=BASE_DIR, env=env, stdout=console, stderr=subprocess.STDOUT)
+    except Exception:
+        console.close()
+        raise
+    return process, console
+
+
+def run_workers(workers: list[DeviceWorker]) -> list[WorkerResult]:
+    """
+    为每台设备启动一个 pytest 工作进程并等待全部结束。
+    :param workers: 已分片的工作进程配置
+    :return: 执行结果列表
+    """
+    running: dict[int, tuple[DeviceWorker, subprocess.Popen, IO[str], float]] = {}
+    for worker in workers:
+        if not worker.nodeids:
+            logger.info(f"设备 {worker.udid} 未分配到用例，跳过。")
+            continue
+        worker.prepare_output()
+        logger.info(f"启动设备 {worker.udid} 工作进程: Appium 端口 {worker.appium_port}, "
+                    f"系统端口 {worker.system_port}, 用例 {len(worker.nodeids)} 个")
+        process, console = start_worker(worker, worker.build_args(), config_registry.worker_env())
+        running[worker.index] = (worker, process, console, time.perf_counter())
+
+    results = []
+    for worker, process, console, start in running.values():
+        try:
+            returncode = process.wait()
+        finally:
+            console.close()
+        result = WorkerResult(worker, returncode, time.perf_counter() - start)
+        parse_junit(result)
+        results.append(result)
+    return results
+
+
+def merge_allure_results(results: list[WorkerResult], dest: Path) -> None:
+    """
+    将各设备的 Allure 原始结果汇总到同一目录：同一用例在多台设备上的重复执行只保留最后一次，
+    并携带上一份报告的 history (见 utils.result_merger)。
+    :param results: 执行结果列表
+    :param dest: 汇总目录
+    """
+    merge_results([result.worker.alluredir for result in results], dest)
+
+
+def format_summary(results: list[WorkerResult]) -> str:
+    """格式化各设备吞吐量汇总"""
+    lines = [f"{'设备':<24} {'用例':>4} {'通过':>4} {'失败':>4} {'错误':>4} {'跳过':>4} {'耗时':>8} {'吞吐(个/分)':>10}"]
+    for r in results:
+        lines.append(f"{r.worker.udid:<24} {r.tests:>4} {r.passed:>4} {r.failures:>4} {r.errors:>4} {r.skipped:>4} "
+                     f"{r.duration:>7.1f}s {r.throughput:>10.2f}")
+    total = sum(r.tests for r in results)
+    wall = max((r.duration for r in results), default=0.0)
+    lines.append(f"合计 {total} 个用例，墙钟耗时 {wall:.1f}s，整体吞吐 {total / wall * 60 if wall else 0:.2f} 个/分")
+    return "\n".join(lines)
+
+
+def run_parallel(paths: list[str], platform: str, caps_name: str, udids: Optional[list[str]] = None,
+                 base_port: int = APPIUM_PORT, alluredir: Optional[Path] = None, schedule: str = "dynamic",
+                 trace: bool = False, on_workers: Optional[Callable[[list[DeviceWorker]], None]] = None) -> int:
+    """
+    多设备并行执行入口。
+    :param paths: 用例路径
+    :param platform: 目标平台
+    :param caps_name: 默认 caps 配置名称
+    :param udids: 指定的设备列表，为空时读取 caps.yaml 或自动发现
+    :param base_port: 起始 Appium 端口
+    :param alluredir: Allure 结果汇总目录
+    :param schedule: 调度方式，dynamic (空闲设备按耗时领取用例) 或 static (轮询分片)
+    :param trace: 是否导出 Trace (各设备一条轨道，合并到 TRACE_PATH)
+    :param on_workers: 设备分配完成、工作进程启动前的回调 (如实时报告改为监听各设备的 alluredir)
+    :return: 退出码 (任一设备失败即非 0)
+    """
+    devices = resolve_devices(udids or [], platform, caps_name)
+    if not devices:
+        logger.error("未发现可用设备，请检查 adb / idevice_id 或在 caps.yaml 中配置 devices 列表。")
+        return 1
+
+    workers = allocate_workers(devices, platform, base_port)
+    for worker in workers:
+        worker.trace = trace
+    if on_workers:
+        on_workers(workers)
+    nodeids = collect_nodeids(paths)
+    if not nodeids:
+        logger.warning("未发现任何测试用例。")
+        return 5
+
+    if schedule == "dynamic":
+        # 延迟导入：scheduler 依赖本模块的 DeviceWorker
+        from utils.scheduler import run_dynamic
+        from utils.run_history import RunHistory
+        results = run_dynamic(paths, workers, nodeids, RunHistory().durations())
+    else:
+        shard_tests(nodeids, workers)
+        results = run_workers(workers)
+    if alluredir:
+        merge_allure_results(results, alluredir)
+    if trace:
+        merge_traces([worker.trace_file for worker in workers], TRACE_PATH)
+    merge_profiles([worker.locator_profile_file for worker in workers])
+    merge_costs([worker.nav_costs_file for worker in workers])
+    logger.info("\n" + format_summary(results))
+    return 0 if all(r.returncode == 0 for r in results) else 1
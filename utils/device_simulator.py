@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: device_simulator
+@date: 2026/10/20 03:40
+@desc: 可脚本化的进程内设备模拟器：加载录制的 page_source 屏幕与跳转规则 (如“点击节点 X 显示屏幕 Y”)，
+       通过 Appium 协议对外服务，页面对象流程无需模拟器 / 真机即可在本地端到端运行，定位在本地求值，快速且结果确定。
+
+场景文件 (YAML) 格式:
+    start: home                               # 初始屏幕
+    screens:                                  # 屏幕名 -> page_source XML 文件 (相对场景文件) 或内联 XML
+      home: wan_android/home.xml
+    activities:                               # startActivity / 冷启动的 Activity -> 屏幕 (可写以 "." 开头的相对类名)
+      .ui.main.activity.MainActivity: home
+    deep_links:                               # mobile: deepLink 的 URL -> 屏幕
+      wanandroid://home: home
+    transitions:                              # 按顺序匹配，第一条命中的规则生效
+      - {from: home, click: "accessibility id=开启", to: drawer}  # 点击命中定位符的节点后切换屏幕
+      - {click: "id=com.app:id/global_ad_close", remove: true}   # 省略 from 表示任意屏幕；remove 表示节点消失
+      - {from: project, swipe: left, to: project}                 # 滑动方向为手指移动方向
+      - {from: login, back: true, to: home}                      # 无 back 规则时返回上一个屏幕
+
+用法:
+    pytest --simulator                        # 使用默认场景 (SIMULATOR_SCENARIO)
+    pytest --simulator config/simulator/wan_android.yaml
+    python -m utils.device_simulator --port 4723   # 独立运行，供 Appium Inspector / 调试脚本连接
+"""
+import argparse
+import logging
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+from core.settings import SIMULATOR_SCENARIO, APPIUM_HOST
+from utils.data_loader import load_yaml
+from utils.fake_appium import FakeAppiumServer, W3CError
+
+logger = logging.getLogger(__name__)
+
+# 起止点距离小于该值 (像素) 的触摸动作视为点击，而不是滑动
+_TAP_DISTANCE = 20
+
+
+@dataclass
+class Rule:
+    """一条跳转规则：在 screens 中的屏幕上发生 event 时切换到 to (或移除被点击的节点)"""
+    event: str
+    screens: set[str] = field(default_factory=set)
+    locator: Optional[tuple[str, str]] = None
+    direction: Optional[str] = None
+    to: Optional[str] = None
+    remove: bool = False
+
+    def applies(self, screen: str, event: str) -> bool:
+        return self.event == event and (not self.screens or screen in self.screens)
+
+
+def _parse_locator(raw: str | dict | list) -> tuple[str, str]:
+    """定位符支持 "by=value" 字符串、{by, value} 字典或 [by, value] 列表"""
+    if isinstance(raw, dict):
+        return raw["by"], raw["value"]
+    if isinstance(raw, list):
+        return raw[0], raw[1]
+    by, sep, value = str(raw).partition("=")
+    if not sep:
+        raise ValueError(f"定位符格式错误 (应为 by=value): {raw}")
+    return by.strip(), value.strip()
+
+
+@dataclass
+class Scenario:
+    """模拟器场景：屏幕、跳转规则以及 Activity / 深链接入口"""
+    screens: dict[str, str]
+    start: str
+    rules: list[Rule] = field(default_factory=list)
+    activities: dict[str, str] = field(default_factory=dict)
+    deep_links: dict[str, str] = field(default_factory=dict)
+    capabilities: dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path | str = SIMULATOR_SCENARIO) -> 'Scenario':
+        """
+        加载场景文件。
+        :param path: YAML 场景文件
+        :return: Scenario
+        :raises ValueError: 场景引用了不存在的屏幕或规则格式错误
+        """
+        path = Path(path)
+        data = load_yaml(path)
+        screens = {}
+        for name, source in (data.get("screens") or {}).items():
+            source = str(source)
+            screens[name] = source if source.lstrip().startswith("<") else \
+                (path.parent / source).read_text(encoding="utf-8")
+
+        rules = []
+        for raw in data.get("transitions") or []:
+            # from 可以是单个屏幕、屏幕列表，省略或 "*" 表示任意屏幕
+            from_screens = raw.get("from") or []
+            from_screens = {from_screens} if isinstance(from_screens, str) else set(from_screens)
+            rule = Rule(event="", screens=from_screens - {"*"}, to=raw.get("to"), remove=bool(raw.get("remove")))
+            if "click" in raw:
+                rule.event, rule.locator = "click", _parse_locator(raw["click"])
+            elif "swipe" in raw:
+                rule.event, rule.direction = "swipe", str(raw["swipe"]).lower()
+            elif raw.get("back"):
+                rule.event = "back"
+            else:
+                raise ValueError(f"无法识别的跳转规则 (需要 click / swipe / back): {raw}")
+            rules.append(rule)
+
+        scenario = cls(screens=screens, start=data.get("start") or next(iter(screens), ""), rules=rules,
+                       activities={str(k): v for k, v in (data.get("activities") or {}).items()},
+                       deep_links={str(k): v for k, v in (data.get("deep_links") or {}).items()},
+                       capabilities=data.get("capabilities") or {})
+        scenario.validate()
+        return scenario
+
+    def validate(self) -> None:
+        """检查规则与入口引用的屏幕都已定义"""
+        referenced = {self.start, *self.activities.values(), *self.deep_links.values()}
+        for rule in self.rules:
+            referenced |= rule.screens | ({rule.to} if rule.to else set())
+        unknown = sorted(referenced - set(self.screens))
+        if unknown:
+            raise ValueError(f"场景引用了未定义的屏幕: {unknown}")
+
+
+class DeviceSimulator(FakeAppiumServer):
+    """
+    按场景规则切换屏幕的 Appium 替身服务。
+    每次切换都重新加载目标屏幕的 XML：之前的元素引用失效，输入的文本不会保留，与真机跳转页面后的行为一致。
+    """
+
+    def __init__(self, scenario: Scenario | Path | str = SIMULATOR_SCENARIO, latency: float = 0.0,
+                 host: str = "127.0.0.1", port: int = 0):
+        """
+        :param scenario: Scenario 或场景文件路径
+        :param latency: 每次请求附加的延迟 (秒)
+        :param host: 监听地址
+        :param port: 监听端口，0 表示随机
+        """
+        self.scenario = scenario if isinstance(scenario, Scenario) else Scenario.load(scenario)
+        super().__init__(latency=latency, host=host, port=port, capabilities={
+            "platformName": "Android", "automationName": "UiAutomator2", **self.scenario.capabilities})
+        self.screen = ""
+        self.history: list[str] = []
+        self.running = True
+        self.show(self.scenario.start, remember=False)
+
+    def show(self, screen: str, remember: bool = True) -> None:
+        """
+        切换到指定屏幕。
+        :param screen: 屏幕名称
+        :param remember: 是否压入返回栈
+        """
+        if remember and self.screen and screen != self.screen:
+            self.history.append(self.screen)
+        logger.debug(f"模拟器屏幕: {self.screen or '-'} -> {screen}")
+        self.screen = screen
+        self.load(self.scenario.screens[screen])
+
+    def restart(self) -> None:
+        """冷启动：清空返回栈并回到初始屏幕"""
+        self.history.clear()
+        self.running = True
+        self.show(self.scenario.start, remember=False)
+
+    def _apply(self, rule: Rule, node: Optional[ET.Element] = None) -> None:
+        if rule.remove and node is not None:
+            self.remove(node)
+        if rule.to:
+            self.show(rule.to)
+
+    # --- 扩展点实现 ---
+    def on_click(self, node: ET.Element) -> None:
+        for rule in self.scenario.rules:
+            if rule.applies(self.screen, "click") and node in self.hierarchy.find(*rule.locator):
+                self._apply(rule, node)
+                return
+
+    def on_actions(self, actions: list[dict]) -> None:
+        moves = [step for source in actions if source.get("type") == "pointer"
+                 for step in source.get("actions", []) if step.get("type") == "pointerMove"]
+        if not moves:
+            return
+        x1, y1 = moves[0].get("x", 0), moves[0].get("y", 0)
+        dx, dy = moves[-1].get("x", 0) - x1, moves[-1].get("y", 0) - y1
+        if max(abs(dx), abs(dy)) < _TAP_DISTANCE:
+            # 坐标点击 / 长按：命中的最内层节点按点击处理
+            node = self._node_at(x1, y1)
+            if node is not None:
+                self.on_click(node)
+            return
+        direction = ("right" if dx > 0 else "left") if abs(dx) >= abs(dy) else ("down" if dy > 0 else "up")
+        for rule in self.scenario.rules:
+            if rule.applies(self.screen, "swipe") and rule.direction == direction:
+                self._apply(rule)
+                return
+
+    def _node_at(self, x: float, y: float) -> Optional[ET.Element]:
+        hit = None
+        for node in self.hierarchy.nodes():
+            rect = self.node_rect(node)
+            if node.get("bounds") and rect["x"] <= x < rect["x"] + rect["width"] \
+                    and rect["y"] <= y < rect["y"] + rect["height"]:
+                hit = node
+        return hit
+
+    def on_back(self) -> None:
+        for rule in self.scenario.rules:
+            if rule.applies(self.screen, "back"):
+                self._apply(rule)
+                return
+        if self.history:
+            self.show(self.history.pop(), remember=False)
+
+    def on_execute(self, script: str, args: list) -> Any:
+        params = args[0] if args and isinstance(args[0], dict) else {}
+        match script:
+            case "mobile: startActivity":
+                activity = str(params.get("intent", "")).split("/", 1)[-1]
+                screen = self._activity_screen(activity)
+                if screen is None:
+                    raise W3CError(500, "unknown error", f"场景未定义 Activity: {activity}")
+                self.running = True
+                self.show(screen)
+            case "mobile: deepLink":
+                screen = self.scenario.deep_links.get(str(params.get("url")))
+                if screen is None:
+                    raise W3CError(500, "unknown error", f"场景未定义深链接: {params.get('url')}")
+                self.running = True
+                self.show(screen)
+            case "mobile: type":
+                node = self._node(params.get("elementId", ""))
+                node.set("text", str(params.get("text", "")))
+            case "mobile: terminateApp":
+                self.running = False
+                return True
+            case "mobile: activateApp":
+                if not self.running:
+                    self.restart()
+            case "mobile: clearApp":
+                self.running = False
+            case "mobile: queryAppState":
+                # 4: 前台运行，1: 未运行
+                return 4 if self.running else 1
+        return None
+
+    def _activity_screen(self, activity: str) -> Optional[str]:
+        for name, screen in self.scenario.activities.items():
+            if activity == name or (name.startswith(".") and activity.endswith(name)) or \
+                    (activity.startswith(".") and name.endswith(activity)):
+                return screen
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="以 Appium 协议运行设备模拟器")
+    parser.add_argument("scenario", nargs="?", default=str(SIMULATOR_SCENARIO), help="场景文件")
+    parser.add_argument("--host", default=APPIUM_HOST, help="监听地址")
+    parser.add_argument("--port", type=int, default=4723, help="监听端口")
+    parser.add_argument("--latency", type=float, default=0.0, help="每次请求附加的延迟 (秒)")
+    cli_args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG, format="%(asctime)s %(levelname)-5s [%(name)s] - %(message)s")
+
+    with DeviceSimulator(cli_args.scenario, cli_args.latency, cli_args.host, cli_args.port) as simulator:
+        logger.info(f"设备模拟器已启动: {simulator.url} (初始屏幕: {simulator.screen})")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: failure_classifier
+@date: 2026/10/19 20:50
+@desc: 用例失败分类：区分基础设施失败 (可重跑) 与产品失败 (直接报告)
+
+正则的匹配对象与 pytest-rerunfailures 一致，为 "异常类名: 异常信息"，
+因此同一组正则既用于本模块的分类，也直接作为 --only-rerun / --rerun-except 的取值。
+"""
+import re
+from typing import Iterator, Optional
+
+from core.enums import FailureKind
+
+# 基础设施失败：会话丢失、元素过期、Appium 服务端 5xx、与 Appium / 设备的连接中断
+INFRA_PATTERNS = [
+    r"^InvalidSessionIdException",
+    r"^NoSuchDriverException",
+    r"^StaleElementReferenceException",
+    r"^WebDriverException: .*(unknown server-side error|Could not proxy command|socket hang up"
+    r"|instrumentation process is not running|session is either terminated or not started)",
+    r"^(MaxRetryError|NewConnectionError|ProtocolError|RemoteDisconnected)",
+    r"^(ConnectionError|ConnectionRefusedError|ConnectionResetError|ConnectionAbortedError)",
+]
+
+# 产品失败：断言失败与等待超时，即使由基础设施异常间接引发也不重跑
+PRODUCT_PATTERNS = [
+    r"^AssertionError",
+    r"^TimeoutException",
+]
+
+_INFRA = [re.compile(p) for p in INFRA_PATTERNS]
+_PRODUCT = [re.compile(p) for p in PRODUCT_PATTERNS]
+
+
+def _describe(exc: BaseException) -> str:
+    return f"{type(exc).__name__}: {exc}"
+
+
+def _chain(exc: Optional[BaseException]) -> Iterator[BaseException]:
+    """遍历异常链 (__cause__ 优先，其次未被抑制的 __context__)"""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        yield exc
+        if exc.__cause__ is not None:
+            exc = exc.__cause__
+        elif not exc.__suppress_context__:
+            exc = exc.__context__
+        else:
+            exc = None
+
+
+def classify(exc: BaseException) -> FailureKind:
+    """
+    对用例抛出的异常进行分类。
+    最外层异常为产品失败时直接判定为产品失败；否则异常链中任一异常属于基础设施失败即判定为基础设施失败；
+    未归类的异常按产品失败处理 (不重跑)。
+    :param exc: 用例抛出的异常
+    :return: FailureKind
+    """
+    if any(p.search(_describe(exc)) for p in _PRODUCT):
+        return FailureKind.PRODUCT
+    for item in _chain(exc):
+        if any(p.search(_describe(item)) for p in _INFRA):
+            return FailureKind.INFRA
+    return FailureKind.PRODUCT
@@ -0,0 +1,417 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: fake_appium
+@date: 2026/10/20 02:00
+@desc: 本地 W3C / Appium HTTP 替身服务：基于 UiHierarchy 在本地求值定位，模拟会话、元素查询、点击输入、
+       滑动与截图，可配置每次请求的网络延迟，并统计往返次数。无需设备即可度量框架自身的开销。
+
+- 定位求值复用 utils.ui_hierarchy (id / accessibility id / class name / uiautomator / XPath 子集)；
+- 元素 ID 在层级树变化后失效 (返回 stale element reference)，与真实设备行为一致；
+- on_click / on_actions / on_back / on_execute 为扩展点，设备模拟器 (屏幕跳转规则) 在子类中实现；
+- 未实现的命令返回 200 + null，并记录在 stats 中 (key 前缀 "?")，便于发现覆盖缺口。
+
+用法:
+    with FakeAppiumServer(UiHierarchy.from_file("home.xml"), latency=0.02) as server:
+        CoreDriver().server_config(port=server.port).connect("android", caps)
+"""
+import base64
+import json
+import re
+import threading
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Optional
+
+from utils.ui_hierarchy import UiHierarchy
+
+# 1x1 透明 PNG，作为截图返回
+BLANK_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg==")
+
+WINDOW_RECT = {"x": 0, "y": 0, "width": 1080, "height": 2340}
+
+_BOUNDS_RE = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+_SESSION_RE = re.compile(r"^/session/([^/]+)(/.*)?$")
+
+
+class W3CError(Exception):
+    """以 W3C 错误响应返回给客户端的异常"""
+
+    def __init__(self, status: int, error: str, message: str = ""):
+        super().__init__(message or error)
+        self.status = status
+        self.error = error
+
+
+class FakeAppiumServer(ThreadingHTTPServer):
+    """
+    W3C / Appium 协议的本地替身服务。
+    dispatch() 是唯一的请求入口，回放 / 模拟器等变体通过覆盖 dispatch 或各扩展点实现。
+    """
+
+    daemon_threads = True
+
+    def __init__(self, hierarchy: UiHierarchy | str | Path | None = None, latency: float = 0.0,
+                 host: str = "127.0.0.1", port: int = 0, capabilities: Optional[dict] = None):
+        """
+        :param hierarchy: 初始 UI 层级 (UiHierarchy、XML 字符串或文件路径)，为空时使用空层级
+        :param latency: 每次请求附加的延迟 (秒)，模拟网络与设备耗时
+        :param host: 监听地址
+        :param port: 监听端口，0 表示随机
+        :param capabilities: 创建会话时返回的 capabilities
+        """
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.capabilities = capabilities or {"platformName": "Android", "automationName": "UiAutomator2"}
+        self.sessions: set[str] = set()
+        self.stats: Counter[str] = Counter()
+        self.implicit_wait = 0.0
+        self._elements: dict[str, ET.Element] = {}
+        self._element_ids: dict[int, str] = {}
+        self._lock = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+        self.hierarchy = UiHierarchy(ET.Element("hierarchy"))
+        if hierarchy is not None:
+            self.load(hierarchy)
+
+    # --- 生命周期 ---
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.port}"
+
+    def start(self) -> 'FakeAppiumServer':
+        self._thread = threading.Thread(target=self.serve_forever, kwargs={"poll_interval": 0.05},
+                                        name="fake-appium", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> 'FakeAppiumServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    # --- 统计 ---
+    @property
+    def round_trips(self) -> int:
+        """累计 HTTP 往返次数"""
+        return sum(self.stats.values())
+
+    def reset_stats(self) -> None:
+        self.stats.clear()
+
+    # --- 层级树 ---
+    def load(self, hierarchy: UiHierarchy | str | Path) -> None:
+        """
+        切换当前屏幕的 UI 层级，之前返回的元素 ID 全部失效。
+        :param hierarchy: UiHierarchy、XML 字符串或文件路径
+        """
+        if isinstance(hierarchy, Path) or (isinstance(hierarchy, str) and not hierarchy.lstrip().startswith("<")):
+            hierarchy = UiHierarchy.from_file(hierarchy)
+        elif isinstance(hierarchy, str):
+            hierarchy = UiHierarchy.from_string(hierarchy)
+        with self._lock:
+            self.hierarchy = hierarchy
+            self._elements.clear()
+            self._element_ids.clear()
+
+    def remove(self, node: ET.Element) -> None:
+        """从当前层级中移除节点 (如点击关闭弹窗)，该节点及其子节点的元素 ID 失效"""
+        with self._lock:
+            parent = self.hierarchy.parent(node)
+            if parent is not None:
+                parent.remove(node)
+                self.hierarchy = UiHierarchy(self.hierarchy.root)
+
+    def _attached(self, node: ET.Element) -> bool:
+        return node is self.hierarchy.root or self.hierarchy.parent(node) is not None
+
+    def _element_id(self, node: ET.Element) -> str:
+        eid = self._element_ids.get(id(node))
+        if eid is None or self._elements.get(eid) is not node:
+            eid = uuid.uuid4().hex
+            self._element_ids[id(node)] = eid
+            self._elements[eid] = node
+        return eid
+
+    def _node(self, eid: str) -> ET.Element:
+        node = self._elements.get(eid)
+        if node is None or not self._attached(node):
+            raise W3CError(404, "stale element reference", f"元素 {eid} 已不在当前页面")
+        return node
+
+    def _find(self, body: dict, scope: Optional[ET.Element] = None) -> list[ET.Element]:
+        using, value = body.get("using"), body.get("value")
+        try:
+            nodes = self.hierarchy.find(using, value)
+        except ValueError as e:
+            raise W3CError(400, "invalid selector", str(e))
+        if scope is not None:
+            descendants = set(scope.iter()) - {scope}
+            nodes = [n for n in nodes if n in descendants]
+        return nodes
+
+    # --- 节点属性 ---
+    @staticmethod
+    def node_text(node: ET.Element) -> str:
+        return node.get("text") or node.get("label") or node.get("value") or ""
+
+    @staticmethod
+    def node_rect(node: ET.Element) -> dict:
+        match = _BOUNDS_RE.match(node.get("bounds", ""))
+        if match:
+            x1, y1, x2, y2 = map(int, match.groups())
+            return {"x": x1, "y": y1, "width": x2 - x1, "height": y2 - y1}
+        if node.get("width"):
+            return {k: int(node.get(k, 0)) for k in ("x", "y", "width", "height")}
+        return {"x": 0, "y": 0, "width": 100, "height": 100}
+
+    # --- 扩展点 ---
+    def on_click(self, node: ET.Element) -> None:
+        """点击元素后的副作用 (默认无)"""
+
+    def on_actions(self, actions: list[dict]) -> None:
+        """W3C Actions (滑动、长按等) 的副作用 (默认无)"""
+
+    def on_back(self) -> None:
+        """返回键的副作用 (默认无)"""
+
+    def on_execute(self, script: str, args: list) -> Any:
+        """
+        execute_script / mobile: 命令的返回值。
+        :param script: 脚本或 mobile: 命令名
+        :param args: 参数
+        """
+        if script == "mobile: queryAppState":
+            return 4
+        if script == "mobile: terminateApp":
+            return True
+        return None
+
+    # --- 请求分发 ---
+    def dispatch(self, method: str, path: str, body: dict) -> tuple[int, Any]:
+        """
+        处理一次 W3C 请求。
+        :param method: HTTP 方法
+        :param path: 请求路径 (不含查询参数)
+        :param body: JSON 请求体
+        :return: (HTTP 状态码, value)
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            try:
+                return 200, self._route(method, path.rstrip("/"), body)
+            except W3CError as e:
+                return e.status, {"error": e.error, "message": str(e), "stacktrace": ""}
+
+    def _route(self, method: str, path: str, body: dict) -> Any:
+        if method == "POST" and path == "/session":
+            self.stats["POST /session"] += 1
+            session_id = uuid.uuid4().hex
+            self.sessions.add(session_id)
+            # 与 Appium 一致：返回的 capabilities 包含请求中的 caps (去掉 appium: 前缀)
+            requested = body.get("capabilities", {}).get("alwaysMatch", {})
+            caps = {key.removeprefix("appium:"): value for key, value in requested.items()}
+            return {"sessionId": session_id, "capabilities": {**self.capabilities, **caps}}
+        if path == "/status":
+            self.stats["GET /status"] += 1
+            return {"ready": True, "message": "fake appium"}
+
+        match = _SESSION_RE.match(path)
+        if not match:
+            raise W3CError(404, "unknown command", path)
+        session_id, rest = match.group(1), match.group(2) or ""
+        # 元素 ID、属性名归一化为占位符，便于按命令统计
+        route = re.sub(r"/attribute/.+$", "/attribute/:name", re.sub(r"/element/[^/]+", "/element/:id", rest))
+        if session_id not in self.sessions:
+            self.stats[f"{method} {route}"] += 1
+            raise W3CError(404, "invalid session id", f"会话 {session_id} 不存在")
+
+        handler = _ROUTES.get((method, route))
+        self.stats[f"{method if handler else '?' + method} {route}"] += 1
+        if handler is None:
+            return None
+        parts = rest.split("/")
+        eid = parts[2] if len(parts) > 2 and parts[1] == "element" else None
+        return handler(self, session_id=session_id, eid=eid, body=body, rest=rest)
+
+    # --- 命令实现 ---
+    def _delete_session(self, session_id: str, **_) -> None:
+        self.sessions.discard(session_id)
+
+    def _get_timeouts(self, **_) -> dict:
+        return {"implicit": int(self.implicit_wait * 1000), "pageLoad": 300000, "script": 30000}
+
+    def _set_timeouts(self, body: dict, **_) -> None:
+        if "implicit" in body:
+            self.implicit_wait = body["implicit"] / 1000
+
+    def _find_element(self, body: dict, eid: Optional[str] = None, **_) -> dict:
+        nodes = self._find(body, self._node(eid) if eid else None)
+        if not nodes:
+            raise W3CError(404, "no such element", f"未找到元素: {body.get('using')}={body.get('value')}")
+        return {"element-6066-11e4-a52e-4f735466cecf": self._element_id(nodes[0])}
+
+    def _find_elements(self, body: dict, eid: Optional[str] = None, **_) -> list[dict]:
+        return [{"element-6066-11e4-a52e-4f735466cecf": self._element_id(n)}
+                for n in self._find(body, self._node(eid) if eid else None)]
+
+    def _click(self, eid: str, **_) -> None:
+        self.on_click(self._node(eid))
+
+    def _send_keys(self, eid: str, body: dict, **_) -> None:
+        node = self._node(eid)
+        node.set("text", self.node_text(node) + (body.get("text") or "".join(body.get("value", []))))
+
+    def _clear(self, eid: str, **_) -> None:
+        self._node(eid).set("text", "")
+
+    def _text(self, eid: str, **_) -> str:
+        return self.node_text(self._node(eid))
+
+    def _attribute(self, eid: str, rest: str, **_) -> Optional[str]:
+        return self._node(eid).get(rest.rsplit("/", 1)[-1])
+
+    def _displayed(self, eid: str, **_) -> bool:
+        node = self._node(eid)
+        return node.get("displayed", node.get("visible", "true")) != "false"
+
+    def _enabled(self, eid: str, **_) -> bool:
+        return self._node(eid).get("enabled", "true") != "false"
+
+    def _selected(self, eid: str, **_) -> bool:
+        return self._node(eid).get("selected", "false") == "true"
+
+    def _name(self, eid: str, **_) -> str:
+        return self.hierarchy.class_name(self._node(eid))
+
+    def _rect(self, eid: str, **_) -> dict:
+        return self.node_rect(self._node(eid))
+
+    def _element_screenshot(self, eid: str, **_) -> str:
+        self._node(eid)
+        return base64.b64encode(BLANK_PNG).decode()
+
+    def _screenshot(self, **_) -> str:
+        return base64.b64encode(BLANK_PNG).decode()
+
+    def _source(self, **_) -> str:
+        return ET.tostring(self.hierarchy.root, encoding="unicode")
+
+    def _window_rect(self, **_) -> dict:
+        return dict(WINDOW_RECT)
+
+    def _perform_actions(self, body: dict, **_) -> None:
+        self.on_actions(body.get("actions", []))
+
+    def _back(self, **_) -> None:
+        self.on_back()
+
+    def _execute(self, body: dict, **_) -> Any:
+        return self.on_execute(body.get("script", ""), body.get("args", []))
+
+    def _contexts(self, **_) -> list[str]:
+        return ["NATIVE_APP"]
+
+    def _context(self, **_) -> str:
+        return "NATIVE_APP"
+
+    def _app_state(self, body: dict, **_) -> int:
+        return self.on_execute("mobile: queryAppState", [body])
+
+    def _activate_app(self, body: dict, **_) -> Any:
+        return self.on_execute("mobile: activateApp", [body])
+
+    def _terminate_app(self, body: dict, **_) -> Any:
+        return self.on_execute("mobile: terminateApp", [body])
+
+    def _none(self, **_) -> None:
+        return None
+
+
+_ROUTES = {
+    ("DELETE", ""): FakeAppiumServer._delete_session,
+    ("GET", "/timeouts"): FakeAppiumServer._get_timeouts,
+    ("POST", "/timeouts"): FakeAppiumServer._set_timeouts,
+    ("POST", "/element"): FakeAppiumServer._find_element,
+    ("POST", "/elements"): FakeAppiumServer._find_elements,
+    ("POST", "/element/:id/element"): FakeAppiumServer._find_element,
+    ("POST", "/element/:id/elements"): FakeAppiumServer._find_elements,
+    ("POST", "/element/:id/click"): FakeAppiumServer._click,
+    ("POST", "/element/:id/value"): FakeAppiumServer._send_keys,
+    ("POST", "/element/:id/clear"): FakeAppiumServer._clear,
+    ("GET", "/element/:id/text"): FakeAppiumServer._text,
+    ("GET", "/element/:id/attribute/:name"): FakeAppiumServer._attribute,
+    ("GET", "/element/:id/displayed"): FakeAppiumServer._displayed,
+    ("GET", "/element/:id/enabled"): FakeAppiumServer._enabled,
+    ("GET", "/element/:id/selected"): FakeAppiumServer._selected,
+    ("GET", "/element/:id/name"): FakeAppiumServer._name,
+    ("GET", "/element/:id/rect"): FakeAppiumServer._rect,
+    ("GET", "/element/:id/screenshot"): FakeAppiumServer._element_screenshot,
+    ("GET", "/screenshot"): FakeAppiumServer._screenshot,
+    ("GET", "/source"): FakeAppiumServer._source,
+    ("GET", "/window/rect"): FakeAppiumServer._window_rect,
+    ("GET", "/window/current/size"): FakeAppiumServer._window_rect,
+    ("POST", "/actions"): FakeAppiumServer._perform_actions,
+    ("DELETE", "/actions"): FakeAppiumServer._none,
+    ("POST", "/back"): FakeAppiumServer._back,
+    ("POST", "/execute/sync"): FakeAppiumServer._execute,
+    ("GET", "/contexts"): FakeAppiumServer._contexts,
+    ("GET", "/context"): FakeAppiumServer._context,
+    ("POST", "/context"): FakeAppiumServer._none,
+    ("POST", "/appium/device/app_state"): FakeAppiumServer._app_state,
+    ("POST", "/appium/device/activate_app"): FakeAppiumServer._activate_app,
+    ("POST", "/appium/device/terminate_app"): FakeAppiumServer._terminate_app,
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeAppiumServer
+    protocol_version = "HTTP/1.1"
+    # 长连接下小响应包会触发 Nagle + 延迟确认，每次往返多出约 40ms
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _handle(self, method: str) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            body = {}
+        status, value = self.server.dispatch(method, self.path.split("?", 1)[0], body)
+        payload = json.dumps({"value": value}, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+    def do_DELETE(self) -> None:
+        self._handle("DELETE")
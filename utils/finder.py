@@ -11,8 +11,6 @@
 """
 from typing import Literal, Final
 
-from appium.webdriver.common.appiumby import AppiumBy
-
 ByType = Literal[
     # By(selenium)
     "id", "xpath", "link text", "partial link text", "name", "tag name", "class name", "css selector",
@@ -41,20 +39,33 @@ class FinderConverter:
     提供策略的归一化处理、简写映射及动态自定义注册
     """
 
-    # 预设的常用简写
+    # 预设的常用简写 (值与 AppiumBy 常量一致，这里直接写字面量，避免导入 AppiumBy)
     _BUILTIN_SHORTCUTS: Final = {
-        "aid": AppiumBy.ACCESSIBILITY_ID,
-        "class": AppiumBy.CLASS_NAME,
-        "css": AppiumBy.CSS_SELECTOR,
-        "uiautomator": AppiumBy.ANDROID_UIAUTOMATOR,
-        "predicate": AppiumBy.IOS_PREDICATE,
-        "chain": AppiumBy.IOS_CLASS_CHAIN,
+        "aid": "accessibility id",
+        "class": "class name",
+        "css": "css selector",
+        "uiautomator": "-android uiautomator",
+        "predicate": "-ios predicate string",
+        "chain": "-ios class chain",
     }
 
     def __init__(self):
-        self._finder_map: dict[str, str] = {}
+        self._map: dict[str, str] = {}
         self._map_cache: dict[str, str] = {}
-        self._initialize()
+
+    @property
+    def _finder_map(self) -> dict[str, str]:
+        """
+        首次使用时才初始化映射表。
+        导入 AppiumBy 会连带加载整个 Appium 客户端 (约 0.2s)，延迟到真正转换定位方式时再付出这部分开销。
+        """
+        if not self._map_cache:
+            self._initialize()
+        return self._map
+
+    @_finder_map.setter
+    def _finder_map(self, value: dict[str, str]) -> None:
+        self._map = value
 
     @staticmethod
     def _normalize(text: str) -> str:
@@ -67,6 +78,8 @@ class FinderConverter:
 
     def _initialize(self) -> None:
         """初始化基础映射表"""
+        from appium.webdriver.common.appiumby import AppiumBy
+
         # 1. 动态加载 AppiumBy 常量值
         for attr_name in dir(AppiumBy):
             if attr_name.startswith("_"):
@@ -75,13 +88,13 @@ class FinderConverter:
             attr_value = getattr(AppiumBy, attr_name)
             if isinstance(attr_value, str):
                 # "class name" -> classname,"class_name" -> classname
-                self._finder_map[self._normalize(attr_value)] = attr_value
+                self._map[self._normalize(attr_value)] = attr_value
 
         # 2. 加载内置简写（会覆盖同名的策略）
-        self._finder_map.update(self._BUILTIN_SHORTCUTS)
+        self._map.update(self._BUILTIN_SHORTCUTS)
 
         # 3. 备份初始状态
-        self._map_cache = self._finder_map.copy()
+        self._map_cache = self._map.copy()
 
     def convert(self, by_value: ByType | str) -> str:
         """
@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: html_report
+@date: 2026/10/19 22:10
+@desc: 纯 Python 增量 HTML 报告：读取 Allure 原始结果 (*-result.json)，用例结束即追加详情页并刷新汇总页，无需 Java
+
+- 每个结果文件只解析一次，已处理的文件记录在输出目录的 state.json 中，重复调用 update() 只处理新增结果；
+- 详情页 (tests/<uuid>.html) 生成后不再改写，汇总页 (index.html) 由状态文件重建，运行期间自动刷新；
+- 附件以硬链接 (跨设备时复制) 放入输出目录，清理 ALLURE_TEMP 后报告仍然完整；
+- 同一用例的多次执行 (失败重跑) 按 historyId 归并，汇总页展示最后一次结果与重跑次数。
+"""
+import argparse
+import datetime
+import html
+import json
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional
+
+from core.settings import ALLURE_TEMP, HTML_REPORT_DIR, REPORT_POLL_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ("passed", "failed", "broken", "skipped", "unknown")
+
+_STYLE = """
+body{font-family:-apple-system,"Segoe UI","Microsoft YaHei",sans-serif;margin:24px;color:#222}
+table{border-collapse:collapse;width:100%}th,td{border-bottom:1px solid #eee;padding:6px 8px;text-align:left}
+.passed{color:#2e7d32}.failed{color:#c62828}.broken{color:#ef6c00}.skipped{color:#757575}.unknown{color:#6a1b9a}
+.badge{display:inline-block;margin-right:16px;font-size:18px}pre{background:#f6f8fa;padding:8px;overflow:auto}
+ul.steps{list-style:none;padding-left:18px}ul.steps li{margin:2px 0}
+"""
+
+
+def _fmt_time(ms: Optional[int]) -> str:
+    return datetime.datetime.fromtimestamp(ms / 1000).strftime("%H:%M:%S") if ms else "-"
+
+
+def _duration(item: dict) -> float:
+    return max(0, (item.get("stop") or 0) - (item.get("start") or 0)) / 1000
+
+
+def _page(title: str, body: str, refresh: Optional[int] = None) -> str:
+    meta = f'<meta http-equiv="refresh" content="{refresh}">' if refresh else ""
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8">{meta}<title>{html.escape(title)}</title>'
+            f"<style>{_STYLE}</style></head><body>{body}</body></html>")
+
+
+class IncrementalReport:
+    """增量 HTML 报告构建器"""
+
+    def __init__(self, results_dir: Path | str | list[Path | str] = ALLURE_TEMP,
+                 output_dir: Path | str = HTML_REPORT_DIR):
+        """
+        :param results_dir: Allure 原始结果目录，多设备并行时可传入各设备的结果目录列表
+        :param output_dir: HTML 报告输出目录
+        """
+        self.results_dirs = [Path(results_dir)] if isinstance(results_dir, (str, Path)) else list(map(Path, results_dir))
+        self.output_dir = Path(output_dir)
+        self.state_file = self.output_dir / "state.json"
+        self._lock = threading.Lock()
+        self._state = self._load_state()
+
+    def _load_state(self) -> dict:
+        if self.state_file.exists():
+            try:
+                return json.loads(self.state_file.read_text(encoding="utf-8"))
+            except ValueError:
+                logger.warning(f"报告状态文件损坏，重新生成: {self.state_file}")
+        return {"processed": [], "tests": {}}
+
+    @property
+    def results_dir(self) -> Path:
+        """第一个结果目录"""
+        return self.results_dirs[0]
+
+    def watch_dirs(self, dirs: list[Path | str]) -> None:
+        """
+        切换监听的结果目录 (多设备模式下设备确定后改为监听各设备的 alluredir)，已处理的结果不受影响。
+        :param dirs: 结果目录列表
+        """
+        with self._lock:
+            self.results_dirs = list(map(Path, dirs))
+
+    def reset(self) -> None:
+        """清空输出目录，重新开始一份报告"""
+        with self._lock:
+            shutil.rmtree(self.output_dir, ignore_errors=True)
+            self._state = {"processed": [], "tests": {}}
+
+    # --- 增量更新 ---
+    def update(self, live: bool = True) -> int:
+        """
+        处理新增的结果文件并刷新汇总页。
+        :param live: 汇总页是否自动刷新 (运行结束后传 False)
+        :return: 本次新增的结果数量
+        """
+        with self._lock:
+            files = sorted((file for results_dir in self.results_dirs if results_dir.exists()
+                            for file in results_dir.glob("*-result.json")), key=lambda f: f.name)
+            processed = set(self._state["processed"])
+            added = 0
+            for file in files:
+                if file.name in processed:
+                    continue
+                try:
+                    result = json.loads(file.read_text(encoding="utf-8"))
+                except ValueError:
+                    # 文件仍在写入，下次再处理
+                    continue
+                self._add(result)
+                self._state["processed"].append(file.name)
+                added += 1
+            if added or not live:
+                self._write_index(live)
+                self.state_file.write_text(json.dumps(self._state, ensure_ascii=False), encoding="utf-8")
+            return added
+
+    def _add(self, result: dict) -> None:
+        uuid = result.get("uuid") or str(len(self._state["processed"]))
+        self._write_test_page(uuid, result)
+
+        key = result.get("historyId") or uuid
+        labels = {label.get("name"): label.get("value") for label in result.get("labels", [])}
+        row = {
+            "uuid": uuid,
+            "name": result.get("name", ""),
+            "fullName": result.get("fullName", ""),
+            "suite": labels.get("suite") or labels.get("parentSuite") or "",
+            "status": result.get("status", "unknown"),
+            "start": result.get("start"),
+            "duration": _duration(result),
+            "message": (result.get("statusDetails") or {}).get("message", "")[:200],
+            "attempts": 1,
+        }
+        previous = self._state["tests"].get(key)
+        if previous:
+            row["attempts"] = previous["attempts"] + 1
+            if (previous.get("start") or 0) > (row.get("start") or 0):
+                row = {**previous, "attempts": row["attempts"]}
+        self._state["tests"][key] = row
+
+    # --- 页面渲染 ---
+    def _link_attachment(self, source: str) -> Optional[str]:
+        """将附件放入输出目录 (优先硬链接)，返回相对详情页的路径"""
+        # 附件与结果文件位于同一目录，多个结果目录时逐个查找
+        src = next((d / source for d in self.results_dirs if source and (d / source).exists()), None)
+        dest = self.output_dir / "attachments" / source
+        if src is None:
+            return None
+        if not dest.exists():
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(src, dest)
+            except OSError:
+                shutil.copy2(src, dest)
+        return f"../attachments/{source}"
+
+    def _render_attachments(self, attachments: list[dict]) -> str:
+        items = []
+        for att in attachments or []:
+            href = self._link_attachment(att.get("source", ""))
+            name = html.escape(att.get("name") or att.get("source", ""))
+            if href is None:
+                items.append(f"<li>📎 {name} (缺失)</li>")
+            elif (att.get("type") or "").startswith("image/"):
+                items.append(f'<li>📎 <a href="{href}">{name}</a><br><img src="{href}" style="max-width:320px"></li>')
+            else:
+                items.append(f'<li>📎 <a href="{href}">{name}</a></li>')
+        return "".join(items)
+
+    def _render_steps(self, steps: list[dict]) -> str:
+        if not steps:
+            return ""
+        items = []
+        for step in steps:
+            status = step.get("status", "unknown")
+            params = ", ".join(f"{p.get('name')}={p.get('value')}" for p in step.get("parameters", []))
+            items.append(
+                f'<li><span class="{status}">●</span> {html.escape(step.get("name", ""))}'
+                f'{f" <small>({html.escape(params)})</small>" if params else ""} '
+                f"<small>{_duration(step):.2f}s</small>"
+                f"{self._render_attachments(step.get('attachments'))}{self._render_steps(step.get('steps'))}</li>"
+            )
+        return f'<ul class="steps">{"".join(items)}</ul>'
+
+    def _write_test_page(self, uuid: str, result: dict) -> None:
+        status = result.get("status", "unknown")
+        details = result.get("statusDetails") or {}
+        params = "".join(f"<tr><td>{html.escape(str(p.get('name')))}</td><td>{html.escape(str(p.get('value')))}</td></tr>"
+                         for p in result.get("parameters", []))
+        labels = ", ".join(f"{label.get('name')}={label.get('value')}" for label in result.get("labels", []))
+        sections = []
+        if result.get("description"):
+            sections.append(f"<p>{html.escape(result['description'])}</p>")
+        if params:
+            sections.append(f"<table>{params}</table>")
+        if details.get("message"):
+            sections.append(f"<h3>错误信息</h3><pre>{html.escape(details['message'])}</pre>")
+        if details.get("trace"):
+            sections.append(f"<details><summary>堆栈</summary><pre>{html.escape(details['trace'])}</pre></details>")
+        body = (
+            f'<p><a href="../index.html">← 返回汇总</a></p>'
+            f'<h2 class="{status}">[{status}] {html.escape(result.get("name", ""))}</h2>'
+            f'<p><code>{html.escape(result.get("fullName", ""))}</code></p>'
+            f"<p>开始 {_fmt_time(result.get('start'))}，耗时 {_duration(result):.2f}s</p>"
+            f"{''.join(sections)}"
+            f"<h3>步骤</h3>{self._render_steps(result.get('steps')) or '<p>-</p>'}"
+            f"<h3>附件</h3><ul>{self._render_attachments(result.get('attachments')) or '<li>-</li>'}</ul>"
+            f"<p><small>{html.escape(labels)}</small></p>"
+        )
+        path = self.output_dir / "tests" / f"{uuid}.html"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(_page(result.get("name", uuid), body), encoding="utf-8")
+
+    def _write_index(self, live: bool) -> None:
+        rows = sorted(self._state["tests"].values(), key=lambda r: r.get("start") or 0)
+        counts = {status: sum(r["status"] == status for r in rows) for status in STATUSES}
+        badges = "".join(f'<span class="badge {s}">{s}: {n}</span>' for s, n in counts.items() if n)
+        table = "".join(
+            f'<tr><td class="{r["status"]}">{r["status"]}</td>'
+            f'<td><a href="tests/{r["uuid"]}.html">{html.escape(r["name"])}</a><br>'
+            f'<small>{html.escape(r["fullName"])}</small></td>'
+            f'<td>{html.escape(r["suite"])}</td><td>{_fmt_time(r.get("start"))}</td><td>{r["duration"]:.2f}s</td>'
+            f'<td>{r["attempts"] - 1 or ""}</td><td><small>{html.escape(r["message"])}</small></td></tr>'
+            for r in rows
+        )
+        state = "运行中，页面每 {} 秒自动刷新".format(max(int(REPORT_POLL_INTERVAL), 1)) if live else "运行结束"
+        body = (
+            f"<h1>测试报告</h1><p>{state} · 更新于 {datetime.datetime.now():%Y-%m-%d %H:%M:%S} · 共 {len(rows)} 个用例</p>"
+            f"<p>{badges}</p><table><tr><th>状态</th><th>用例</th><th>套件</th><th>开始</th><th>耗时</th>"
+            f"<th>重跑</th><th>信息</th></tr>{table}</table>"
+        )
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.output_dir / "index.html.tmp"
+        tmp.write_text(_page("测试报告", body, refresh=max(int(REPORT_POLL_INTERVAL), 1) if live else None),
+                       encoding="utf-8")
+        os.replace(tmp, self.output_dir / "index.html")
+
+
+class ReportWatcher:
+    """
+    后台线程定期调用 IncrementalReport.update()，测试运行期间即可在浏览器中查看已完成的用例。
+    支持 with 语句：退出时做最后一次更新并关闭自动刷新。
+    """
+
+    def __init__(self, report: IncrementalReport, interval: float = REPORT_POLL_INTERVAL):
+        self.report = report
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="html-report-watcher", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.report.update(live=True)
+            except Exception as e:
+                logger.warning(f"增量报告更新失败: {e}")
+
+    def start(self) -> 'ReportWatcher':
+        self._thread.start()
+        logger.info(f"实时 HTML 报告: {self.report.output_dir / 'index.html'}")
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=self.interval * 2)
+        self.report.update(live=False)
+
+    def __enter__(self) -> 'ReportWatcher':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="根据 Allure 原始结果生成纯 Python HTML 报告")
+    parser.add_argument("--results", default=str(ALLURE_TEMP), help="Allure 原始结果目录")
+    parser.add_argument("--output", default=str(HTML_REPORT_DIR), help="HTML 报告输出目录")
+    parser.add_argument("--watch", action="store_true", help="持续监听结果目录，Ctrl+C 结束")
+    parser.add_argument("--clean", action="store_true", help="清空输出目录后重新生成")
+    cli_args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)-5s [%(name)s] - %(message)s")
+    html_report = IncrementalReport(cli_args.results, cli_args.output)
+    if cli_args.clean:
+        html_report.reset()
+    if cli_args.watch:
+        watcher = ReportWatcher(html_report).start()
+        try:
+            watcher._stop.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.stop()
+    else:
+        html_report.update(live=False)
+        print(f"HTML 报告已生成: {Path(cli_args.output) / 'index.html'}")
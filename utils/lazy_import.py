@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: lazy_import
+@date: 2026/10/20 04:20
+@desc: 延迟导入：返回模块占位对象，首次访问属性时才真正执行模块代码。
+       Appium 客户端与 selenium 的等待 / 动作模块导入耗时较长 (合计约 0.3s)，
+       core 与 utils 在模块顶层只登记，等到创建 driver、执行等待时再加载，
+       pytest --collect-only 与不涉及设备的单元测试不再为此付出启动开销。
+
+用法:
+    EC = lazy_import("selenium.webdriver.support.expected_conditions")
+    EC.presence_of_element_located(...)   # 此时才导入
+
+注意: 仅类型注解用到的名称放在 TYPE_CHECKING 分支中导入，而不是使用本函数。
+"""
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    延迟导入模块。
+    :param name: 模块全名
+    :return: 已导入则直接返回模块，否则返回首次访问属性时才加载的模块对象
+    :raises ModuleNotFoundError: 模块不存在 (查找模块本身不执行其代码，仍在调用时立即报错)
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
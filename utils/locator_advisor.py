@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: locator_advisor
+@date: 2026/10/19 10:12
+@desc: 定位符性能分析：运行时记录定位耗时，并结合 page_objects 生成慢定位排行与优化建议
+"""
+import argparse
+import ast
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+from core.settings import BASE_DIR, LOCATOR_PROFILE_PATH
+from utils.finder import by_converter
+
+logger = logging.getLogger(__name__)
+
+PAGE_OBJECTS_DIR = BASE_DIR / "page_objects"
+
+# 平均耗时超过该阈值 (秒) 的快速策略，提示检查等待条件而不是定位方式
+SLOW_WAIT_THRESHOLD = 1.0
+
+
+def _write_json(path: Path | str, data: Any) -> Path:
+    """先写临时文件再替换，读取方不会看到写了一半的文件"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+    return path
+
+
+class LocatorProfiler:
+    """
+    定位耗时记录器。
+    以 (标准化策略, 定位值) 为键累计每次定位的耗时，记录开销仅为一次 perf_counter 与字典更新。
+    """
+
+    def __init__(self):
+        self._stats: dict[tuple[str, str], dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, by: str, value: str, duration: float, found: bool = True) -> None:
+        """
+        记录一次定位结果。
+        :param by: 标准化后的定位策略
+        :param value: 定位值
+        :param duration: 耗时 (秒)
+        :param found: 是否定位成功
+        """
+        with self._lock:
+            stat = self._stats.setdefault((by, value), {"count": 0, "total": 0.0, "max": 0.0, "failures": 0})
+            stat["count"] += 1
+            stat["total"] += duration
+            stat["max"] = max(stat["max"], duration)
+            if not found:
+                stat["failures"] += 1
+
+    @contextmanager
+    def track(self, by: str, value: str) -> Iterator[None]:
+        """
+        上下文管理器：统计代码块内一次定位的耗时，异常视为定位失败并继续抛出。
+        :param by: 标准化后的定位策略
+        :param value: 定位值
+        """
+        start = time.perf_counter()
+        found = False
+        try:
+            yield
+            found = True
+        finally:
+            self.record(by, value, time.perf_counter() - start, found)
+
+    def snapshot(self) -> list[dict]:
+        """返回当前统计数据的副本 (可直接序列化为 JSON)"""
+        with self._lock:
+            return [{"by": by, "value": value, **stat} for (by, value), stat in self._stats.items()]
+
+    def dump(self, path: Path | str = LOCATOR_PROFILE_PATH) -> Optional[Path]:
+        """
+        将统计数据写入 JSON 文件，无数据时跳过。
+        :param path: 输出文件路径
+        :return: 实际写入的路径
+        """
+        records = self.snapshot()
+        if not records:
+            return None
+        path = _write_json(path, records)
+        logger.info(f"定位耗时数据已写入: {path}")
+        return path
+
+    def reset(self) -> None:
+        """清空统计数据"""
+        with self._lock:
+            self._stats.clear()
+
+
+@dataclass
+class LocatorRef:
+    """page_objects 中声明的定位符"""
+    page: str
+    attr: str
+    by: str
+    value: str
+    file: str
+    lineno: int
+
+    @property
+    def source(self) -> str:
+        return f"{self.page}.{self.attr}"
+
+
+def _normalize_by(by: str) -> Optional[str]:
+    """将定位策略转换为标准值，不支持的策略返回 None"""
+    try:
+        return by_converter(by)
+    except (ValueError, TypeError):
+        return None
+
+
+def scan_page_objects(root: Path | str = PAGE_OBJECTS_DIR) -> list[LocatorRef]:
+    """
+    静态扫描 page_objects 目录，提取类属性中声明的定位符元组 (by, value)。
+    :param root: page_objects 目录
+    :return: 定位符列表
+    """
+    refs = []
+    for file in sorted(Path(root).rglob("*.py")):
+        try:
+            tree = ast.parse(file.read_text(encoding="utf-8"), filename=str(file))
+        except SyntaxError as e:
+            logger.warning(f"跳过无法解析的文件 {file}: {e}")
+            continue
+
+        for cls in (node for node in ast.walk(tree) if isinstance(node, ast.ClassDef)):
+            for stmt in cls.body:
+                if not (isinstance(stmt, ast.Assign) and isinstance(stmt.value, ast.Tuple)):
+                    continue
+                elts = stmt.value.elts
+                if len(elts) != 2 or not all(isinstance(e, ast.Constant) and isinstance(e.value, str) for e in elts):
+                    continue
+                by = _normalize_by(elts[0].value)
+                if by is None:
+                    continue
+                for target in stmt.targets:
+                    if isinstance(target, ast.Name):
+                        refs.append(LocatorRef(cls.name, target.id, by, elts[1].value, file.name, stmt.lineno))
+    return refs
+
+
+def suggest(by: str, value: str, mean: float = 0.0) -> str:
+    """
+    根据定位策略给出优化建议。
+    :param by: 标准化后的定位策略
+    :param value: 定位值
+    :param mean: 平均耗时 (秒)
+    :return: 建议文本，无建议时返回空字符串
+    """
+    match by:
+        case "xpath":
+            wildcard = value.lstrip("(").startswith("//*")
+            if wildcard and "contains(" in value:
+                return "XPath contains on //* → use resource-id (全树扫描+模糊匹配，改用 resource-id 或 accessibility id)"
+            if wildcard:
+                return "XPath //* 需遍历整棵树 → 改用 resource-id / accessibility id，至少指定节点类名"
+            if re.search(r"\[\d+]", value):
+                return "XPath 依赖位置索引，慢且易失效 → 改用唯一属性定位"
+            return "XPath 需服务端导出完整层级 → 优先 resource-id / accessibility id / UiSelector"
+        case "-android uiautomator":
+            if re.search(r"(textContains|textMatches|textStartsWith|descriptionContains|descriptionMatches)\(", value):
+                return "UiSelector 模糊匹配 → 改用 resourceId() 或精确 text()"
+            if "resourceId(" not in value and re.search(r"\.(text|description)\(", value):
+                return "UiSelector 按文案匹配，文案变化即失效 → 节点有 resource-id 时改用 id"
+        case "class name":
+            return "类名通常匹配多个节点 → 改用 resource-id 或 accessibility id"
+    if mean >= SLOW_WAIT_THRESHOLD:
+        return "策略本身已足够快，耗时主要来自等待元素出现 → 检查前置步骤与超时设置"
+    return ""
+
+
+def load_profile(path: Path | str = LOCATOR_PROFILE_PATH) -> list[dict]:
+    """
+    读取运行时记录的定位耗时数据。
+    :param path: 数据文件路径
+    :return: 记录列表
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"未找到定位耗时数据: {path}，请先执行一次测试。")
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def merge_profiles(files: Iterable[Path | str], dest: Path | str = LOCATOR_PROFILE_PATH) -> Optional[Path]:
+    """
+    合并多个工作进程的定位耗时数据 (同一定位符的次数、总耗时、失败次数累加，最大耗时取最大值)。
+    :param files: 各工作进程的数据文件，不存在的文件忽略
+    :param dest: 输出文件
+    :return: 输出文件路径，没有可合并的数据时返回 None
+    """
+    merged: dict[tuple[str, str], dict] = {}
+    for file in map(Path, files):
+        if not file.exists():
+            continue
+        for record in json.loads(file.read_text(encoding="utf-8")):
+            stat = merged.setdefault((record["by"], record["value"]),
+                                     {"by": record["by"], "value": record["value"],
+                                      "count": 0, "total": 0.0, "max": 0.0, "failures": 0})
+            for key in ("count", "total", "failures"):
+                stat[key] += record.get(key, 0)
+            stat["max"] = max(stat["max"], record.get("max", 0.0))
+    if not merged:
+        return None
+    path = _write_json(dest, list(merged.values()))
+    logger.info(f"定位耗时数据已合并: {path}")
+    return path
+
+
+def build_report(profile: list[dict], refs: list[LocatorRef]) -> list[dict]:
+    """
+    合并运行时耗时与静态扫描结果，按总耗时降序排列。
+    未在 page_objects 中声明的定位符 (如 BasePage 内置弹窗黑名单) 来源记为 "运行时"。
+    :param profile: 运行时记录
+    :param refs: 静态扫描得到的定位符
+    :return: 排行数据
+    """
+    sources: dict[tuple[str, str], list[str]] = {}
+    for ref in refs:
+        sources.setdefault((ref.by, ref.value), []).append(ref.source)
+
+    rows = []
+    for record in profile:
+        by = _normalize_by(record["by"]) or record["by"]
+        value = record["value"]
+        count = record["count"] or 1
+        mean = record["total"] / count
+        rows.append({
+            "by": by,
+            "value": value,
+            "count": record["count"],
+            "total": record["total"],
+            "mean": mean,
+            "max": record["max"],
+            "failures": record.get("failures", 0),
+            "source": ", ".join(sources.get((by, value), ["运行时"])),
+            "suggestion": suggest(by, value, mean),
+        })
+    rows.sort(key=lambda r: r["total"], reverse=True)
+    return rows
+
+
+def format_report(rows: list[dict], top: int = 20) -> str:
+    """
+    将排行数据格式化为文本表格。
+    :param rows: build_report 的结果
+    :param top: 展示的条数
+    :return: 文本报告
+    """
+    lines = [f"{'#':>3} {'总耗时':>8} {'次数':>5} {'平均':>7} {'最大':>7} {'失败':>4}  策略 / 定位值 / 来源"]
+    for idx, row in enumerate(rows[:top], 1):
+        lines.append(
+            f"{idx:>3} {row['total']:>7.2f}s {row['count']:>5} {row['mean']:>6.2f}s {row['max']:>6.2f}s "
+            f"{row['failures']:>4}  [{row['by']}] {row['value']}  <- {row['source']}"
+        )
+        if row["suggestion"]:
+            lines.append(f"{'':>42}建议: {row['suggestion']}")
+    return "\n".join(lines)
+
+
+# 全局单例，供 CoreDriver 记录定位耗时
+locator_profiler = LocatorProfiler()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="定位符性能分析报告")
+    parser.add_argument("--profile", default=str(LOCATOR_PROFILE_PATH), help="运行时定位耗时数据 (JSON)")
+    parser.add_argument("--pages", default=str(PAGE_OBJECTS_DIR), help="page_objects 目录")
+    parser.add_argument("--top", type=int, default=20, help="展示最慢的前 N 个定位符")
+    cli_args = parser.parse_args()
+
+    report_rows = build_report(load_profile(cli_args.profile), scan_page_objects(cli_args.pages))
+    print(format_report(report_rows, cli_args.top))
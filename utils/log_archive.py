@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: log_archive
+@date: 2026/10/20 00:10
+@desc: 压缩并建立索引的日志归档：上次运行的日志移入 LOG_BACKUP_DIR 后由后台线程 gzip 压缩，
+       同时提取运行 ID、时间范围与用例 nodeid 写入 index.json；检索时只解压索引命中的归档
+
+注：标准库不包含 zstd，为避免新增依赖使用 gzip (level 6)，文本日志通常可压缩到原大小的 10% 左右。
+"""
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+from core.settings import LOG_BACKUP_DIR, LOG_BACKUP_KEEP
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.json"
+RUN_ID_MARK = "运行 ID: "
+
+_TIME_RE = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})")
+_NODEID_RE = re.compile(r"([\w./\\-]+\.py::[^\s\"',]+)")
+_RUN_ID_RE = re.compile(re.escape(RUN_ID_MARK) + r"(\S+)")
+
+
+def _scan_line(line: str, entry: dict, tests: set[str]) -> None:
+    """从一行日志 (文本或 JSON) 中提取时间、运行 ID 与用例 nodeid"""
+    if line.startswith("{"):
+        try:
+            data = json.loads(line)
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            stamp = data.get("time")
+            entry["run_id"] = entry["run_id"] or data.get("session") or None
+            if data.get("test"):
+                tests.add(data["test"])
+            line = data.get("message", "")
+        else:
+            stamp = None
+    else:
+        match = _TIME_RE.match(line)
+        stamp = match.group(1) if match else None
+    if stamp:
+        entry["start"] = entry["start"] or stamp
+        entry["end"] = stamp
+    if not entry["run_id"] and RUN_ID_MARK in line:
+        match = _RUN_ID_RE.search(line)
+        entry["run_id"] = match.group(1) if match else None
+    tests.update(_NODEID_RE.findall(line))
+
+
+class LogArchive:
+    """日志归档目录 (*.log.gz + index.json)"""
+
+    def __init__(self, backup_dir: Path | str = LOG_BACKUP_DIR, keep: int = LOG_BACKUP_KEEP):
+        """
+        :param backup_dir: 归档目录
+        :param keep: 保留的归档数量
+        """
+        self.backup_dir = Path(backup_dir)
+        self.index_path = self.backup_dir / INDEX_FILE
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- 索引 ---
+    def load_index(self) -> list[dict]:
+        if not self.index_path.exists():
+            return []
+        try:
+            return json.loads(self.index_path.read_text(encoding="utf-8"))
+        except ValueError:
+            logger.warning(f"日志索引损坏，将重新建立: {self.index_path}")
+            return []
+
+    def _save_index(self, entries: list[dict]) -> None:
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(entries, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+    # --- 归档 ---
+    def archive(self, source: Path | str, background: bool = True) -> Optional[Path]:
+        """
+        将日志文件移入归档目录 (仅重命名，立即返回)，随后压缩并写入索引。
+        :param source: 日志文件
+        :param background: 是否在后台线程中压缩
+        :return: 移动后的原始日志路径，日志不存在或为空时返回 None
+        """
+        source = Path(source)
+        if not source.exists() or source.stat().st_size == 0:
+            return None
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        raw = self.backup_dir / f"pytest_{time.strftime('%Y%m%d_%H%M%S')}.log"
+        shutil.move(str(source), str(raw))
+        if background:
+            # 非守护线程：主流程结束时解释器会等待压缩完成
+            self._thread = threading.Thread(target=self.compress_pending, name="log-archiver")
+            self._thread.start()
+        else:
+            self.compress_pending()
+        return raw
+
+    def wait(self) -> None:
+        """等待后台压缩完成"""
+        if self._thread is not None:
+            self._thread.join()
+
+    def compress_pending(self) -> int:
+        """
+        压缩归档目录中所有未压缩的 pytest_*.log (含历史遗留的原始日志)，建立索引并清理超出数量的归档。
+        :return: 本次压缩的文件数量
+        """
+        if not self.backup_dir.exists():
+            return 0
+        with self._lock:
+            entries = self.load_index()
+            count = 0
+            for raw in sorted(self.backup_dir.glob("pytest_*.log")):
+                try:
+                    entries.append(self._compress(raw))
+                    count += 1
+                except OSError as e:
+                    logger.error(f"压缩日志失败 {raw}: {e}")
+            entries = self._prune(entries)
+            self._save_index(entries)
+            return count
+
+    def _compress(self, raw: Path) -> dict:
+        target = raw.with_name(raw.name + ".gz")
+        tmp = target.with_name(target.name + ".tmp")
+        entry = {"file": target.name, "run_id": None, "start": None, "end": None, "tests": [],
+                 "raw_size": raw.stat().st_size}
+        tests: set[str] = set()
+        with open(raw, "r", encoding="utf-8", errors="replace") as src, gzip.open(tmp, "wt", encoding="utf-8",
+                                                                                  compresslevel=6) as dst:
+            for line in src:
+                dst.write(line)
+                _scan_line(line.rstrip("\n"), entry, tests)
+        os.replace(tmp, target)
+        raw.unlink()
+        entry["tests"] = sorted(tests)
+        entry["size"] = target.stat().st_size
+        logger.info(f"日志已压缩归档: {target.name} ({entry['raw_size'] / 1024:.0f} KB -> {entry['size'] / 1024:.0f} KB)")
+        return entry
+
+    def _prune(self, entries: list[dict]) -> list[dict]:
+        """清理超出保留数量的归档，并移除文件已不存在的索引项"""
+        # 文件名中的时间戳即归档时间，按名称排序 (压缩后 mtime 会被刷新，不能作为依据)
+        files = sorted(self.backup_dir.glob("pytest_*.log.gz"))
+        while len(files) > self.keep:
+            files.pop(0).unlink(missing_ok=True)
+        existing = {f.name for f in files}
+        return [e for e in entries if e["file"] in existing]
+
+    # --- 检索 ---
+    def select(self, run_id: Optional[str] = None, test: Optional[str] = None, since: Optional[str] = None,
+               until: Optional[str] = None) -> list[dict]:
+        """
+        按索引筛选归档 (时间格式 YYYY-MM-DD[ HH:MM:SS]，按字符串比较，until 按其精度包含当天 / 当时)。
+        :param run_id: 运行 ID (前缀匹配)
+        :param test: 用例 nodeid 片段
+        :param since: 起始时间
+        :param until: 结束时间
+        :return: 命中的索引项 (新的在前)
+        """
+        selected = []
+        for entry in self.load_index():
+            if run_id and not (entry.get("run_id") or "").startswith(run_id):
+                continue
+            if test and not any(test in t for t in entry.get("tests", [])):
+                continue
+            if since and (entry.get("end") or "") < since:
+                continue
+            # 只比较到 until 的精度：--until 2026-10-19 包含当天的日志
+            if until and (entry.get("start") or "9999")[:len(until)] > until:
+                continue
+            selected.append(entry)
+        return sorted(selected, key=lambda e: e.get("start") or "", reverse=True)
+
+    def search(self, pattern: str, ignore_case: bool = False, **filters) -> Iterator[tuple[str, int, str]]:
+        """
+        在索引命中的归档中按正则检索日志行。
+        :param pattern: 正则表达式
+        :param ignore_case: 是否忽略大小写
+        :param filters: 传给 select 的筛选条件
+        :return: (归档文件名, 行号, 日志行)
+        """
+        regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        for entry in self.select(**filters):
+            path = self.backup_dir / entry["file"]
+            if not path.exists():
+                continue
+            with gzip.open(path, "rt", encoding="utf-8", errors="replace") as f:
+                for lineno, line in enumerate(f, 1):
+                    if regex.search(line):
+                        yield entry["file"], lineno, line.rstrip("\n")
@@ -7,6 +7,181 @@
 @contact: t6g888@163.com
 @file: logger
 @date: 2026/1/15 11:30
-@desc: 
+@desc: 异步结构化日志：QueueHandler/QueueListener 将写盘移出测试线程，可选 JSON 输出 (会话 / 用例 / 步骤字段)，
+       以及按调用位置限流的过滤器 (显式等待等高频日志)
 """
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from typing import Iterator, Optional
 
+from core.settings import LOG_SOURCE, LOG_FILE_FORMAT, LOG_DATE_FORMAT, LOG_RATE_LIMIT, LOG_RATE_BURST
+
+# 结构化字段：会话 (运行 ID)、当前用例 nodeid、当前步骤
+session_var: ContextVar[str] = ContextVar("log_session", default="")
+test_var: ContextVar[str] = ContextVar("log_test", default="")
+step_var: ContextVar[str] = ContextVar("log_step", default="")
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+def current_run_id() -> str:
+    """
+    本次运行的 ID：多设备模式下由主进程通过环境变量 RUN_ID 传给各工作进程，保证同一次运行的日志可关联。
+    :return: 运行 ID
+    """
+    if not os.environ.get("RUN_ID"):
+        os.environ["RUN_ID"] = f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+    return os.environ["RUN_ID"]
+
+
+@contextmanager
+def log_context(var: ContextVar[str], value: str) -> Iterator[None]:
+    """
+    在代码块内设置结构化字段，退出时恢复。
+    :param var: session_var / test_var / step_var
+    :param value: 字段值
+    """
+    token = var.set(value)
+    try:
+        yield
+    finally:
+        var.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """把上下文变量写入日志记录；需挂在 QueueHandler 上，在产生日志的线程中取值"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.session = session_var.get()
+        record.test = test_var.get()
+        record.step = step_var.get()
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    按调用位置 (文件 + 行号) 的令牌桶限流：每个位置允许突发 burst 条，之后每秒最多 rate 条。
+    被抑制的条数会附加在该位置下一条放行的日志上，WARNING 及以上级别不限流。
+    """
+
+    def __init__(self, rate: float = LOG_RATE_LIMIT, burst: int = LOG_RATE_BURST):
+        """
+        :param rate: 每秒补充的令牌数
+        :param burst: 令牌桶容量
+        """
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._buckets: dict[tuple[str, int], list[float]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            # [剩余令牌, 上次补充时间, 已抑制条数]
+            bucket = self._buckets.setdefault(key, [float(self.burst), now, 0])
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+        if suppressed:
+            record.msg = f"{record.getMessage()} (已抑制此处 {suppressed} 条日志)"
+            record.args = None
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行 JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record, LOG_DATE_FORMAT),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "location": f"{record.module}.{record.funcName}:{record.lineno}",
+            "session": getattr(record, "session", ""),
+            "test": getattr(record, "test", ""),
+            "step": getattr(record, "step", ""),
+        }
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+def setup_async_logging(log_path: Path | str = LOG_SOURCE, level: int = logging.INFO, fmt: str = "text",
+                        mode: str = "w") -> QueueListener:
+    """
+    为根日志器挂载 QueueHandler，由后台 QueueListener 线程写入日志文件。重复调用时先关闭上一次的配置。
+    :param log_path: 日志文件路径
+    :param level: 写入文件的最低级别
+    :param fmt: text (与 pytest.ini 中 log_file_format 一致) 或 json
+    :param mode: 文件打开模式
+    :return: QueueListener
+    """
+    global _listener, _queue_handler
+    stop_async_logging()
+
+    Path(log_path).parent.mkdir(parents=True, exist_ok=True)
+    file_handler = logging.FileHandler(log_path, mode=mode, encoding="utf-8")
+    file_handler.setLevel(level)
+    file_handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(LOG_FILE_FORMAT, LOG_DATE_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler = QueueHandler(log_queue)
+    _queue_handler.setLevel(level)
+    _queue_handler.addFilter(ContextFilter())
+    _listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.addHandler(_queue_handler)
+    if root.level > level or root.level == logging.NOTSET:
+        root.setLevel(level)
+    return _listener
+
+
+def stop_async_logging() -> None:
+    """移除 QueueHandler，等待后台线程写完队列中的日志并关闭文件"""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def rate_limit(*names: str, rate: float = LOG_RATE_LIMIT, burst: int = LOG_RATE_BURST) -> RateLimitFilter:
+    """
+    为指定日志器挂载按调用位置限流的过滤器 (对控制台与文件同时生效)。
+    :param names: 日志器名称
+    :param rate: 每秒放行条数
+    :param burst: 突发容量
+    :return: RateLimitFilter
+    """
+    limiter = RateLimitFilter(rate, burst)
+    for name in names:
+        target = logging.getLogger(name)
+        for existing in [f for f in target.filters if isinstance(f, RateLimitFilter)]:
+            target.removeFilter(existing)
+        target.addFilter(limiter)
+    return limiter
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: page_generator
+@date: 2026/10/19 11:40
+@desc: 根据 page_source 生成 BasePage 子类骨架，按 resource-id → accessibility id → UiSelector → XPath 选择最快的唯一定位
+"""
+import argparse
+import datetime
+import keyword
+import logging
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from core.settings import APPIUM_HOST, APPIUM_PORT
+from utils.ui_hierarchy import UiHierarchy
+
+logger = logging.getLogger(__name__)
+
+# Android 中视为可交互的控件类型 (即使 clickable=false 也需要定位)
+_ANDROID_INPUT_CLASSES = ("EditText", "AutoCompleteTextView")
+# iOS 中视为可交互的控件类型
+_IOS_INTERACTIVE_TYPES = {
+    "XCUIElementTypeButton", "XCUIElementTypeTextField", "XCUIElementTypeSecureTextField",
+    "XCUIElementTypeSwitch", "XCUIElementTypeCell", "XCUIElementTypeLink", "XCUIElementTypeSearchField",
+    "XCUIElementTypeSegmentedControl", "XCUIElementTypeSlider", "XCUIElementTypeTab",
+}
+
+
+@dataclass
+class GeneratedLocator:
+    """生成的定位符"""
+    name: str
+    by: str
+    value: str
+    comment: str
+
+
+def is_interactive(node: ET.Element, ios: bool = False) -> bool:
+    """
+    判断节点是否为可交互控件。
+    :param node: 层级节点
+    :param ios: 是否为 iOS 层级
+    """
+    if ios:
+        return (node.get("type") or node.tag) in _IOS_INTERACTIVE_TYPES
+    if any(node.get(attr) == "true" for attr in ("clickable", "long-clickable", "checkable")):
+        return True
+    return UiHierarchy.class_name(node).endswith(_ANDROID_INPUT_CLASSES)
+
+
+def _quote(text: str) -> str:
+    """转义 UiSelector 字符串参数"""
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _xpath_literal(text: str) -> Optional[str]:
+    """生成 XPath 字符串字面量，同时包含单双引号时返回 None"""
+    if "'" not in text:
+        return f"'{text}'"
+    if '"' not in text:
+        return f'"{text}"'
+    return None
+
+
+def _absolute_xpath(tree: UiHierarchy, node: ET.Element) -> str:
+    """生成带兄弟序号的绝对 XPath (最后手段)"""
+    steps = []
+    current = node
+    while current is not None:
+        parent = tree.parent(current)
+        if parent is None:
+            steps.append(f"/{current.tag}")
+            break
+        siblings = [c for c in parent if c.tag == current.tag]
+        position = f"[{siblings.index(current) + 1}]" if len(siblings) > 1 else ""
+        steps.append(f"/{current.tag}{position}")
+        current = parent
+    return "".join(reversed(steps))
+
+
+def choose_locator(tree: UiHierarchy, node: ET.Element) -> tuple[str, str]:
+    """
+    为节点选择最快的唯一定位，优先级：resource-id → accessibility id → UiSelector → XPath。
+    每个候选都会在当前层级树上校验唯一性。
+    :param tree: 层级树
+    :param node: 目标节点
+    :return: (by, value)
+    """
+    rid = node.get("resource-id")
+    desc = node.get("content-desc") if not tree.is_ios else node.get("name")
+    text = node.get("text") if not tree.is_ios else node.get("label")
+    cls = UiHierarchy.class_name(node)
+
+    candidates: list[tuple[str, str]] = []
+    if rid:
+        candidates.append(("id", rid))
+    if desc:
+        candidates.append(("accessibility id", desc))
+    if not tree.is_ios:
+        if text:
+            candidates.append(("-android uiautomator", f"new UiSelector().text({_quote(text)})"))
+            if rid:
+                candidates.append(("-android uiautomator",
+                                   f"new UiSelector().resourceId({_quote(rid)}).text({_quote(text)})"))
+            candidates.append(("-android uiautomator",
+                               f"new UiSelector().className({_quote(cls)}).text({_quote(text)})"))
+    for attr, attr_value in (("text", text), ("label", text), ("name", desc)):
+        literal = _xpath_literal(attr_value) if attr_value else None
+        if literal and node.get(attr) == attr_value:
+            candidates.append(("xpath", f"//{node.tag}[@{attr}={literal}]"))
+
+    for by, value in candidates:
+        if tree.find(by, value) == [node]:
+            return by, value
+    return "xpath", _absolute_xpath(tree, node)
+
+
+def _snake_case(text: str) -> str:
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", text)
+    text = re.sub(r"\W+", "_", text, flags=re.ASCII).strip("_").lower()
+    return text
+
+
+def _attribute_name(node: ET.Element, used: set[str]) -> str:
+    """根据 resource-id / 描述 / 控件类型生成不重复的属性名"""
+    rid = node.get("resource-id") or ""
+    base = ""
+    for source in (rid.rsplit("/", 1)[-1], node.get("content-desc") or "", node.get("name") or ""):
+        base = _snake_case(source)
+        if base and not base[0].isdigit():
+            break
+        base = ""
+    if not base:
+        base = _snake_case(UiHierarchy.class_name(node).rsplit(".", 1)[-1].replace("XCUIElementType", "")) or "element"
+    if keyword.iskeyword(base):
+        base += "_el"
+
+    name, idx = base, 2
+    while name in used:
+        name = f"{base}_{idx}"
+        idx += 1
+    used.add(name)
+    return name
+
+
+def collect_locators(tree: UiHierarchy) -> list[GeneratedLocator]:
+    """
+    为层级树中所有可交互节点生成定位符。
+    :param tree: 层级树
+    :return: 定位符列表 (文档顺序)
+    """
+    ios = tree.is_ios
+    used: set[str] = set()
+    locators = []
+    for node in tree.nodes():
+        if not is_interactive(node, ios):
+            continue
+        by, value = choose_locator(tree, node)
+        label = node.get("text") or node.get("content-desc") or node.get("label") or ""
+        comment = f"{UiHierarchy.class_name(node).rsplit('.', 1)[-1]}" + (f" | {label}" if label else "")
+        locators.append(GeneratedLocator(_attribute_name(node, used), by, value, comment))
+    return locators
+
+
+def render_page(class_name: str, locators: list[GeneratedLocator], module_name: str = "") -> str:
+    """
+    渲染 BasePage 子类源码。
+    :param class_name: 页面类名
+    :param locators: 定位符列表
+    :param module_name: 模块名 (用于文件头)
+    :return: Python 源码
+    """
+    now = datetime.datetime.now().strftime("%Y/%m/%d %H:%M")
+    lines = [
+        "#!/usr/bin/env python",
+        "# coding=utf-8",
+        "",
+        '"""',
+        "@author: CNWei,ChenWei",
+        "@Software: PyCharm",
+        "@contact: t6g888@163.com",
+        f"@file: {module_name or _snake_case(class_name)}",
+        f"@date: {now}",
+        "@desc: 由 utils.page_generator 根据 page_source 生成",
+        '"""',
+        "import logging",
+        "",
+        "from appium import webdriver",
+        "",
+        "from core.base_page import BasePage",
+        "",
+        "logger = logging.getLogger(__name__)",
+        "",
+        "",
+        f"class {class_name}(BasePage):",
+        "    # 定位参数",
+    ]
+    for loc in locators:
+        lines.append(f"    {loc.name} = ({loc.by!r}, {loc.value!r})  # {loc.comment}")
+    lines += [
+        "",
+        "    def __init__(self, driver: webdriver.Remote):",
+        "        super().__init__(driver)",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def generate_page(source: str, class_name: str, module_name: str = "") -> str:
+    """
+    根据 page_source 字符串生成页面对象源码。
+    :param source: page_source XML
+    :param class_name: 页面类名
+    :param module_name: 模块名
+    :return: Python 源码
+    """
+    tree = UiHierarchy.from_string(source)
+    locators = collect_locators(tree)
+    slow = sum(1 for loc in locators if loc.by == "xpath")
+    logger.info(f"共生成 {len(locators)} 个定位符，其中 XPath {slow} 个")
+    return render_page(class_name, locators, module_name)
+
+
+def capture_page_source(platform: str, caps_name: str, host: str = APPIUM_HOST, port: int = APPIUM_PORT) -> str:
+    """
+    通过 CoreDriver 连接实时会话并抓取当前页面的 page_source。
+    :param platform: 目标平台
+    :param caps_name: caps.yaml 中的配置名称
+    :param host: Appium Server Host
+    :param port: Appium Server Port
+    :return: page_source XML
+    """
+    from core.config_loader import get_caps
+    from core.driver import CoreDriver
+    from core.run_appium import start_appium_service
+
+    with start_appium_service(host, port):
+        helper = CoreDriver().server_config(host=host, port=port)
+        try:
+            helper.connect(platform=platform, caps=get_caps(caps_name))
+            return helper.driver.page_source
+        finally:
+            helper.quit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="根据 page_source 生成 BasePage 子类骨架")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--source", help="已保存的 page_source XML 文件")
+    group.add_argument("--live", action="store_true", help="连接实时会话抓取当前页面")
+    parser.add_argument("--class_name", required=True, help="生成的页面类名，如 LoginPage")
+    parser.add_argument("--output", help="输出文件路径，缺省打印到控制台")
+    parser.add_argument("--platform", default="android", help="实时模式的目标平台")
+    parser.add_argument("--caps_name", default="android", help="实时模式使用的 caps 配置名称")
+    parser.add_argument("--host", default=APPIUM_HOST, help="Appium Server Host")
+    parser.add_argument("--port", type=int, default=APPIUM_PORT, help="Appium Server Port")
+    parser.add_argument("--save_source", help="实时模式下同时保存抓取到的 page_source")
+    cli_args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)-5s [%(name)s] - %(message)s")
+
+    if cli_args.live:
+        page_source = capture_page_source(cli_args.platform, cli_args.caps_name, cli_args.host, cli_args.port)
+        if cli_args.save_source:
+            Path(cli_args.save_source).write_text(page_source, encoding="utf-8")
+    else:
+        page_source = Path(cli_args.source).read_text(encoding="utf-8")
+
+    output = Path(cli_args.output) if cli_args.output else None
+    code = generate_page(page_source, cli_args.class_name, output.stem if output else "")
+    if output:
+        output.write_text(code, encoding="utf-8")
+        print(f"页面对象已生成: {output}")
+    else:
+        print(code)
@@ -13,7 +13,9 @@ import logging
 import subprocess
 import shutil
 
-from core.settings import ALLURE_TEMP, REPORT_DIR
+from core.settings import ALLURE_TEMP, REPORT_DIR, HTML_REPORT_DIR
+from utils.html_report import IncrementalReport
+from utils.result_merger import carry_history
 
 logger = logging.getLogger(__name__)
 
@@ -26,13 +28,17 @@ def generate_allure_report() -> bool:
         logger.warning("未发现 Allure 测试数据，跳过报告生成。")
         return False
 
-    # 检查环境是否有 allure 命令行工具
+    # 检查环境是否有 allure 命令行工具，没有时退回纯 Python 的 HTML 报告
     if not shutil.which("allure"):
-        logger.error("系统未安装 Allure 命令行工具，请先安装：https://allurereport.org/docs/")
-        return False
+        logger.warning("系统未安装 Allure 命令行工具 (https://allurereport.org/docs/)，改为生成纯 Python HTML 报告")
+        IncrementalReport().update(live=False)
+        logger.info(f"HTML 报告已生成至: {HTML_REPORT_DIR / 'index.html'}")
+        return True
 
     try:
         logger.info("正在生成 Allure HTML 报告...")
+        # --clean 前将上一份报告的 history 带入结果目录，保留趋势图
+        carry_history(REPORT_DIR, ALLURE_TEMP)
         # --clean 会清理掉 REPORT_DIR 里的旧报告
         subprocess.run(
             f'allure generate "{ALLURE_TEMP}" -o "{REPORT_DIR}" --clean',
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: result_merger
+@date: 2026/10/19 23:20
+@desc: Allure 原始结果合并：多个结果目录单遍流式合并、重跑去重，并把上一份报告的 history 带入新结果
+
+- 结果文件逐个解析，只在内存中保留每个用例 (historyId) 当前最新一次执行的文件路径与附件列表；
+- 同一用例的多次执行 (失败重跑、设备掉线后重新排队) 只保留 stop 最晚的一次，其余执行及其附件不复制；
+- 附件与容器文件以硬链接 (不支持时复制) 写入目标目录，environment.properties 合并各目录的键值；
+- REPORT_DIR/history 复制到结果目录的 history/ 下，allure generate 据此生成趋势图，--clean 后趋势不丢失。
+"""
+import argparse
+import json
+import logging
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from core.settings import ALLURE_TEMP, REPORT_DIR
+from utils.artifact_store import ArtifactStore
+
+logger = logging.getLogger(__name__)
+
+ENVIRONMENT_FILE = "environment.properties"
+
+
+@dataclass
+class _Latest:
+    """某个用例当前保留的执行"""
+    file: Path
+    stop: int
+    attachments: list[str]
+
+
+@dataclass
+class MergeStats:
+    """合并统计"""
+    results: int = 0
+    duplicates: int = 0
+    attachments: int = 0
+    containers: int = 0
+    history: int = 0
+    skipped: list[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return (f"用例 {self.results} 个 (去除重复执行 {self.duplicates} 次)，附件 {self.attachments} 个，"
+                f"容器 {self.containers} 个，history 文件 {self.history} 个")
+
+
+def _iter_attachments(node: dict) -> Iterator[str]:
+    """递归收集结果 / 步骤中引用的附件文件名"""
+    for attachment in node.get("attachments") or []:
+        if attachment.get("source"):
+            yield attachment["source"]
+    for step in node.get("steps") or []:
+        yield from _iter_attachments(step)
+
+
+def _read_properties(path: Path) -> dict[str, str]:
+    props = {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if "=" in line and not line.lstrip().startswith("#"):
+            key, value = line.split("=", 1)
+            props[key.strip()] = value.strip()
+    return props
+
+
+def carry_history(report_dir: Path | str, dest: Path | str) -> int:
+    """
+    将上一份报告的 history 目录复制到结果目录，供 allure generate 生成趋势。
+    :param report_dir: 上一份 Allure HTML 报告目录
+    :param dest: 结果目录
+    :return: 复制的文件数量
+    """
+    src = Path(report_dir) / "history"
+    if not src.is_dir():
+        return 0
+    target = Path(dest) / "history"
+    target.mkdir(parents=True, exist_ok=True)
+    count = 0
+    for file in src.iterdir():
+        if file.is_file():
+            shutil.copy2(file, target / file.name)
+            count += 1
+    return count
+
+
+def merge_results(sources: Iterable[Path | str], dest: Path | str,
+                  history_from: Optional[Path | str] = REPORT_DIR) -> MergeStats:
+    """
+    合并多个 Allure 原始结果目录。
+    :param sources: 结果目录列表 (不存在的目录忽略)
+    :param dest: 目标目录 (可以是 sources 之一以外的任意目录)
+    :param history_from: 上一份报告目录，为 None 时不携带 history
+    :return: MergeStats
+    """
+    dest = Path(dest)
+    dest.mkdir(parents=True, exist_ok=True)
+    stats = MergeStats()
+    latest: dict[str, _Latest] = {}
+    attachment_dirs: dict[str, Path] = {}
+    environment: dict[str, str] = {}
+
+    for src in map(Path, sources):
+        if not src.is_dir():
+            continue
+        for file in src.iterdir():
+            name = file.name
+            if name.endswith("-result.json"):
+                try:
+                    result = json.loads(file.read_text(encoding="utf-8"))
+                except ValueError:
+                    stats.skipped.append(str(file))
+                    continue
+                key = result.get("historyId") or result.get("uuid") or name
+                current = _Latest(file, result.get("stop") or 0, list(_iter_attachments(result)))
+                previous = latest.get(key)
+                if previous:
+                    stats.duplicates += 1
+                    if previous.stop > current.stop:
+                        continue
+                latest[key] = current
+            elif name.endswith("-container.json"):
+                ArtifactStore.link(file, dest / name)
+                stats.containers += 1
+            elif name == ENVIRONMENT_FILE:
+                environment.update(_read_properties(file))
+            elif file.is_file():
+                # 附件等其它文件：记录所在目录，只复制被保留结果引用的附件
+                attachment_dirs.setdefault(name, src)
+
+    for item in latest.values():
+        ArtifactStore.link(item.file, dest / item.file.name)
+        for source in item.attachments:
+            src = attachment_dirs.get(source)
+            if src is not None:
+                ArtifactStore.link(src / source, dest / source)
+                stats.attachments += 1
+    stats.results = len(latest)
+
+    # 分类配置等非附件文件 (categories.json、executor.json) 原样保留
+    for name, src in attachment_dirs.items():
+        if name.endswith(".json") and not (dest / name).exists():
+            ArtifactStore.link(src / name, dest / name)
+
+    if environment:
+        (dest / ENVIRONMENT_FILE).write_text("\n".join(f"{k}={v}" for k, v in environment.items()) + "\n",
+                                             encoding="utf-8")
+    if history_from is not None:
+        stats.history = carry_history(history_from, dest)
+    if stats.skipped:
+        logger.warning(f"以下结果文件无法解析，已跳过: {stats.skipped}")
+    logger.info(f"Allure 结果合并完成 -> {dest}: {stats}")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="合并多个 Allure 原始结果目录 (重跑去重、携带 history)")
+    parser.add_argument("sources", nargs="+", help="Allure 结果目录")
+    parser.add_argument("-o", "--output", default=str(ALLURE_TEMP), help="合并后的结果目录")
+    parser.add_argument("--history_from", default=str(REPORT_DIR), help="上一份 Allure 报告目录")
+    parser.add_argument("--no_history", action="store_true", help="不携带上一份报告的 history")
+    cli_args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)-5s [%(name)s] - %(message)s")
+    merge_results(cli_args.sources, cli_args.output, None if cli_args.no_history else cli_args.history_from)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: run_history
+@date: 2026/10/19 17:10
+@desc: 用例执行历史 (sqlite)：记录每次运行各用例的阶段耗时与结果，提供耗时趋势、退化检测与用例排序
+"""
+import argparse
+import math
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Iterable, Optional
+
+from core.settings import HISTORY_DB_PATH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at  REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    device      TEXT NOT NULL,
+    app_version TEXT NOT NULL,
+    platform    TEXT NOT NULL,
+    exit_status INTEGER
+);
+CREATE TABLE IF NOT EXISTS results (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id      INTEGER NOT NULL REFERENCES runs(id),
+    nodeid      TEXT NOT NULL,
+    device      TEXT NOT NULL,
+    app_version TEXT NOT NULL,
+    outcome     TEXT NOT NULL,
+    setup       REAL NOT NULL DEFAULT 0,
+    call        REAL NOT NULL DEFAULT 0,
+    teardown    REAL NOT NULL DEFAULT 0,
+    duration    REAL NOT NULL DEFAULT 0,
+    reruns      INTEGER NOT NULL DEFAULT 0,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_nodeid ON results(nodeid, finished_at);
+CREATE INDEX IF NOT EXISTS idx_results_device ON results(device, finished_at);
+CREATE INDEX IF NOT EXISTS idx_results_version ON results(app_version, finished_at);
+"""
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """
+    最近秩法计算百分位数。
+    :param values: 样本
+    :param pct: 百分位 (0-100)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class RunHistory:
+    """用例执行历史存储，多个工作进程可同时写入 (sqlite WAL 模式)"""
+
+    def __init__(self, path: Path | str = HISTORY_DB_PATH):
+        """
+        :param path: sqlite 数据库文件路径
+        """
+        self.path = Path(path)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    # --- 写入 ---
+    def record_run(self, records: dict[str, dict], device: str, app_version: str, platform: str,
+                   started_at: float, exit_status: Optional[int] = None) -> Optional[int]:
+        """
+        在一个事务中写入一次运行的全部用例记录。
+        :param records: nodeid -> 记录 (outcome, setup, call, teardown, reruns, finished_at)
+        :param device: 设备标识 (udid 或 caps 名称)
+        :param app_version: 被测 App 版本
+        :param platform: 平台
+        :param started_at: 运行开始时间戳
+        :param exit_status: pytest 退出码
+        :return: run id，无记录时返回 None
+        """
+        if not records:
+            return None
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            run_id = conn.execute(
+                "INSERT INTO runs (started_at, finished_at, device, app_version, platform, exit_status) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (started_at, now, device, app_version, platform, exit_status)
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO results (run_id, nodeid, device, app_version, outcome, setup, call, teardown, duration, "
+                "reruns, finished_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (run_id, nodeid, device, app_version, r.get("outcome", "passed"),
+                     r.get("setup", 0.0), r.get("call", 0.0), r.get("teardown", 0.0),
+                     r.get("setup", 0.0) + r.get("call", 0.0) + r.get("teardown", 0.0),
+                     r.get("reruns", 0), r.get("finished_at", now))
+                    for nodeid, r in records.items()
+                ]
+            )
+        return run_id
+
+    # --- 查询 ---
+    def _samples(self, last: int, nodeid: Optional[str] = None, device: Optional[str] = None,
+                 app_version: Optional[str] = None) -> dict[str, list[sqlite3.Row]]:
+        """按 nodeid 分组取最近 last 条记录 (时间倒序)"""
+        where, params = ["1 = 1"], []
+        for column, value in (("nodeid", nodeid), ("device", device), ("app_version", app_version)):
+            if value:
+                where.append(f"{column} = ?")
+                params.append(value)
+        sql = f"""
+            SELECT * FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY nodeid ORDER BY finished_at DESC) AS rn
+                FROM results WHERE {' AND '.join(where)}
+            ) WHERE rn <= ? ORDER BY nodeid, finished_at DESC
+        """
+        groups: dict[str, list[sqlite3.Row]] = {}
+        if not self.path.exists():
+            return groups
+        with closing(self._connect()) as conn:
+            for row in conn.execute(sql, (*params, last)):
+                groups.setdefault(row["nodeid"], []).append(row)
+        return groups
+
+    def durations(self, device: Optional[str] = None, last: int = 5) -> dict[str, float]:
+        """
+        每个用例最近 last 次执行耗时的中位数 (供动态调度按耗时排序)。
+        :param device: 仅统计指定设备
+        :param last: 样本数量
+        """
+        return {nodeid: percentile([r["duration"] for r in rows], 50)
+                for nodeid, rows in self._samples(last, device=device).items()}
+
+    def trends(self, nodeid: Optional[str] = None, device: Optional[str] = None,
+               app_version: Optional[str] = None, last: int = 20) -> list[dict]:
+        """
+        每个用例最近 last 次执行的耗时分布与失败率，按 p95 降序。
+        :return: [{nodeid, runs, p50, p95, setup_p50, teardown_p50, fail_rate, last_outcome}]
+        """
+        stats = []
+        for node, rows in self._samples(last, nodeid, device, app_version).items():
+            durations = [r["duration"] for r in rows]
+            stats.append({
+                "nodeid": node,
+                "runs": len(rows),
+                "p50": percentile(durations, 50),
+                "p95": percentile(durations, 95),
+                "setup_p50": percentile([r["setup"] for r in rows], 50),
+                "teardown_p50": percentile([r["teardown"] for r in rows], 50),
+                "fail_rate": sum(r["outcome"] == "failed" for r in rows) / len(rows),
+                "last_outcome": rows[0]["outcome"],
+            })
+        stats.sort(key=lambda s: s["p95"], reverse=True)
+        return stats
+
+    def regressions(self, window: int = 5, threshold: float = 1.2, min_delta: float = 0.5,
+                    device: Optional[str] = None) -> list[dict]:
+        """
+        耗时退化检测：比较最近 window 次与之前 window 次的 p50。
+        :param window: 窗口大小
+        :param threshold: 新旧 p50 比值超过该值视为退化
+        :param min_delta: 绝对差值下限 (秒)，过滤短用例的噪声
+        :param device: 仅统计指定设备
+        :return: [{nodeid, before, after, ratio}]，按比值降序
+        """
+        found = []
+        for nodeid, rows in self._samples(window * 2, device=device).items():
+            if len(rows) < window + 1:
+                continue
+            after = percentile([r["duration"] for r in rows[:window]], 50)
+            before = percentile([r["duration"] for r in rows[window:]], 50)
+            if before > 0 and after / before >= threshold and after - before >= min_delta:
+                found.append({"nodeid": nodeid, "before": before, "after": after, "ratio": after / before})
+        found.sort(key=lambda r: r["ratio"], reverse=True)
+        return found
+
+    def flaky(self, last: int = 20, device: Optional[str] = None) -> list[dict]:
+        """
+        不稳定用例统计：最近 last 次执行中发生过重跑 (基础设施失败) 的比例。
+        :param last: 每个用例统计的执行次数
+        :param device: 仅统计指定设备
+        :return: [{nodeid, runs, flaky_runs, reruns, flaky_rate, failed}]，按不稳定比例降序
+        """
+        stats = []
+        for nodeid, rows in self._samples(last, device=device).items():
+            flaky_runs = sum(r["reruns"] > 0 for r in rows)
+            if not flaky_runs:
+                continue
+            stats.append({
+                "nodeid": nodeid,
+                "runs": len(rows),
+                "flaky_runs": flaky_runs,
+                "reruns": sum(r["reruns"] for r in rows),
+                "flaky_rate": flaky_runs / len(rows),
+                "failed": sum(r["outcome"] == "failed" for r in rows),
+            })
+        stats.sort(key=lambda s: (s["flaky_rate"], s["reruns"]), reverse=True)
+        return stats
+
+    def last_failures(self) -> dict[str, float]:
+        """每个用例最近一次失败的时间戳"""
+        if not self.path.exists():
+            return {}
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT nodeid, MAX(finished_at) AS failed_at FROM results WHERE outcome = 'failed' GROUP BY nodeid"
+            )
+            return {row["nodeid"]: row["failed_at"] for row in rows}
+
+    def order(self, nodeids: Iterable[str], mode: str) -> list[str]:
+        """
+        按历史数据排序用例，缩短反馈时间。
+        :param nodeids: 用例 nodeid
+        :param mode: slowest 最慢优先；failed 最近失败优先 (其余按最慢优先)
+        :return: 排序后的 nodeid (稳定排序)
+        """
+        nodeids = list(nodeids)
+        durations = self.durations()
+        if mode == "slowest":
+            return sorted(nodeids, key=lambda n: durations.get(n, 0.0), reverse=True)
+        if mode == "failed":
+            failures = self.last_failures()
+            return sorted(nodeids, key=lambda n: (failures.get(n, 0.0), durations.get(n, 0.0)), reverse=True)
+        raise ValueError(f"不支持的排序方式: {mode}")
+
+
+def _print_trends(history: RunHistory, cli_args: argparse.Namespace) -> None:
+    rows = history.trends(cli_args.nodeid, cli_args.device, cli_args.app_version, cli_args.last)
+    print(f"{'p50':>8} {'p95':>8} {'setup':>7} {'teardown':>8} {'失败率':>6} {'次数':>4}  用例")
+    for r in rows[:cli_args.top]:
+        print(f"{r['p50']:>7.2f}s {r['p95']:>7.2f}s {r['setup_p50']:>6.2f}s {r['teardown_p50']:>7.2f}s "
+              f"{r['fail_rate']:>6.0%} {r['runs']:>4}  {r['nodeid']} [{r['last_outcome']}]")
+
+
+def _print_regressions(history: RunHistory, cli_args: argparse.Namespace) -> None:
+    rows = history.regressions(cli_args.window, cli_args.threshold, device=cli_args.device)
+    if not rows:
+        print("未发现耗时退化的用例。")
+    for r in rows[:cli_args.top]:
+        print(f"{r['before']:>7.2f}s -> {r['after']:>7.2f}s (x{r['ratio']:.2f})  {r['nodeid']}")
+
+
+def _print_flaky(history: RunHistory, cli_args: argparse.Namespace) -> None:
+    rows = history.flaky(cli_args.last, device=cli_args.device)
+    if not rows:
+        print("未发现发生过重跑的用例。")
+    for r in rows[:cli_args.top]:
+        print(f"{r['flaky_rate']:>6.0%} ({r['flaky_runs']}/{r['runs']} 次执行, 共重跑 {r['reruns']} 次, "
+              f"最终失败 {r['failed']} 次)  {r['nodeid']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="用例执行历史查询")
+    parser.add_argument("--db", default=str(HISTORY_DB_PATH), help="历史数据库路径")
+    parser.add_argument("--device", help="仅统计指定设备")
+    parser.add_argument("--top", type=int, default=30, help="展示条数")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    trends_parser = sub.add_parser("trends", help="耗时分布 (p50/p95) 与失败率")
+    trends_parser.add_argument("--nodeid", help="仅统计指定用例")
+    trends_parser.add_argument("--app_version", help="仅统计指定 App 版本")
+    trends_parser.add_argument("--last", type=int, default=20, help="每个用例统计最近 N 次执行")
+
+    regress_parser = sub.add_parser("regressions", help="耗时退化检测")
+    regress_parser.add_argument("--window", type=int, default=5, help="比较窗口大小")
+    regress_parser.add_argument("--threshold", type=float, default=1.2, help="新旧 p50 比值阈值")
+
+    flaky_parser = sub.add_parser("flaky", help="不稳定用例 (发生过基础设施失败重跑)")
+    flaky_parser.add_argument("--last", type=int, default=20, help="每个用例统计最近 N 次执行")
+
+    cli_args = parser.parse_args()
+    run_history = RunHistory(cli_args.db)
+    match cli_args.command:
+        case "trends":
+            _print_trends(run_history, cli_args)
+        case "regressions":
+            _print_regressions(run_history, cli_args)
+        case "flaky":
+            _print_flaky(run_history, cli_args)
@@ -0,0 +1,317 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: scheduler
+@date: 2026/10/19 15:40
+@desc: 设备池动态调度：按历史耗时 (最长优先) 将用例逐个派发给空闲设备，设备掉线时回收其执行中的用例
+
+编排进程持有工作队列 (WorkQueue)，通过 multiprocessing.managers 在本机端口上提供服务；
+每台设备的 pytest 工作进程以 `-p utils.scheduler` 加载本模块，由 pytest_runtestloop 从队列逐个领取用例执行。
+"""
+import logging
+import os
+import secrets
+import subprocess
+import threading
+import time
+from collections import deque
+from multiprocessing.managers import BaseManager
+from statistics import mean
+from typing import IO, Optional
+
+import pytest
+
+from core.config_loader import config_registry
+from core.settings import SCHEDULER_MAX_ATTEMPTS
+from utils.device_pool import DeviceWorker, WorkerResult, parse_junit, start_worker
+
+logger = logging.getLogger(__name__)
+
+# 工作进程通过环境变量获取调度服务地址
+ENV_ADDRESS = "APP_SCHEDULER_ADDRESS"
+ENV_AUTHKEY = "APP_SCHEDULER_AUTHKEY"
+ENV_WORKER_ID = "APP_SCHEDULER_WORKER"
+
+# take() 的返回状态
+RUN, WAIT, STOP = "run", "wait", "stop"
+
+
+class WorkQueue:
+    """
+    线程安全的用例工作队列。
+    - 按历史耗时降序派发 (最长处理时间优先，LPT)，无历史数据的用例按已知耗时的平均值估计。
+    - 记录每个工作进程领取的用例，工作进程退出时将其放回队首。
+    - 领取 (take) 只是预留，开始执行 (start) 时才计入执行次数；队列为空时空闲设备可接管其他设备预留而未开始的用例，
+      避免预取的用例被钉在仍在执行长用例的设备上。
+    - 单个用例最多执行 SCHEDULER_MAX_ATTEMPTS 次，避免反复导致设备掉线的用例无限重试。
+    """
+
+    def __init__(self, nodeids: list[str], durations: Optional[dict[str, float]] = None,
+                 max_attempts: int = SCHEDULER_MAX_ATTEMPTS):
+        durations = durations or {}
+        known = [durations[n] for n in nodeids if n in durations]
+        default = mean(known) if known else 0.0
+        # sorted 为稳定排序，耗时相同的用例保持收集顺序
+        ordered = sorted(nodeids, key=lambda n: durations.get(n, default), reverse=True)
+
+        self._pending = deque(ordered)
+        self._in_flight: dict[str, list[str]] = {}
+        self._attempts: dict[str, int] = {}
+        self._started: set[str] = set()
+        self._done: set[str] = set()
+        self._lost: list[str] = []
+        self._max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+    def take(self, worker_id: str) -> tuple[str, Optional[str]]:
+        """
+        领取下一个用例。
+        :param worker_id: 工作进程标识
+        :return: (RUN, nodeid) / (WAIT, None) 其他设备仍有执行中的用例，可能被回收 / (STOP, None) 全部完成
+        """
+        with self._lock:
+            nodeid = self._pending.popleft() if self._pending else self._steal(worker_id)
+            if nodeid is not None:
+                self._in_flight.setdefault(worker_id, []).append(nodeid)
+                return RUN, nodeid
+            others_busy = any(items for wid, items in self._in_flight.items() if wid != worker_id)
+            return (WAIT, None) if others_busy else (STOP, None)
+
+    def _steal(self, worker_id: str) -> Optional[str]:
+        """接管其他设备预留而未开始执行的用例 (调用方持有锁)"""
+        for wid, items in self._in_flight.items():
+            if wid == worker_id:
+                continue
+            for nodeid in items:
+                if nodeid not in self._started:
+                    items.remove(nodeid)
+                    logger.info(f"用例 {nodeid} 由设备 {wid} 转给空闲设备 {worker_id}")
+                    return nodeid
+        return None
+
+    def start(self, worker_id: str, nodeid: str) -> bool:
+        """
+        开始执行已领取的用例，计入执行次数。
+        :param worker_id: 工作进程标识
+        :param nodeid: 用例 nodeid
+        :return: False 表示该用例已被其他设备接管，不应执行
+        """
+        with self._lock:
+            if nodeid not in self._in_flight.get(worker_id, []):
+                return False
+            self._attempts[nodeid] = self._attempts.get(nodeid, 0) + 1
+            self._started.add(nodeid)
+            return True
+
+    def done(self, worker_id: str, nodeid: str) -> None:
+        """
+        标记用例执行完成 (无论成功与否)。
+        :param worker_id: 工作进程标识
+        :param nodeid: 用例 nodeid
+        """
+        with self._lock:
+            items = self._in_flight.get(worker_id, [])
+            if nodeid in items:
+                items.remove(nodeid)
+            self._started.discard(nodeid)
+            self._done.add(nodeid)
+
+    def retire(self, worker_id: str) -> list[str]:
+        """
+        工作进程退出 (设备掉线或进程崩溃)：将其领取的用例放回队首，预留而未开始的用例不计执行次数。
+        :param worker_id: 工作进程标识
+        :return: 被重新排队的用例
+        """
+        with self._lock:
+            requeued = []
+            for nodeid in reversed(self._in_flight.pop(worker_id, [])):
+                if nodeid in self._done:
+                    continue
+                self._started.discard(nodeid)
+                if self._attempts.get(nodeid, 0) >= self._max_attempts:
+                    self._lost.append(nodeid)
+                    continue
+                self._pending.appendleft(nodeid)
+                requeued.insert(0, nodeid)
+            return requeued
+
+    def unfinished(self) -> list[str]:
+        """返回未执行完成的用例 (队列剩余 + 超过派发次数上限)"""
+        with self._lock:
+            in_flight = [n for items in self._in_flight.values() for n in items]
+            return self._lost + list(self._pending) + in_flight
+
+
+class SchedulerManager(BaseManager):
+    """调度服务的 Manager，注册 get_queue 用于获取工作队列代理"""
+    pass
+
+
+class SchedulerClient(BaseManager):
+    """工作进程侧的 Manager (与服务端分开注册，同一进程内也不会覆盖服务端的 get_queue)"""
+    pass
+
+
+SchedulerClient.register("get_queue")
+
+
+class SchedulerServer:
+    """在编排进程的后台线程中提供工作队列服务"""
+
+    def __init__(self, queue: WorkQueue):
+        self.queue = queue
+        self.authkey = secrets.token_bytes(16)
+        SchedulerManager.register("get_queue", callable=lambda: self.queue)
+        self._server = SchedulerManager(address=("127.0.0.1", 0), authkey=self.authkey).get_server()
+        self._thread = threading.Thread(target=self._serve, name="scheduler-server", daemon=True)
+
+    @property
+    def address(self) -> str:
+        host, port = self._server.address
+        return f"{host}:{port}"
+
+    def _serve(self) -> None:
+        try:
+            self._server.serve_forever()
+        except SystemExit:
+            # serve_forever 在 stop_event 置位后以 sys.exit 退出，在后台线程中无需传播
+            pass
+
+    def start(self) -> 'SchedulerServer':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.stop_event.set()
+
+    def worker_env(self, worker_id: str) -> dict[str, str]:
+        """工作进程连接调度服务所需的环境变量"""
+        # 附带已解析的 caps 配置快照，工作进程无需重新解析
+        env = config_registry.worker_env()
+        env.update({ENV_ADDRESS: self.address, ENV_AUTHKEY: self.authkey.hex(), ENV_WORKER_ID: worker_id})
+        return env
+
+
+def run_dynamic(paths: list[str], workers: list[DeviceWorker], nodeids: list[str],
+                durations: Optional[dict[str, float]] = None, poll_interval: float = 0.5) -> list[WorkerResult]:
+    """
+    动态调度执行：所有设备收集相同的用例集合，从共享队列中按需领取。
+    :param paths: 用例路径 (每个工作进程都会完整收集)
+    :param workers: 工作进程配置
+    :param nodeids: 待执行的用例 nodeid
+    :param durations: 历史耗时
+    :param poll_interval: 进程状态轮询间隔 (秒)
+    :return: 执行结果列表
+    """
+    queue = WorkQueue(nodeids, durations)
+    server = SchedulerServer(queue).start()
+
+    running: dict[str, tuple[DeviceWorker, subprocess.Popen, IO[str], float]] = {}
+    for worker in workers:
+        worker.prepare_output()
+        worker_id = str(worker.index)
+        logger.info(f"启动设备 {worker.udid} 工作进程 (动态调度): Appium 端口 {worker.appium_port}, "
+                    f"系统端口 {worker.system_port}")
+        process, console = start_worker(worker, worker.build_args([*paths, "-p", "utils.scheduler"]),
+                                        server.worker_env(worker_id))
+        running[worker_id] = (worker, process, console, time.perf_counter())
+
+    results = []
+    try:
+        while running:
+            for worker_id, (worker, process, console, start) in list(running.items()):
+                returncode = process.poll()
+                if returncode is None:
+                    continue
+                del running[worker_id]
+                console.close()
+                requeued = queue.retire(worker_id)
+                if requeued:
+                    logger.warning(f"设备 {worker.udid} 已退出 (退出码 {returncode})，"
+                                   f"重新排队执行中的用例: {requeued}")
+                result = WorkerResult(worker, returncode, time.perf_counter() - start)
+                parse_junit(result)
+                results.append(result)
+            time.sleep(poll_interval)
+    finally:
+        server.stop()
+        for _, _, console, _ in running.values():
+            console.close()
+
+    unfinished = queue.unfinished()
+    if unfinished:
+        logger.error(f"所有设备均已退出，仍有 {len(unfinished)} 个用例未完成: {unfinished}")
+    return results
+
+
+# --- 工作进程侧：pytest 插件 ---
+class QueueRunner:
+    """替换默认的 runtestloop：从调度服务逐个领取用例执行"""
+
+    def __init__(self, address: str, authkey: bytes, worker_id: str):
+        host, port = address.rsplit(":", 1)
+        manager = SchedulerClient(address=(host, int(port)), authkey=authkey)
+        manager.connect()
+        self.queue = manager.get_queue()
+        self.worker_id = worker_id
+
+    def _take(self, wait: bool) -> Optional[str]:
+        """领取用例；wait 为 True 时在其他设备可能回收用例期间持续等待"""
+        while True:
+            status, nodeid = self.queue.take(self.worker_id)
+            if status == RUN:
+                return nodeid
+            if status == STOP or not wait:
+                return None
+            time.sleep(1)
+
+    @staticmethod
+    def _teardown_stale(session: pytest.Session, item: pytest.Item) -> None:
+        """上一个用例按预取的 nextitem 保留了 fixture，预取的用例被接管后，拆除与本用例无关的部分"""
+        try:
+            session._setupstate.teardown_exact(item)
+        except Exception as e:
+            logger.error(f"拆除上一个用例保留的 fixture 失败: {e}")
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtestloop(self, session: pytest.Session) -> Optional[bool]:
+        if session.config.option.collectonly:
+            return None
+        items = {item.nodeid: item for item in session.items}
+
+        # 上一个用例执行时传入的 nextitem
+        expected = None
+        current = self._take(wait=True)
+        while current:
+            if not self.queue.start(self.worker_id, current):
+                # 预取的用例已被空闲设备接管
+                current = self._take(wait=True)
+                continue
+            # 预取下一个用例：作为 nextitem 传入，使 session/module 级 fixture 在用例之间保持不被拆除；
+            # 预取只是预留，本设备开始执行前可被空闲设备接管
+            upcoming = self._take(wait=False)
+            item = items.get(current)
+            if item is None:
+                logger.error(f"工作进程未收集到用例: {current}")
+            else:
+                if expected is not None and item is not expected:
+                    self._teardown_stale(session, item)
+                expected = items.get(upcoming)
+                item.config.hook.pytest_runtest_protocol(item=item, nextitem=expected)
+            self.queue.done(self.worker_id, current)
+            if session.shouldfail or session.shouldstop:
+                break
+            current = upcoming or self._take(wait=True)
+        return True
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """以 `-p utils.scheduler` 加载时，若存在调度服务环境变量则接管用例执行循环"""
+    address = os.getenv(ENV_ADDRESS)
+    if address:
+        runner = QueueRunner(address, bytes.fromhex(os.environ[ENV_AUTHKEY]), os.environ[ENV_WORKER_ID])
+        config.pluginmanager.register(runner, "scheduler-queue-runner")
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: trace_exporter
+@date: 2026/10/20 00:50
+@desc: 导出 Chrome Trace Event / Perfetto 可读的 JSON：用例、StepTracer / step_trace、allure.step 与 driver 命令
+       记录为时间片 (X 事件)，截图记录为瞬时事件 (i 事件)；每台设备 (工作进程) 一条轨道，线程为子轨道
+
+用法: pytest --trace_file outputs/trace.json 或 python main.py --trace，然后在 https://ui.perfetto.dev 或
+chrome://tracing 中打开生成的文件。
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+import allure_commons
+from selenium.webdriver.remote.command import Command
+
+from core.settings import TRACE_PATH
+
+logger = logging.getLogger(__name__)
+
+# 记录为截图瞬时事件的 driver 命令
+_SCREENSHOT_COMMANDS = {Command.SCREENSHOT, Command.ELEMENT_SCREENSHOT}
+
+
+def _now_us() -> int:
+    return time.time_ns() // 1000
+
+
+class _AllureStepPlugin:
+    """allure_commons 插件：把 allure.step 的开始 / 结束转换为时间片"""
+
+    def __init__(self, recorder: 'TraceRecorder'):
+        self.recorder = recorder
+        self._open: dict[str, tuple[int, float, str, dict]] = {}
+
+    @allure_commons.hookimpl
+    def start_step(self, uuid, title, params):
+        self._open[uuid] = (_now_us(), time.perf_counter(), title, {k: str(v) for k, v in (params or {}).items()})
+
+    @allure_commons.hookimpl
+    def stop_step(self, uuid, exc_type, exc_val, exc_tb):
+        opened = self._open.pop(uuid, None)
+        if opened is None:
+            return
+        start_us, start, title, args = opened
+        if exc_type is not None:
+            args["error"] = exc_type.__name__
+        self.recorder.complete(title, "allure", start_us, time.perf_counter() - start, args)
+
+
+class TraceRecorder:
+    """
+    线程安全的 Trace 事件收集器。未启动时各记录方法立即返回，可常驻在热路径上。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.process_name = "local"
+        self._events: list[dict] = []
+        self._threads: dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._allure_plugin: Optional[_AllureStepPlugin] = None
+
+    def start(self, process_name: str = "local", allure_steps: bool = True) -> 'TraceRecorder':
+        """
+        开始收集事件。
+        :param process_name: 轨道名称 (设备 udid 或 caps 名称)
+        :param allure_steps: 是否同时记录 allure.step
+        :return: self
+        """
+        with self._lock:
+            self._events.clear()
+            self._threads.clear()
+        self.process_name = process_name
+        self.enabled = True
+        if allure_steps and self._allure_plugin is None:
+            self._allure_plugin = _AllureStepPlugin(self)
+            allure_commons.plugin_manager.register(self._allure_plugin)
+        return self
+
+    def stop(self) -> None:
+        """停止收集 (已收集的事件保留，直到下次 start)"""
+        self.enabled = False
+        if self._allure_plugin is not None:
+            allure_commons.plugin_manager.unregister(self._allure_plugin)
+            self._allure_plugin = None
+
+    def _add(self, event: dict) -> None:
+        thread = threading.current_thread()
+        event["pid"] = os.getpid()
+        event["tid"] = thread.ident
+        with self._lock:
+            self._threads.setdefault(thread.ident, thread.name)
+            self._events.append(event)
+
+    # --- 记录 ---
+    def complete(self, name: str, cat: str, start_us: int, duration: float, args: Optional[dict] = None) -> None:
+        """
+        记录一个时间片。
+        :param name: 名称
+        :param cat: 分类 (test / step / allure / command)
+        :param start_us: 开始时间 (微秒时间戳)
+        :param duration: 耗时 (秒)
+        :param args: 附加信息
+        """
+        if not self.enabled:
+            return
+        self._add({"name": name, "cat": cat, "ph": "X", "ts": start_us, "dur": int(duration * 1_000_000),
+                   "args": args or {}})
+
+    def instant(self, name: str, cat: str, args: Optional[dict] = None) -> None:
+        """记录一个瞬时事件 (截图等)"""
+        if not self.enabled:
+            return
+        self._add({"name": name, "cat": cat, "ph": "i", "s": "t", "ts": _now_us(), "args": args or {}})
+
+    @contextmanager
+    def span(self, name: str, cat: str, args: Optional[dict] = None) -> Iterator[None]:
+        """以上下文管理器形式记录时间片，异常类型写入 args"""
+        if not self.enabled:
+            yield
+            return
+        start_us, start = _now_us(), time.perf_counter()
+        args = dict(args or {})
+        try:
+            yield
+        except BaseException as e:
+            args["error"] = type(e).__name__
+            raise
+        finally:
+            self.complete(name, cat, start_us, time.perf_counter() - start, args)
+
+    def record_command(self, cmd: str, params: Optional[dict], wall: float, duration: float,
+                       error: Optional[BaseException]) -> None:
+        """ManagedRemote.command_hooks 回调：driver 命令记录为时间片，截图命令额外记录瞬时事件"""
+        if not self.enabled:
+            return
+        args = {"error": type(error).__name__} if error is not None else {}
+        if params and params.get("using"):
+            args["locator"] = f"{params.get('using')}={params.get('value')}"
+        self.complete(cmd, "command", int(wall * 1_000_000), duration, args)
+        if cmd in _SCREENSHOT_COMMANDS:
+            self.instant("截图", "screenshot", {"command": cmd})
+
+    # --- 导出 ---
+    def events(self) -> list[dict]:
+        """返回包含轨道命名元数据的完整事件列表"""
+        pid = os.getpid()
+        with self._lock:
+            meta = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": self.process_name}}]
+            meta += [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                     for tid, name in self._threads.items()]
+            return meta + list(self._events)
+
+    def dump(self, path: Path | str = TRACE_PATH) -> Path:
+        """
+        写出 Trace JSON。
+        :param path: 输出文件
+        :return: 输出文件路径
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        events = self.events()
+        path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, ensure_ascii=False),
+                        encoding="utf-8")
+        logger.info(f"Trace 已导出 ({len(events)} 个事件): {path}")
+        return path
+
+
+def merge_traces(files: Iterable[Path | str], dest: Path | str = TRACE_PATH) -> Optional[Path]:
+    """
+    合并多个工作进程的 Trace 文件 (各进程 pid 不同，合并后每台设备一条轨道)。
+    :param files: Trace 文件列表，不存在的文件忽略
+    :param dest: 输出文件
+    :return: 输出文件路径，没有可合并的文件时返回 None
+    """
+    events: list[dict[str, Any]] = []
+    for file in map(Path, files):
+        if file.exists():
+            events.extend(json.loads(file.read_text(encoding="utf-8")).get("traceEvents", []))
+    if not events:
+        return None
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    dest.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, ensure_ascii=False),
+                    encoding="utf-8")
+    logger.info(f"Trace 已合并: {dest}")
+    return dest
+
+
+# 全局单例
+trace_recorder = TraceRecorder()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="合并多个 Trace Event 文件")
+    parser.add_argument("files", nargs="+", help="Trace 文件")
+    parser.add_argument("-o", "--output", default=str(TRACE_PATH), help="输出文件")
+    cli_args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)-5s [%(name)s] - %(message)s")
+    merge_traces(cli_args.files, cli_args.output)
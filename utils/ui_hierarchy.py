@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+@author: CNWei,ChenWei
+@Software: PyCharm
+@contact: t6g888@163.com
+@file: ui_hierarchy
+@date: 2026/10/19 11:05
+@desc: page_source (UI 层级 XML) 解析与本地定位求值
+支持 id / accessibility id / class name / -android uiautomator (常用 UiSelector 方法) / XPath (常用子集)。
+"""
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Iterator, Optional
+
+from utils.finder import by_converter
+
+# UiSelector 链式调用：.method(arg)
+_UI_SELECTOR_CALL = re.compile(r'\.(\w+)\(\s*("(?:[^"\\]|\\.)*"|[^()]*?)\s*\)')
+# XPath 谓词中的条件
+_XPATH_ATTR_EQ = re.compile(r"^@([\w:-]+)\s*=\s*(['\"])(.*)\2$")
+_XPATH_CONTAINS = re.compile(r"^(contains|starts-with)\(\s*@([\w:-]+)\s*,\s*(['\"])(.*)\3\s*\)$")
+_XPATH_TEXT_EQ = re.compile(r"^text\(\)\s*=\s*(['\"])(.*)\1$")
+
+
+class UiHierarchy:
+    """
+    UI 层级树。
+    对 page_source 进行一次解析，之后在本地执行定位查询，不产生任何设备交互。
+    """
+
+    def __init__(self, root: ET.Element):
+        self.root = root
+        self._parents = {child: parent for parent in root.iter() for child in parent}
+
+    @classmethod
+    def from_string(cls, source: str) -> 'UiHierarchy':
+        """
+        从 page_source 字符串构建层级树。
+        :param source: XML 字符串
+        """
+        return cls(ET.fromstring(source.encode("utf-8") if isinstance(source, str) else source))
+
+    @classmethod
+    def from_file(cls, path: Path | str) -> 'UiHierarchy':
+        """
+        从保存的 page_source 文件构建层级树。
+        :param path: 文件路径
+        """
+        return cls(ET.parse(path).getroot())
+
+    @property
+    def is_ios(self) -> bool:
+        """根据节点类型判断是否为 iOS 层级"""
+        return self.root.tag.startswith("XCUIElementType") or any(
+            n.tag.startswith("XCUIElementType") for n in self.root[:1])
+
+    def nodes(self) -> Iterator[ET.Element]:
+        """按文档顺序遍历所有节点 (不含根节点)"""
+        it = self.root.iter()
+        next(it)
+        return it
+
+    def parent(self, node: ET.Element) -> Optional[ET.Element]:
+        """获取父节点"""
+        return self._parents.get(node)
+
+    @staticmethod
+    def class_name(node: ET.Element) -> str:
+        """节点类名 (Android 为 class 属性，iOS 为 type 属性，缺省取标签名)"""
+        return node.get("class") or node.get("type") or node.tag
+
+    # --- 定位求值 ---
+    def find(self, by: str, value: str) -> list[ET.Element]:
+        """
+        在本地层级树上执行定位。
+        :param by: 定位策略 (支持简写，与 CoreDriver 一致)
+        :param value: 定位值
+        :return: 匹配的节点列表 (文档顺序)
+        :raises ValueError: 当定位策略不支持本地求值时
+        """
+        by = by_converter(by)
+        match by:
+            case "id":
+                return [n for n in self.nodes() if self._match_id(n, value)]
+            case "accessibility id":
+                return [n for n in self.nodes() if (n.get("content-desc") or n.get("name")) == value]
+            case "class name":
+                return [n for n in self.nodes() if self.class_name(n) == value]
+            case "name":
+                return [n for n in self.nodes() if n.get("name") == value or n.get("text") == value]
+            case "-android uiautomator":
+                return self._find_ui_selector(value)
+            case "xpath":
+                return self._find_xpath(value)
+        raise ValueError(f"本地层级树不支持定位策略: '{by}'")
+
+    def count(self, by: str, value: str) -> int:
+        """统计定位匹配数量"""
+        return len(self.find(by, value))
+
+    def is_unique(self, by: str, value: str) -> bool:
+        """判断定位是否唯一"""
+        return self.count(by, value) == 1
+
+    @staticmethod
+    def _match_id(node: ET.Element, value: str) -> bool:
+        rid = node.get("resource-id")
+        if rid:
+            # UiAutomator2 允许省略包名前缀 (如 "tvName" 匹配 "pkg:id/tvName")
+            return rid == value or rid.endswith(f":id/{value}")
+        return node.get("name") == value
+
+    # --- UiSelector ---
+    def _find_ui_selector(self, selector: str) -> list[ET.Element]:
+        calls = _UI_SELECTOR_CALL.findall(selector)
+        if not calls:
+            raise ValueError(f"无法解析的 UiSelector: {selector}")
+
+        instance = None
+        checks = []
+        for method, raw in calls:
+            arg = _parse_selector_arg(raw)
+            if method == "instance":
+                instance = int(arg)
+                continue
+            checks.append((method, arg))
+
+        matched = [n for n in self.nodes() if all(self._check_selector(n, m, a) for m, a in checks)]
+        if instance is not None:
+            return matched[instance:instance + 1]
+        return matched
+
+    def _check_selector(self, node: ET.Element, method: str, arg) -> bool:
+        text = node.get("text") or ""
+        desc = node.get("content-desc") or ""
+        rid = node.get("resource-id") or ""
+        match method:
+            case "text":
+                return text == arg
+            case "textContains":
+                return arg in text
+            case "textStartsWith":
+                return text.startswith(arg)
+            case "textMatches":
+                return re.fullmatch(arg, text) is not None
+            case "description":
+                return desc == arg
+            case "descriptionContains":
+                return arg in desc
+            case "descriptionStartsWith":
+                return desc.startswith(arg)
+            case "descriptionMatches":
+                return re.fullmatch(arg, desc) is not None
+            case "resourceId":
+                return rid == arg
+            case "resourceIdMatches":
+                return re.fullmatch(arg, rid) is not None
+            case "className":
+                return self.class_name(node) == arg
+            case "classNameMatches":
+                return re.fullmatch(arg, self.class_name(node)) is not None
+            case "index":
+                return node.get("index") == str(arg)
+            case "clickable" | "checkable" | "checked" | "enabled" | "focusable" | "focused" | "scrollable" \
+                 | "selected" | "longClickable":
+                attr = "long-clickable" if method == "longClickable" else method
+                return (node.get(attr) == "true") == bool(arg)
+        raise ValueError(f"本地层级树不支持 UiSelector 方法: {method}")
+
+    # --- XPath ---
+    def _find_xpath(self, xpath: str) -> list[ET.Element]:
+        xpath = xpath.strip()
+        if not xpath.startswith("/"):
+            raise ValueError(f"仅支持绝对 XPath: {xpath}")
+
+        current = [self.root]
+        # 文档根 (document) 作为虚拟起点：/hierarchy 匹配根节点本身
+        at_document = True
+        for axis, step in _split_xpath(xpath):
+            tag, predicates = _parse_step(step)
+            seen, matched = set(), []
+            if at_document:
+                pool = [self.root] + (list(self.nodes()) if axis == "//" else [])
+                at_document = False
+            else:
+                pool = []
+                for node in current:
+                    pool.extend(list(node.iter())[1:] if axis == "//" else list(node))
+            for n in pool:
+                if n not in seen and _match_tag(n, tag):
+                    seen.add(n)
+                    matched.append(n)
+
+            # 位置谓词 ([n]/last()) 按同一父节点下的兄弟节点计算
+            groups: dict[int, list[ET.Element]] = {}
+            for n in matched:
+                groups.setdefault(id(self.parent(n)), []).append(n)
+            current = []
+            for group in groups.values():
+                for predicate in predicates:
+                    group = self._apply_predicate(group, predicate)
+                current.extend(group)
+
+        order = {n: i for i, n in enumerate(self.root.iter())}
+        return sorted(current, key=order.__getitem__)
+
+    def _apply_predicate(self, nodes: list[ET.Element], predicate: str) -> list[ET.Element]:
+        predicate = predicate.strip()
+        if predicate.isdigit():
+            idx = int(predicate) - 1
+            return nodes[idx:idx + 1]
+        if predicate == "last()":
+            return nodes[-1:]
+        conditions = [c.strip() for c in re.split(r"\s+and\s+", predicate)]
+        return [n for n in nodes if all(_eval_condition(n, c) for c in conditions)]
+
+
+def _parse_selector_arg(raw: str):
+    raw = raw.strip()
+    if raw.startswith('"'):
+        return raw[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    if raw in ("true", "false"):
+        return raw == "true"
+    if raw.lstrip("-").isdigit():
+        return int(raw)
+    return raw
+
+
+def _split_xpath(xpath: str) -> list[tuple[str, str]]:
+    """将 XPath 拆分为 (轴, 步骤) 列表，忽略谓词中的斜杠"""
+    steps, depth, quote, buf, axis = [], 0, None, "", None
+    i = 0
+    while i < len(xpath):
+        ch = xpath[i]
+        if quote:
+            quote = None if ch == quote else quote
+        elif ch in "'\"":
+            quote = ch
+        elif ch == "[":
+            depth += 1
+        elif ch == "]":
+            depth -= 1
+        elif ch == "/" and depth == 0:
+            if axis is not None:
+                steps.append((axis, buf))
+            buf = ""
+            if xpath[i:i + 2] == "//":
+                axis = "//"
+                i += 2
+                continue
+            axis = "/"
+            i += 1
+            continue
+        buf += ch
+        i += 1
+    steps.append((axis, buf))
+    return steps
+
+
+def _parse_step(step: str) -> tuple[str, list[str]]:
+    """解析单个 XPath 步骤为 (节点名, 谓词列表)"""
+    tag_end = step.find("[")
+    if tag_end == -1:
+        return step, []
+    tag, rest = step[:tag_end], step[tag_end:]
+    predicates, depth, quote, buf = [], 0, None, ""
+    for ch in rest:
+        if quote:
+            quote = None if ch == quote else quote
+        elif ch in "'\"":
+            quote = ch
+        elif ch == "[":
+            depth += 1
+            if depth == 1:
+                continue
+        elif ch == "]":
+            depth -= 1
+            if depth == 0:
+                predicates.append(buf)
+                buf = ""
+                continue
+        buf += ch
+    return tag, predicates
+
+
+def _match_tag(node: ET.Element, tag: str) -> bool:
+    return tag == "*" or node.tag == tag or UiHierarchy.class_name(node) == tag
+
+
+def _eval_condition(node: ET.Element, condition: str) -> bool:
+    if m := _XPATH_ATTR_EQ.match(condition):
+        return node.get(m.group(1)) == m.group(3)
+    if m := _XPATH_CONTAINS.match(condition):
+        attr_value = node.get(m.group(2))
+        if attr_value is None:
+            return False
+        if m.group(1) == "contains":
+            return m.group(4) in attr_value
+        return attr_value.startswith(m.group(4))
+    if m := _XPATH_TEXT_EQ.match(condition):
+        return (node.get("text") or node.text or "") == m.group(2)
+    if re.fullmatch(r"@[\w:-]+", condition):
+        return node.get(condition[1:]) is not None
+    raise ValueError(f"本地层级树不支持的 XPath 条件: [{condition}]")